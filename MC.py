@@ -1,69 +1,221 @@
-import customtkinter as ctk
-import tkinter as tk
-from tkinter import ttk, messagebox
-import psutil
-import threading
-import time
+import argparse
 import os
-import sys
+import queue
+import signal
+import threading
 from datetime import datetime
-import ctypes
-from ctypes import wintypes
 
-# 设置现代主题
-ctk.set_appearance_mode("Dark")
-ctk.set_default_color_theme("blue")
+from logpipe import LogPipeline
+from startup import StartupProfiler
+
+# 不使用策略配置时的选项名
+MANUAL_PROFILE = "手动设置"
+
+# 界面库在 main() 中加载，导入本模块本身几乎没有开销
+ctk = None
+tk = None
+messagebox = None
+
+
+def load_gui_modules(profiler):
+    """导入界面库并设置主题"""
+    global ctk, tk, messagebox
+    ctk = profiler.import_module("customtkinter")
+    tk = profiler.import_module("tkinter")
+    messagebox = profiler.import_module("tkinter.messagebox")
+
+    # 设置现代主题
+    ctk.set_appearance_mode("Dark")
+    ctk.set_default_color_theme("blue")
+
+
+class VirtualProcessList:
+    """固定数量的行控件组成的列表，滚动与刷新只替换可见行的文字，行数再多也不增加控件"""
+
+    def __init__(self, master, visible_rows=8, wheel_step=3):
+        self.visible_rows = visible_rows
+        self.wheel_step = wheel_step
+        self.items = []
+        self.offset = 0
+        font = ctk.CTkFont(family="Consolas", size=11)
+
+        self.frame = ctk.CTkFrame(master)
+        rows_frame = ctk.CTkFrame(self.frame, fg_color="transparent")
+        rows_frame.pack(side="left", fill="both", expand=True)
+        self.scrollbar = ctk.CTkScrollbar(self.frame, command=self.on_scroll)
+        self.scrollbar.pack(side="right", fill="y")
+
+        ctk.CTkLabel(rows_frame, text=self.format_header(), font=font, anchor="w",
+                     text_color="gray").pack(fill="x", padx=10)
+        self.labels = []
+        for _ in range(visible_rows):
+            label = ctk.CTkLabel(rows_frame, text="", font=font, anchor="w", height=18)
+            label.pack(fill="x", padx=10)
+            label.bind("<MouseWheel>", self.on_wheel)
+            self.labels.append(label)
+        # 每个行控件当前显示的文字，相同时不重新配置
+        self.shown = [""] * visible_rows
+        rows_frame.bind("<MouseWheel>", self.on_wheel)
+
+    @staticmethod
+    def format_header():
+        return f"{'PID':>7}  {'进程':<24}{'工作集':>9}{'私有':>10}{'交换':>10}"
+
+    @staticmethod
+    def format_row(stat):
+        mb = 1024 ** 2
+        return (f"{stat.pid:>7}  {stat.name[:24]:<24}{stat.rss / mb:>10.1f}"
+                f"{stat.private / mb:>10.1f}{stat.swap / mb:>10.1f}")
+
+    def set_items(self, items):
+        self.items = items
+        self.offset = max(0, min(self.offset, len(items) - self.visible_rows))
+        self.redraw()
+
+    def scroll_to(self, offset):
+        offset = max(0, min(int(offset), len(self.items) - self.visible_rows))
+        if offset != self.offset:
+            self.offset = offset
+            self.redraw()
+
+    def redraw(self):
+        """只重新配置文字发生变化的行"""
+        for i, label in enumerate(self.labels):
+            index = self.offset + i
+            text = self.format_row(self.items[index]) if index < len(self.items) else ""
+            if text != self.shown[i]:
+                label.configure(text=text)
+                self.shown[i] = text
+        total = len(self.items)
+        if total <= self.visible_rows:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self.offset / total, (self.offset + self.visible_rows) / total)
 
-# 定义 Windows API 常量和结构
-PROCESS_QUERY_INFORMATION = 0x0400
-PROCESS_SET_QUOTA = 0x0100
+    def on_scroll(self, action, value, unit=None):
+        # 滚动条回调：("moveto", 比例) 或 ("scroll", 步数, "units"/"pages")
+        if action == "moveto":
+            self.scroll_to(float(value) * len(self.items))
+        else:
+            step = self.visible_rows if unit == "pages" else 1
+            self.scroll_to(self.offset + int(value) * step)
 
-# 加载必要的 DLL
-kernel32 = ctypes.windll.kernel32
-psapi = ctypes.windll.psapi
+    def on_wheel(self, event):
+        self.scroll_to(self.offset - (self.wheel_step if event.delta > 0 else -self.wheel_step))
 
 
 class AdvancedMemoryCleanerGUI:
-    def __init__(self, root):
+    def __init__(self, root, profiler=None, profile_startup=False, metrics_port=None,
+                 log_file=None, exclude_leaks=False, journal_dir=None, profiles_dir=None):
         self.root = root
         self.root.title("Advanced Memory Cleaner Pro")
-        self.root.geometry("900x700")
+        self.root.geometry("900x860")
         self.root.minsize(850, 650)
 
-        # 先初始化所有变量
-        self.initialize_variables()
+        self.profiler = profiler if profiler is not None else StartupProfiler()
+        self.profile_startup = profile_startup
+        # 设置后在本机该端口提供 Prometheus 指标
+        self.metrics_port = metrics_port
+        # 为 True 时清理跳过疑似内存泄漏的进程
+        self.exclude_leaks = exclude_leaks
+        # 采样与清理结果写入的磁盘日志目录，False 表示不写入
+        self.journal_dir = journal_dir
+        # 策略配置所在目录，其中的 .json / .toml 文件出现在界面的下拉菜单中
+        self.profiles_dir = profiles_dir or os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                         "profiles")
+        self.engine = None
+        # asyncio 编排核心，采样、自动清理与指标导出都在其中运行
+        self.runtime = None
+        self.sampler = None
+        self.admin = None
+        self.log_text = None
+        # 日志先进入线程安全的队列，由界面线程每 log_flush_ms 毫秒批量写入控件
+        self.log_pipeline = LogPipeline(log_file=log_file)
+        self.log_flush_ms = 200
+        self.log_line_count = 0
+
+        # 先显示带启动日志的占位界面，让窗口立即完成首次绘制
+        with self.profiler.phase("占位界面"):
+            self.setup_basic_ui()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.root.after(0, self.flush_log)
+
+        # 首帧绘制之后再加载清理引擎与完整界面
+        self.root.after(10, self.finish_startup)
 
-        # 然后设置基础UI
-        self.setup_basic_ui()
+    def finish_startup(self):
+        """加载重量级模块并构建完整界面"""
+        self.profiler.mark("首帧绘制")
 
-        # 检查权限
+        with self.profiler.phase("初始化变量与引擎"):
+            self.initialize_variables()
+
+        with self.profiler.phase("完整界面"):
+            self.setup_full_ui()
+
+        with self.profiler.phase("启动编排核心"):
+            self.start_runtime()
+            self.update_memory_info()
+
+        # 权限检查在后台线程中进行，不阻塞界面
         self.check_and_request_admin()
+        self.profiler.mark("启动完成")
 
-        # 最后设置完整UI
-        self.setup_full_ui()
-        self.update_memory_info()
+        if self.profile_startup:
+            report = self.profiler.report()
+            print(report, flush=True)
+            for line in report.splitlines():
+                self.log(line)
 
     def initialize_variables(self):
         """初始化所有变量"""
+        from engine import DEFAULT_OPTIONS, STRATEGIES, MemoryCleanEngine
+        from history import MemoryHistory
+        from scheduler import DEFAULT_INTERVAL, DEFAULT_THRESHOLD, AutoCleanScheduler
+
+        # 清理引擎，所有平台相关的清理逻辑都在其中
+        self.engine = MemoryCleanEngine(log=self.log, track_rebound=True)
+
         # 清理选项
         self.clean_options = {
-            "working_set": tk.BooleanVar(value=True),
-            "system_working_set": tk.BooleanVar(value=True),
-            "standby_list": tk.BooleanVar(value=True),
-            "virtual_memory": tk.BooleanVar(value=False)
+            name: tk.BooleanVar(value=name in DEFAULT_OPTIONS) for name in STRATEGIES
         }
 
         # 自动清理设置
         self.auto_clean_enabled = tk.BooleanVar(value=False)
-        self.clean_threshold = tk.IntVar(value=80)
-        self.clean_interval = tk.IntVar(value=30)
+        self.clean_threshold = tk.IntVar(value=DEFAULT_THRESHOLD)
+        self.clean_interval = tk.IntVar(value=DEFAULT_INTERVAL)
+        # 自动清理调度器：滞回、冷却间隔、退避，并保证同一时刻只有一次清理
+        self.auto_scheduler = AutoCleanScheduler(
+            high_watermark=self.clean_threshold.get(),
+            min_interval=self.clean_interval.get()
+        )
+
+        # 内存使用率历史（固定内存占用的多层级环形缓冲区），由采样线程写入
+        self.history = MemoryHistory()
+
+        # 采样与界面刷新的间隔（毫秒），两者相互独立
+        self.sample_interval_ms = 1000
+        self.repaint_interval_ms = 250
+
+        # 按进程的内存排行，由编排核心定期增量刷新
+        self.process_index = None
+        self.leak_detector = None
+        self.process_sort = "rss"
+        self.process_list = None
+        self.process_stats_label = None
+
+        # 策略配置：显示名 -> 文件路径，当前选中的显示名
+        self.profile_paths = {}
+        self.active_profile = MANUAL_PROFILE
+        self.profile_menu = None
 
         # 其他变量
         self.memory_cards = {}
+        self.card_state = {}
         self.status_label = None
         self.clean_btn = None
         self.threshold_display = None
-        self.log_text = None
 
     def setup_basic_ui(self):
         """设置基础UI组件，特别是日志系统"""
@@ -77,9 +229,9 @@ class AdvancedMemoryCleanerGUI:
         ctk.CTkLabel(log_frame, text="启动日志", font=ctk.CTkFont(size=14, weight="bold")
                      ).pack(anchor="w", padx=10, pady=10)
 
-        self.log_text = ctk.CTkTextbox(
+        self.attach_log_text(ctk.CTkTextbox(
             log_frame, font=ctk.CTkFont(family="Consolas", size=11)
-        )
+        ))
         self.log_text.pack(fill="both", expand=True, padx=10, pady=(0, 10))
 
         self.log("正在启动内存清理工具...")
@@ -95,56 +247,57 @@ class AdvancedMemoryCleanerGUI:
         self.create_memory_cards()
         self.create_clean_options()
         self.create_control_panel()
+        self.create_process_section()
         self.create_log_section()
 
         self.log("用户界面初始化完成")
 
     def check_and_request_admin(self):
-        """检查并请求管理员权限"""
+        """在后台线程中检查管理员权限，结果回到界面线程处理"""
         self.log("检查管理员权限...")
 
-        if not self.is_admin():
-            self.log("检测到非管理员权限，尝试自动提权...")
-            if self.request_admin_privileges():
-                self.log("提权成功，程序将以管理员权限重新启动")
-                # 给用户一点时间看到消息
-                self.root.update()
-                time.sleep(2)
-                sys.exit(0)
-            else:
-                self.log("自动提权失败，请手动以管理员权限运行")
-                messagebox.showwarning(
-                    "权限警告",
-                    "无法获取管理员权限，内存清理效果将受限。\n"
-                    "请手动以管理员身份重新运行此程序。"
-                )
+        def probe():
+            admin = self.engine.is_admin()
+            self.root.after(0, self._on_admin_checked, admin)
+
+        threading.Thread(target=probe, name="admin-probe", daemon=True).start()
+
+    def _on_admin_checked(self, admin):
+        """权限检查完成：更新状态，必要时请求提权"""
+        self.admin = admin
+        self.status_label.configure(
+            text="● 管理员权限" if admin else "● 标准权限",
+            text_color="green" if admin else "red"
+        )
+
+        if admin:
+            self.log("✓ 已获得管理员权限 - 可以使用完整清理功能")
+            return
+
+        self.log("检测到非管理员权限，尝试自动提权...")
+        if self.request_admin_privileges():
+            self.log("提权成功，程序将以管理员权限重新启动")
+            # 给用户一点时间看到消息，不阻塞界面
+            self.root.after(2000, self.on_close)
         else:
-            self.log("程序已获得管理员权限")
+            self.log("自动提权失败，请手动以管理员权限运行")
+            self.log("⚠ 未获得管理员权限 - 清理效果可能受限")
+            messagebox.showwarning(
+                "权限警告",
+                "无法获取管理员权限，内存清理效果将受限。\n"
+                "请手动以管理员身份重新运行此程序。"
+            )
 
     def is_admin(self):
         """检查是否以管理员权限运行"""
-        try:
-            return ctypes.windll.shell32.IsUserAnAdmin()
-        except:
-            return False
+        if self.admin is None:
+            self.admin = self.engine.is_admin()
+        return self.admin
 
     def request_admin_privileges(self):
         """请求管理员权限"""
         try:
-            # 获取当前可执行文件路径
-            if getattr(sys, 'frozen', False):
-                # 如果是打包后的exe
-                executable = sys.executable
-            else:
-                # 如果是Python脚本
-                executable = sys.executable
-                args = [executable] + sys.argv
-
-            # 重新以管理员权限启动
-            result = ctypes.windll.shell32.ShellExecuteW(
-                None, "runas", executable, " ".join(sys.argv), None, 1
-            )
-            return result > 32
+            return self.engine.backend.request_admin_privileges()
         except Exception as e:
             self.log(f"提权请求失败: {e}")
             return False
@@ -162,14 +315,11 @@ class AdvancedMemoryCleanerGUI:
         )
         title_label.pack(side="left", padx=20, pady=20)
 
-        # 权限状态显示
-        admin_status = "● 管理员权限" if self.is_admin() else "● 标准权限"
-        admin_color = "green" if self.is_admin() else "red"
-
+        # 权限状态显示，后台检查完成后更新
         self.status_label = ctk.CTkLabel(
             header_frame,
-            text=admin_status,
-            text_color=admin_color,
+            text="● 检查权限...",
+            text_color="gray",
             font=ctk.CTkFont(size=12)
         )
         self.status_label.pack(side="right", padx=20, pady=20)
@@ -239,7 +389,8 @@ class AdvancedMemoryCleanerGUI:
 
         for i, (text, key) in enumerate(options):
             row, col = i // 2, i % 2
-            cb = ctk.CTkCheckBox(options_grid, text=text, variable=self.clean_options[key])
+            cb = ctk.CTkCheckBox(options_grid, text=text, variable=self.clean_options[key],
+                                 command=self.sync_auto_clean)
             cb.grid(row=row, column=col, sticky="w", padx=10, pady=5)
             options_grid.columnconfigure(col, weight=1)
 
@@ -263,12 +414,13 @@ class AdvancedMemoryCleanerGUI:
 
         auto_clean_btn = ctk.CTkSwitch(
             auto_frame, text="自动清理", variable=self.auto_clean_enabled,
-            font=ctk.CTkFont(size=12)
+            command=self.sync_auto_clean, font=ctk.CTkFont(size=12)
         )
         auto_clean_btn.pack(side="top")
 
         self.threshold_display = ctk.CTkLabel(
-            auto_frame, text=f"阈值: {self.clean_threshold.get()}%", font=ctk.CTkFont(size=10)
+            auto_frame, text=f"阈值: {self.clean_threshold.get()}%  冷却: {self.clean_interval.get()}s",
+            font=ctk.CTkFont(size=10)
         )
         self.threshold_display.pack(side="top")
 
@@ -283,11 +435,107 @@ class AdvancedMemoryCleanerGUI:
         )
         threshold_slider.pack(side="left", padx=10)
 
+        ctk.CTkLabel(threshold_frame, text="冷却时间:").pack(side="left", padx=(20, 5))
+
+        interval_slider = ctk.CTkSlider(
+            threshold_frame, from_=10, to=300, number_of_steps=29,
+            variable=self.clean_interval, width=150,
+            command=self.update_threshold_display
+        )
+        interval_slider.pack(side="left", padx=10)
+
+        ctk.CTkLabel(threshold_frame, text="策略配置:").pack(side="left", padx=(20, 5))
+
+        from policy import list_profiles
+        self.profile_paths = {
+            os.path.splitext(os.path.basename(path))[0]: path
+            for path in list_profiles(self.profiles_dir)
+        }
+        self.profile_menu = ctk.CTkOptionMenu(
+            threshold_frame, values=[MANUAL_PROFILE] + list(self.profile_paths),
+            command=self.select_profile, width=120
+        )
+        self.profile_menu.set(MANUAL_PROFILE)
+        self.profile_menu.pack(side="left", padx=5)
+
         self.clean_threshold.trace("w", lambda *args: self.update_threshold_display(None))
+        self.clean_interval.trace("w", lambda *args: self.update_threshold_display(None))
 
     def update_threshold_display(self, value):
-        """更新阈值显示"""
-        self.threshold_display.configure(text=f"阈值: {self.clean_threshold.get()}%")
+        """更新阈值显示，并同步到自动清理调度器"""
+        if self.active_profile != MANUAL_PROFILE:
+            text = f"策略: {self.active_profile}  冷却: {self.clean_interval.get()}s"
+        else:
+            text = f"阈值: {self.clean_threshold.get()}%  冷却: {self.clean_interval.get()}s"
+        self.threshold_display.configure(text=text)
+        self.auto_scheduler.configure(
+            high_watermark=self.clean_threshold.get(),
+            min_interval=self.clean_interval.get()
+        )
+
+    def select_profile(self, choice):
+        """切换策略配置，立即对下一次采样生效；加载失败时保留当前配置"""
+        if choice == MANUAL_PROFILE:
+            self.runtime.policy = None
+            self.log("已切换为手动设置：按阈值与勾选的项目自动清理")
+        else:
+            from policy import load_profile
+
+            try:
+                policy = load_profile(self.profile_paths[choice], self.engine.selector)
+            except (OSError, ValueError) as e:
+                self.log(f"✗ 加载策略配置 {choice} 失败: {str(e)}")
+                self.profile_menu.set(self.active_profile)
+                return
+            self.runtime.policy = policy
+            self.log(f"✓ 已切换到策略配置 {policy.name}（{len(policy.rules)} 条规则）")
+        self.active_profile = choice
+        self.update_threshold_display(None)
+
+    def reload_profile(self):
+        """重新读取当前的策略配置文件（SIGHUP）"""
+        if self.active_profile != MANUAL_PROFILE:
+            self.select_profile(self.active_profile)
+
+    def create_process_section(self):
+        """创建进程内存排行"""
+        process_frame = ctk.CTkFrame(self.main_frame)
+        process_frame.pack(fill="x", pady=(0, 10))
+
+        title_frame = ctk.CTkFrame(process_frame, fg_color="transparent")
+        title_frame.pack(fill="x", padx=10, pady=(10, 5))
+
+        ctk.CTkLabel(title_frame, text="进程内存排行", font=ctk.CTkFont(size=14, weight="bold")
+                     ).pack(side="left")
+
+        sort_labels = {"工作集": "rss", "私有": "private", "交换": "swap"}
+        sort_button = ctk.CTkSegmentedButton(
+            title_frame, values=list(sort_labels),
+            command=lambda label: self.set_process_sort(sort_labels[label])
+        )
+        sort_button.set("工作集")
+        sort_button.pack(side="left", padx=20)
+
+        self.process_stats_label = ctk.CTkLabel(title_frame, text="", font=ctk.CTkFont(size=10))
+        self.process_stats_label.pack(side="right")
+
+        self.process_list = VirtualProcessList(process_frame)
+        self.process_list.frame.pack(fill="x", padx=10, pady=(0, 10))
+
+    def set_process_sort(self, key):
+        self.process_sort = key
+        self.update_process_list()
+
+    def update_process_list(self, stats=None):
+        """按当前排序刷新进程列表与枚举开销"""
+        if self.process_index is None:
+            return
+        self.process_list.set_items(self.process_index.sorted_rows(self.process_sort))
+        if stats is not None:
+            self.process_stats_label.configure(
+                text=f"{stats['total']} 个进程  读取 {stats['updated']}  跳过 {stats['skipped']}  "
+                     f"耗时 {stats['elapsed'] * 1000:.1f}ms"
+            )
 
     def create_log_section(self):
         """创建日志区域"""
@@ -297,211 +545,146 @@ class AdvancedMemoryCleanerGUI:
         ctk.CTkLabel(log_frame, text="操作日志", font=ctk.CTkFont(size=14, weight="bold")
                      ).pack(anchor="w", padx=10, pady=10)
 
-        self.log_text = ctk.CTkTextbox(
+        self.attach_log_text(ctk.CTkTextbox(
             log_frame, font=ctk.CTkFont(family="Consolas", size=11)
-        )
+        ))
         self.log_text.pack(fill="both", expand=True, padx=10, pady=(0, 10))
 
         self.log("内存清理工具已启动")
-        if self.is_admin():
-            self.log("✓ 已获得管理员权限 - 可以使用完整清理功能")
-        else:
-            self.log("⚠ 未获得管理员权限 - 清理效果可能受限")
-
-    # 修复的内存清理方法 - 使用正确的 Windows API 调用
-    def clean_working_set(self):
-        """使用正确的方法清理工作集"""
-        try:
-            # EmptyWorkingSet 实际上在 psapi.dll 中
-            # 使用正确的函数签名
-            EmptyWorkingSet = psapi.EmptyWorkingSet
-            EmptyWorkingSet.argtypes = [wintypes.HANDLE]
-            EmptyWorkingSet.restype = wintypes.BOOL
-
-            # 获取当前进程句柄
-            current_process = kernel32.GetCurrentProcess()
-
-            # 使用 EmptyWorkingSet
-            result = EmptyWorkingSet(current_process)
-            if result:
-                self.log("✓ 工作集清理成功")
-                return True
-            else:
-                error_code = kernel32.GetLastError()
-                self.log(f"✗ EmptyWorkingSet 失败，错误代码: {error_code}")
-                return False
 
-        except Exception as e:
-            self.log(f"✗ 工作集清理异常: {str(e)}")
-            return False
-
-    def clean_system_working_set(self):
-        """清理系统工作集"""
-        try:
-            # 使用 SetProcessWorkingSetSize 来清理系统缓存
-            SetProcessWorkingSetSize = kernel32.SetProcessWorkingSetSize
-            SetProcessWorkingSetSize.argtypes = [wintypes.HANDLE, ctypes.c_size_t, ctypes.c_size_t]
-            SetProcessWorkingSetSize.restype = wintypes.BOOL
-
-            # 使用 -1 表示当前进程
-            result = SetProcessWorkingSetSize(-1, -1, -1)
-
-            if result:
-                self.log("✓ 系统工作集清理成功")
-                return True
-            else:
-                # 备选方法：使用系统命令清理缓存
-                try:
-                    # 使用 Windows 内置工具清理系统缓存
-                    os.system('echo 1 > nul')  # 占位符，实际可以使用更有效的方法
-                    self.log("✓ 使用备选方法清理系统缓存")
-                    return True
-                except:
-                    self.log("⚠ 系统工作集清理效果有限")
-                    return True  # 即使部分失败也返回True，因为可能还是有一些效果的
-
-        except Exception as e:
-            self.log(f"✗ 系统工作集清理异常: {str(e)}")
-            return False
-
-    def clean_standby_list(self):
-        """清理备用列表 - 使用可靠的方法"""
-        try:
-            # 使用系统工具清理备用列表
-            # 在 Windows 中，可以使用 EmptyWorkingSet 清理所有进程
-            cleaned_count = 0
-
-            # 首先尝试清理当前进程
-            if self.clean_working_set():
-                cleaned_count += 1
-
-            # 然后尝试清理其他非关键进程
-            for proc in psutil.process_iter(['pid', 'name']):
-                try:
-                    pid = proc.info['pid']
-                    # 跳过系统关键进程和自身
-                    if pid in [0, 4, os.getpid()]:
-                        continue
-
-                    # 尝试打开进程
-                    handle = kernel32.OpenProcess(
-                        PROCESS_SET_QUOTA | PROCESS_QUERY_INFORMATION,
-                        False, pid
-                    )
-
-                    if handle:
-                        # 使用正确的 EmptyWorkingSet 调用
-                        EmptyWorkingSet = psapi.EmptyWorkingSet
-                        EmptyWorkingSet.argtypes = [wintypes.HANDLE]
-                        EmptyWorkingSet.restype = wintypes.BOOL
-
-                        if EmptyWorkingSet(handle):
-                            cleaned_count += 1
-                        kernel32.CloseHandle(handle)
-
-                except (psutil.NoSuchProcess, OSError):
-                    continue
-
-            self.log(f"✓ 备用列表清理完成，清理了 {cleaned_count} 个进程")
-            return cleaned_count > 0
-
-        except Exception as e:
-            self.log(f"✗ 备用列表清理异常: {str(e)}")
-            # 使用备选方法
-            return self.alternative_standby_clean()
+    def get_detailed_memory_info(self):
+        """获取详细的内存信息"""
+        return self.engine.get_detailed_memory_info()
+
+    def start_runtime(self):
+        """启动编排核心：采样、压力事件、自动清理与指标导出"""
+        from orchestrator import CleanerRuntime
+        from pressure import create_pressure_source
+        from leak import LeakDetector
+        from proctop import ProcessIndex
+
+        metrics, exporter = self.create_metrics_exporter()
+        self.process_index = ProcessIndex(self.engine.backend)
+        self.leak_detector = LeakDetector()
+        if self.exclude_leaks:
+            self.engine.selector.add_exclusion(self.leak_detector.skip_pids)
+        source = create_pressure_source()
+        if source is None:
+            self.log("未检测到内存压力事件，自动清理使用定时检查")
+        else:
+            self.log(f"✓ 自动清理由内存压力事件触发 ({source.name})")
 
-    def alternative_standby_clean(self):
-        """备用的备用列表清理方法"""
-        try:
-            # 使用 Windows 内置工具或命令
-            # 这里可以添加其他清理方法
-            self.log("⚠ 使用备用方法清理备用列表")
-            return True
-        except Exception as e:
-            self.log(f"✗ 备用方法也失败: {str(e)}")
-            return False
+        journal = self.open_journal()
+        self.runtime = CleanerRuntime(
+            self.engine, self.auto_scheduler, interval=self.sample_interval_ms / 1000,
+            history=self.history, metrics=metrics, exporter=exporter, pressure_source=source,
+            process_index=self.process_index, leak_detector=self.leak_detector, journal=journal
+        )
+        self.sampler = self.runtime.sampler
+        self.sync_auto_clean()
+        self.runtime.start()
+        if hasattr(signal, "SIGHUP"):
+            # 信号处理函数在界面线程中运行，转交给事件循环处理
+            signal.signal(signal.SIGHUP, lambda signum, frame: self.root.after(0, self.reload_profile))
+
+    def open_journal(self):
+        """打开磁盘日志，关闭或无法写入时返回 None"""
+        if self.journal_dir is False:
+            return None
+        from journal import Journal
 
-    def clean_virtual_memory(self):
-        """清理虚拟内存"""
         try:
-            # 强制垃圾回收
-            import gc
-            for i in range(3):
-                gc.collect()
-
-            self.log("✓ 虚拟内存优化完成")
-            return True
-        except Exception as e:
-            self.log(f"✗ 虚拟内存清理异常: {str(e)}")
-            return False
-
-    def get_detailed_memory_info(self):
-        """获取详细的内存信息"""
-        memory = psutil.virtual_memory()
-        swap = psutil.swap_memory()
+            journal = Journal(self.journal_dir)
+        except OSError as e:
+            self.log(f"✗ 无法打开历史日志: {str(e)}")
+            return None
+        self.log(f"✓ 采样与清理结果写入 {journal.directory}")
+        return journal
+
+    def create_metrics_exporter(self):
+        """按 --metrics-port 创建指标端点，未设置或启动失败时返回 (None, None)"""
+        if self.metrics_port is None:
+            return None, None
+        from metrics import CleanerMetrics, MetricsExporter
 
         try:
-            return {
-                'physical': {
-                    'used': memory.used,
-                    'total': memory.total,
-                    'percent': memory.percent
-                },
-                'virtual': {
-                    'used': swap.used,
-                    'total': swap.total if swap.total > 0 else memory.total * 2,
-                    'percent': swap.percent
-                },
-                'system': {
-                    'used': memory.used * 0.4,
-                    'total': memory.total,
-                    'percent': memory.percent * 0.4
-                },
-                'working_set': {
-                    'used': memory.used * 0.6,
-                    'total': memory.total,
-                    'percent': memory.percent * 0.6
-                }
-            }
-        except Exception as e:
-            self.log(f"获取内存信息错误: {e}")
-            return {
-                'physical': {'used': memory.used, 'total': memory.total, 'percent': memory.percent},
-                'virtual': {'used': swap.used, 'total': swap.total, 'percent': swap.percent},
-                'system': {'used': memory.used * 0.4, 'total': memory.total, 'percent': memory.percent * 0.4},
-                'working_set': {'used': memory.used * 0.6, 'total': memory.total, 'percent': memory.percent * 0.6}
-            }
+            metrics = CleanerMetrics()
+            exporter = MetricsExporter(metrics, port=self.metrics_port).start()
+        except OSError as e:
+            self.log(f"✗ 指标端点启动失败: {str(e)}")
+            return None, None
+        host, port = exporter.address[:2]
+        self.log(f"✓ 指标端点: http://{host}:{port}/metrics")
+        return metrics, exporter
+
+    def sync_auto_clean(self):
+        """把自动清理开关与勾选的项目同步给编排核心（界面线程）"""
+        if self.runtime is None:
+            return
+        options = self.selected_clean_options()
+        self.runtime.auto_options = tuple(options) if self.auto_clean_enabled.get() and options else None
+
+    def process_runtime_events(self):
+        """处理编排核心发来的事件"""
+        while True:
+            try:
+                event, data = self.runtime.events.get_nowait()
+            except queue.Empty:
+                return
+            if event == "clean_started":
+                if data['rule'] is not None:
+                    self.log(f"策略规则 {data['rule']} 触发自动清理")
+                elif data['trigger'] != "manual":
+                    self.log("内存使用率超过阈值，开始自动清理" if data['trigger'] == "threshold"
+                             else "检测到内存压力，开始自动清理")
+                self.status_label.configure(text="● 清理中...", text_color="orange")
+                self.clean_btn.configure(state="disabled")
+            elif event == "clean_done":
+                result = data['result']
+                self._update_after_clean(result['before_percent'], result['after_percent'],
+                                         result['freed_gb'], result['results'],
+                                         result['success_count'])
+            elif event == "clean_error":
+                self._clean_memory_error(data['message'])
+            elif event == "clean_cancelled":
+                self.status_label.configure(text="● 监控中", text_color="green")
+                self.clean_btn.configure(state="normal")
+                self.log("⚠ 清理已取消")
+            elif event == "processes":
+                self.update_process_list(data['stats'])
+            elif event == "leak":
+                suspect = data['suspect']
+                self.log(f"⚠ 疑似内存泄漏: {suspect.name} (PID {suspect.pid}) "
+                         f"工作集 {suspect.rss / 1024 ** 2:.0f}MB，"
+                         f"每小时增长 {suspect.growth / 1024 ** 2:.1f}MB (R²={suspect.r2:.2f})")
+            elif event == "error":
+                self.log(f"⚠ {data['message']}")
 
     def update_memory_info(self):
-        """更新内存信息显示"""
+        """取出采样线程发布的最新快照并更新内存信息显示"""
         try:
-            memory_info = self.get_detailed_memory_info()
+            snapshot = self.sampler.drain()
+            if snapshot is not None:
+                for mem_type in self.memory_cards:
+                    info = getattr(snapshot, mem_type)
+                    used_gb = info.used / (1024 ** 3)
+                    total_gb = info.total / (1024 ** 3)
+                    percent = info.percent / 100
 
-            for mem_type, info in memory_info.items():
-                used_gb = info['used'] / (1024 ** 3)
-                total_gb = info['total'] / (1024 ** 3)
-                percent = info['percent'] / 100
+                    self.update_memory_card(mem_type, used_gb, total_gb, percent)
 
-                self.update_memory_card(mem_type, used_gb, total_gb, percent)
-
-            # 检查自动清理
-            if (self.auto_clean_enabled.get() and
-                    memory_info['physical']['percent'] > self.clean_threshold.get()):
-                self.clean_memory()
+            # 自动清理由编排核心决定，这里只处理清理开始与结束的界面更新
+            self.process_runtime_events()
 
         except Exception as e:
             self.log(f"更新内存信息时出错: {str(e)}")
 
-        # 1秒后再次更新
-        self.root.after(1000, self.update_memory_info)
+        self.root.after(self.repaint_interval_ms, self.update_memory_info)
 
     def update_memory_card(self, card_key, used_gb, total_gb, percent):
-        """更新内存卡片显示"""
+        """更新内存卡片显示，只重新配置显示内容发生变化的控件"""
         card = self.memory_cards[card_key]
-
-        card["usage"].configure(text=f"{used_gb:.1f} GB / {total_gb:.1f} GB")
-        card["percent"].configure(text=f"{percent * 100:.1f}%")
-        card["progress"].set(percent)
+        state = self.card_state.setdefault(card_key, {})
 
         # 根据使用率设置颜色
         if percent < 0.7:
@@ -511,97 +694,50 @@ class AdvancedMemoryCleanerGUI:
         else:
             color = "#F44336"
 
-        card["progress"].configure(progress_color=color)
+        displayed = {
+            "usage": f"{used_gb:.1f} GB / {total_gb:.1f} GB",
+            "percent": f"{percent * 100:.1f}%",
+            "progress": round(percent, 3),
+            "color": color,
+        }
+
+        if state.get("usage") != displayed["usage"]:
+            card["usage"].configure(text=displayed["usage"])
+        if state.get("percent") != displayed["percent"]:
+            card["percent"].configure(text=displayed["percent"])
+        if state.get("progress") != displayed["progress"]:
+            card["progress"].set(displayed["progress"])
+        if state.get("color") != displayed["color"]:
+            card["progress"].configure(progress_color=color)
+
+        state.update(displayed)
+
+    def on_close(self):
+        """关闭窗口前停止后台线程"""
+        if self.runtime is not None:
+            self.runtime.stop()
+        self.log_pipeline.close()
+        self.root.destroy()
+
+    def selected_clean_options(self):
+        """当前勾选的清理项目"""
+        return [name for name, var in self.clean_options.items() if var.get()]
 
     def clean_memory(self):
         """执行内存清理"""
-        selected_options = [
-            name for name, var in self.clean_options.items() if var.get()
-        ]
+        selected_options = self.selected_clean_options()
 
         if not selected_options:
             messagebox.showwarning("警告", "请选择至少一个清理选项!")
             return
 
+        if self.runtime.request_clean(selected_options) is None:
+            self.log("⚠ 已有清理正在进行，请稍候")
+            return
+
         self.status_label.configure(text="● 清理中...", text_color="orange")
         self.clean_btn.configure(state="disabled")
 
-        # 在新线程中执行清理
-        thread = threading.Thread(
-            target=self._perform_memory_clean,
-            args=(selected_options,)
-        )
-        thread.daemon = True
-        thread.start()
-
-    def _perform_memory_clean(self, options):
-        """执行真实的内存清理操作"""
-        try:
-            # 获取清理前的内存状态
-            memory_before = psutil.virtual_memory()
-            swap_before = psutil.swap_memory()
-
-            before_physical = memory_before.percent
-            before_available = memory_before.available
-
-            self.log(f"清理前 - 使用率: {before_physical:.1f}%, 可用: {before_available / (1024 ** 3):.2f}GB")
-
-            # 执行清理操作
-            results = []
-            success_count = 0
-
-            if "working_set" in options:
-                if self.clean_working_set():
-                    results.append("工作集")
-                    success_count += 1
-                time.sleep(0.5)
-
-            if "system_working_set" in options:
-                if self.clean_system_working_set():
-                    results.append("系统工作集")
-                    success_count += 1
-                time.sleep(0.5)
-
-            if "standby_list" in options:
-                if self.clean_standby_list():
-                    results.append("备用列表")
-                    success_count += 1
-                time.sleep(1)
-
-            if "virtual_memory" in options:
-                if self.clean_virtual_memory():
-                    results.append("虚拟内存")
-                    success_count += 1
-                time.sleep(0.5)
-
-            # 等待系统完全更新内存状态
-            time.sleep(2)
-
-            # 多次采样以确保数据稳定
-            memory_samples = []
-            for i in range(3):
-                memory_after = psutil.virtual_memory()
-                memory_samples.append({
-                    'percent': memory_after.percent,
-                    'available': memory_after.available
-                })
-                time.sleep(0.5)
-
-            # 取平均值
-            after_physical = sum(s['percent'] for s in memory_samples) / len(memory_samples)
-            after_available = sum(s['available'] for s in memory_samples) / len(memory_samples)
-
-            # 计算实际释放量
-            freed_bytes = after_available - before_available
-            freed_gb = freed_bytes / (1024 ** 3)
-
-            # 更新UI
-            self.root.after(0, self._update_after_clean,
-                            before_physical, after_physical, freed_gb, results, success_count)
-
-        except Exception as e:
-            self.root.after(0, self._clean_memory_error, str(e))
-
     def _update_after_clean(self, before_percent, after_percent, freed_gb, results, success_count):
         """清理后更新界面"""
         self.status_label.configure(text="● 监控中", text_color="green")
@@ -639,15 +775,54 @@ class AdvancedMemoryCleanerGUI:
         self.log(f"清理失败: {error_msg}")
 
     def log(self, message):
-        """添加日志"""
-        self.log_text.insert("end", f"{message}\n")
-        self.log_text.see("end")
+        """添加日志，可在任意线程调用"""
+        self.log_pipeline.put(message)
+
+    def attach_log_text(self, textbox):
+        """使用新的日志控件，并回填最近的日志"""
+        self.log_text = textbox
+        recent = list(self.log_pipeline.recent)
+        if recent:
+            self.log_text.insert("end", "\n".join(recent) + "\n")
+        self.log_line_count = len(recent)
+
+    def flush_log(self):
+        """把积压的日志一次性写入控件，超出上限时删除最早的行"""
+        lines = self.log_pipeline.drain()
+        if lines and self.log_text is not None:
+            self.log_text.insert("end", "\n".join(lines) + "\n")
+            self.log_line_count += len(lines)
+            excess = self.log_line_count - self.log_pipeline.max_lines
+            if excess > 0:
+                self.log_text.delete("1.0", f"{excess + 1}.0")
+                self.log_line_count -= excess
+            self.log_text.see("end")
+        self.root.after(self.log_flush_ms, self.flush_log)
 
 
 def main():
     """主函数"""
-    root = ctk.CTk()
-    app = AdvancedMemoryCleanerGUI(root)
+    profiler = StartupProfiler()
+    parser = argparse.ArgumentParser(description="内存清理工具图形界面")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="启动完成后输出各阶段的导入与初始化耗时")
+    parser.add_argument("--metrics-port", type=int, help="在 127.0.0.1 的该端口提供 Prometheus 指标")
+    parser.add_argument("--log-file", help="同时把日志写入滚动日志文件")
+    parser.add_argument("--exclude-leaks", action="store_true", help="清理时跳过疑似内存泄漏的进程")
+    parser.add_argument("--journal", help="历史日志目录")
+    parser.add_argument("--no-journal", action="store_true", help="不写入历史日志")
+    parser.add_argument("--profiles", help="策略配置目录，默认为程序目录下的 profiles")
+    # 以管理员身份重启时会原样传回命令行，忽略无法识别的参数
+    args, _ = parser.parse_known_args()
+
+    load_gui_modules(profiler)
+    with profiler.phase("创建窗口"):
+        root = ctk.CTk()
+    app = AdvancedMemoryCleanerGUI(root, profiler=profiler, profile_startup=args.profile_startup,
+                                   metrics_port=args.metrics_port, log_file=args.log_file,
+                                   exclude_leaks=args.exclude_leaks,
+                                   journal_dir=False if args.no_journal else args.journal,
+                                   profiles_dir=args.profiles)
     root.mainloop()
 
 
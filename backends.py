@@ -0,0 +1,602 @@
+"""内存清理平台后端：Windows (ctypes)、Linux (/proc 与 cgroup) 以及测试用的内存假后端"""
+import ctypes
+import gc
+import inspect
+import os
+import sys
+import threading
+import time
+from collections import namedtuple
+
+import psutil
+
+from breakdown import MeminfoReader, make_breakdown, performance_breakdown
+
+# Windows 的系统空闲进程与 System 进程，任何后端都不会去清理
+PROTECTED_PIDS = (0, 4)
+# Linux 上的 idle、init 与 kthreadd；其余内核线程按 PF_KTHREAD 标志识别
+LINUX_PROTECTED_PIDS = (0, 1, 2)
+PF_KTHREAD = 0x00200000
+
+# 与 psutil 返回值字段一致的内存快照，供假后端使用
+MemoryStat = namedtuple("MemoryStat", ["total", "available", "percent", "used", "free"])
+SwapStat = namedtuple("SwapStat", ["total", "used", "free", "percent", "sin", "sout"])
+
+
+class BaseBackend:
+    """平台后端基类，定义清理引擎所需的全部操作"""
+
+    name = "base"
+    # swap_io() 是否提供真实的换入、换出计数，不提供时交换区限速没有依据
+    swap_io_counters = True
+
+    def is_admin(self):
+        """检查是否以管理员权限运行"""
+        return False
+
+    def request_admin_privileges(self):
+        """请求管理员权限"""
+        return False
+
+    def capabilities(self):
+        """当前平台与权限下可用的清理机制"""
+        return {}
+
+    def virtual_memory(self):
+        """获取物理内存状态"""
+        return psutil.virtual_memory()
+
+    def swap_memory(self):
+        """获取交换区状态"""
+        return psutil.swap_memory()
+
+    def swap_io(self):
+        """累计换入、换出字节数；Windows 上 psutil 不提供，始终为 0"""
+        swap = self.swap_memory()
+        return swap.sin, swap.sout
+
+    def memory_breakdown(self):
+        """按类别统计内存，返回 breakdown.make_breakdown 格式的字典"""
+        memory = self.virtual_memory()
+        swap = self.swap_memory()
+        # psutil 在不同平台提供的缓存字段不同，缺失的按 0 计算
+        system = sum(getattr(memory, name, 0) for name in ("buffers", "cached", "wired"))
+        return make_breakdown(
+            memory.total, memory.available, memory.used, memory.percent,
+            swap.total, swap.used,
+            system=system,
+            working_set=max(0, memory.used - getattr(memory, "wired", 0)),
+        )
+
+    def iter_processes(self):
+        """枚举进程，产出 (pid, name)"""
+        for proc in psutil.process_iter(['pid', 'name']):
+            yield proc.info['pid'], proc.info['name']
+
+    def list_pids(self):
+        """列出当前所有进程的 pid"""
+        return psutil.pids()
+
+    def pid_tokens(self):
+        """返回 {pid: 标记}，pid 被新进程复用时标记随之改变
+
+        无法随进程列表一并廉价获得标记时为 None，调用方需自行读取创建时间判断。
+        """
+        return dict.fromkeys(self.list_pids())
+
+    def process_identity(self, pid):
+        """返回 (进程名, 创建时间)，两者共同唯一标识一个进程"""
+        proc = psutil.Process(pid)
+        with proc.oneshot():
+            return proc.name(), proc.create_time()
+
+    def is_protected(self, pid):
+        """系统关键进程不参与按进程清理"""
+        return pid in PROTECTED_PIDS
+
+    def process_start_time(self, pid):
+        """只读取创建时间（与 process_identity 的第二项一致），用于廉价地发现被复用的 pid"""
+        return psutil.Process(pid).create_time()
+
+    def process_info(self, pid):
+        """获取进程的工作集、私有内存字节数与累计 CPU 时间"""
+        proc = psutil.Process(pid)
+        with proc.oneshot():
+            mem = proc.memory_info()
+            cpu = proc.cpu_times()
+        # Windows 直接提供私有字节数，其他平台用常驻内存减去共享内存估算
+        private = getattr(mem, 'private', mem.rss - getattr(mem, 'shared', 0))
+        return {'rss': mem.rss, 'private': private, 'cpu_time': cpu.user + cpu.system}
+
+    def process_faults(self, pid):
+        """返回进程累计的 (缺页次数, 硬缺页次数)，平台不提供时为 0"""
+        mem = psutil.Process(pid).memory_info()
+        # Windows 只提供总缺页次数
+        return getattr(mem, 'num_page_faults', 0), 0
+
+    def process_activity(self, pid):
+        """廉价的活动标记，两次取值相同说明进程期间没有运行，内存也不会变化
+
+        平台无法廉价获取时返回 None，调用方每次都应重新读取内存。
+        """
+        return None
+
+    def process_memory(self, pid):
+        """进程的工作集、私有内存与交换区字节数"""
+        mem = psutil.Process(pid).memory_info()
+        private = getattr(mem, 'private', mem.rss - getattr(mem, 'shared', 0))
+        return {'rss': mem.rss, 'private': private, 'swap': getattr(mem, 'swap', 0)}
+
+    def trim_current_process(self):
+        """清理当前进程工作集，失败时抛出 OSError"""
+        raise NotImplementedError("当前平台不支持工作集清理")
+
+    def trim_system_working_set(self):
+        """清理系统工作集，失败时抛出 OSError"""
+        raise NotImplementedError("当前平台不支持系统工作集清理")
+
+    def trim_process(self, pid, create_time=None):
+        """清理指定进程的工作集，返回是否成功
+
+        create_time 为登记进程时的创建时间，pid 已被其他进程复用时不清理并返回 False。
+        """
+        return False
+
+    def trim(self, pids, create_times=None):
+        """批量清理多个进程，create_times 为 pid -> 登记时的创建时间
+
+        按顺序返回每个进程的 {pid, ok, latency, error}。
+        """
+        create_times = create_times or {}
+        results = []
+        for pid in pids:
+            started = time.perf_counter()
+            try:
+                ok = bool(self.trim_process(pid, create_times.get(pid)))
+                error = None
+            except Exception as e:
+                ok = False
+                error = str(e)
+            results.append({'pid': pid, 'ok': ok, 'latency': time.perf_counter() - started,
+                            'error': error})
+        return results
+
+    def release_process(self, pid):
+        """进程退出后释放为其缓存的资源"""
+
+    def close(self):
+        """释放后端持有的文件描述符与句柄，之后不应再使用该后端"""
+
+    def compact_memory(self):
+        """整理物理内存碎片，失败时抛出 OSError"""
+        raise NotImplementedError("当前平台不支持内存整理")
+
+    def reclaim_cgroup(self, group, nbytes, root=None):
+        """回收指定控制组的内存，内核未能回收足够的内存时抛出 OSError"""
+        raise NotImplementedError("当前平台不支持按控制组回收内存")
+
+    def collect_garbage(self):
+        """强制垃圾回收"""
+        for i in range(3):
+            gc.collect()
+        return True
+
+
+class WindowsBackend(BaseBackend):
+    """基于 winapi 原生绑定的后端，进程句柄在多次清理之间复用"""
+
+    name = "windows"
+    # psutil 在 Windows 上不提供 sin / sout
+    swap_io_counters = False
+
+    def __init__(self, handle_cache_size=1024):
+        import winapi
+        self.winapi = winapi
+        self.handles = winapi.HandleCache(capacity=handle_cache_size)
+
+    def is_admin(self):
+        """检查是否以管理员权限运行"""
+        try:
+            return bool(self.winapi.IsUserAnAdmin())
+        except Exception:
+            return False
+
+    def request_admin_privileges(self):
+        """以管理员权限重新启动当前程序"""
+        # 打包后的 exe 与 Python 脚本都通过 sys.executable 启动
+        executable = sys.executable
+        result = self.winapi.ShellExecuteW(
+            None, "runas", executable, " ".join(sys.argv), None, 1
+        )
+        return (result or 0) > 32
+
+    def memory_breakdown(self):
+        """通过 GetPerformanceInfo 获取系统缓存与内核内存"""
+        return performance_breakdown(self.winapi.GetPerformanceInfo, self.swap_memory())
+
+    def trim_current_process(self):
+        """使用 EmptyWorkingSet 清理当前进程工作集"""
+        if not self.winapi.EmptyWorkingSet(self.winapi.GetCurrentProcess()):
+            raise OSError(f"EmptyWorkingSet 失败，错误代码: {self.winapi.last_error()}")
+        return True
+
+    def trim_system_working_set(self):
+        """使用 SetProcessWorkingSetSize 清理系统缓存"""
+        # 使用 -1 表示当前进程
+        if not self.winapi.SetProcessWorkingSetSize(self.winapi.GetCurrentProcess(), -1, -1):
+            raise OSError(f"SetProcessWorkingSetSize 失败，错误代码: {self.winapi.last_error()}")
+        return True
+
+    def trim_process(self, pid, create_time=None):
+        """使用缓存的句柄清空进程工作集，句柄对应的进程创建时间须与 create_time 一致"""
+        ok, error = self.winapi.trim_one(self.handles, pid, create_time)
+        return ok
+
+    def trim(self, pids, create_times=None):
+        """批量清理多个进程，整批复用缓存的句柄"""
+        return self.winapi.trim(pids, self.handles, create_times)
+
+    def release_process(self, pid):
+        self.handles.release(pid)
+
+    def close(self):
+        self.handles.clear()
+
+
+class LinuxBackend(BaseBackend):
+    """基于 /proc、process_madvise 与 cgroup v2 的 Linux 后端
+
+    dry_run 为 True 时不写入任何控制文件，只把将要执行的操作记录在 actions 中，
+    便于在没有 root 权限的环境中验证清理流程。
+    """
+
+    name = "linux"
+
+    def __init__(self, proc_root="/proc", dry_run=False):
+        import linuxapi
+        self.linuxapi = linuxapi
+        self.proc_root = proc_root
+        self.dry_run = dry_run
+        # (机制, 目标, 写入值或字节数)
+        self.actions = []
+        self._capabilities = None
+        # 主程序的符号空间已包含 libc，避免 find_library 启动子进程
+        self.libc = ctypes.CDLL(None, use_errno=True)
+        self.meminfo = MeminfoReader(os.path.join(proc_root, "meminfo"))
+        self.page_size = os.sysconf("SC_PAGE_SIZE")
+        self.clock_ticks = os.sysconf("SC_CLK_TCK")
+
+    def close(self):
+        """关闭常驻打开的 /proc/meminfo"""
+        self.meminfo.close()
+
+    def is_admin(self):
+        """root 用户视为管理员"""
+        return os.geteuid() == 0
+
+    def capabilities(self):
+        """首次调用时检测可用的回收机制并缓存结果"""
+        if self._capabilities is None:
+            self._capabilities = self.linuxapi.detect_capabilities(self.proc_root)
+        return self._capabilities
+
+    def _write(self, mechanism, path, value):
+        self.actions.append((mechanism, path, value))
+        if not self.dry_run:
+            self.linuxapi.write_control(path, value)
+
+    def memory_breakdown(self):
+        """一次读取 /proc/meminfo 得到全部分类"""
+        return self.meminfo.breakdown()
+
+    def virtual_memory(self):
+        """直接解析 /proc/meminfo，比 psutil 更轻量，适合高频采样"""
+        info = self.meminfo.breakdown()
+        return MemoryStat(info['total'], info['available'], info['percent'],
+                          info['used'], info['fields'].get("MemFree", 0))
+
+    def iter_processes(self):
+        """直接读取 /proc，避免为每个进程创建 psutil 对象"""
+        for entry in os.listdir(self.proc_root):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(os.path.join(self.proc_root, entry, "comm")) as f:
+                    name = f.read().strip()
+            except OSError:
+                continue
+            yield int(entry), name
+
+    def list_pids(self):
+        return [int(entry) for entry in os.listdir(self.proc_root) if entry.isdigit()]
+
+    def pid_tokens(self):
+        """以 /proc/[pid] 目录的 inode 号为标记，列目录时即可得到，无需逐个 stat
+
+        新进程的目录项是新建的 inode，pid 复用时必然改变；同一进程的目录项被
+        内核回收后重建也会改变，只会多一次创建时间检查。
+        """
+        with os.scandir(self.proc_root) as entries:
+            return {int(entry.name): entry.inode() for entry in entries if entry.name.isdigit()}
+
+    def _read_stat(self, pid):
+        with open(os.path.join(self.proc_root, str(pid), "stat")) as f:
+            # 进程名可能包含空格，从最后一个右括号之后开始解析
+            head, tail = f.read().rsplit(")", 1)
+        return head.split("(", 1)[1], tail.split()
+
+    def process_identity(self, pid):
+        """进程名与启动时刻（开机后的秒数）"""
+        name, stat = self._read_stat(pid)
+        return name, int(stat[19]) / self.clock_ticks
+
+    def process_start_time(self, pid):
+        """/proc/[pid]/stat 中的 starttime"""
+        return int(self._read_stat(pid)[1][19]) / self.clock_ticks
+
+    def is_protected(self, pid):
+        """init、kthreadd 与全部内核线程；读取失败时同样跳过"""
+        if pid in LINUX_PROTECTED_PIDS:
+            return True
+        try:
+            _, stat = self._read_stat(pid)
+        except (OSError, ValueError, IndexError):
+            return True
+        return bool(int(stat[6]) & PF_KTHREAD) or stat[1] == "2"
+
+    def process_info(self, pid):
+        """从 /proc/[pid]/statm 与 stat 读取内存与 CPU 时间"""
+        base = os.path.join(self.proc_root, str(pid))
+        with open(os.path.join(base, "statm")) as f:
+            fields = f.read().split()
+        resident, shared = int(fields[1]), int(fields[2])
+        _, stat = self._read_stat(pid)
+        cpu_ticks = int(stat[11]) + int(stat[12])
+        return {
+            'rss': resident * self.page_size,
+            'private': (resident - shared) * self.page_size,
+            'cpu_time': cpu_ticks / self.clock_ticks,
+        }
+
+    def process_faults(self, pid):
+        """/proc/[pid]/stat 中的 minflt 与 majflt"""
+        _, stat = self._read_stat(pid)
+        minflt, majflt = int(stat[7]), int(stat[9])
+        return minflt + majflt, majflt
+
+    def process_activity(self, pid):
+        """CPU 时间与缺页次数：进程不运行、不缺页时内存不会变化"""
+        _, stat = self._read_stat(pid)
+        return int(stat[11]) + int(stat[12]), int(stat[7]) + int(stat[9])
+
+    def process_memory(self, pid):
+        """一次读取 /proc/[pid]/status 得到 VmRSS、RssAnon 与 VmSwap，内核线程均为 0"""
+        values = {}
+        with open(os.path.join(self.proc_root, str(pid), "status"), "rb") as f:
+            for line in f:
+                if line.startswith((b"VmRSS:", b"RssAnon:", b"VmSwap:")):
+                    name, value = line.split(b":", 1)
+                    values[name] = int(value.split()[0]) * 1024
+        return {'rss': values.get(b"VmRSS", 0), 'private': values.get(b"RssAnon", 0),
+                'swap': values.get(b"VmSwap", 0)}
+
+    def swap_io(self):
+        """从 /proc/vmstat 读取累计换入、换出的页数，不读取 meminfo"""
+        swap_in = swap_out = 0
+        with open(os.path.join(self.proc_root, "vmstat"), "rb") as f:
+            for line in f:
+                if line.startswith(b"pswpin "):
+                    swap_in = int(line.split()[1]) * self.page_size
+                elif line.startswith(b"pswpout "):
+                    swap_out = int(line.split()[1]) * self.page_size
+        return swap_in, swap_out
+
+    def trim_current_process(self):
+        """通过 malloc_trim 把空闲堆内存归还给系统"""
+        if self.libc is None or not hasattr(self.libc, "malloc_trim"):
+            raise OSError("libc 不支持 malloc_trim")
+        self.libc.malloc_trim(0)
+        return True
+
+    def trim_system_working_set(self):
+        """写入 drop_caches 释放页缓存，需要 root 权限，没有权限时抛出 OSError"""
+        if not self.dry_run:
+            if not self.capabilities()["drop_caches"]:
+                raise OSError("没有写入 drop_caches 的权限")
+            os.sync()
+        self._write("drop_caches", os.path.join(self.proc_root, "sys/vm/drop_caches"), 1)
+        return True
+
+    def trim_process(self, pid, create_time=None):
+        """优先使用 /proc/[pid]/reclaim，其次用 process_madvise(MADV_PAGEOUT) 换出私有页面"""
+        capabilities = self.capabilities()
+        try:
+            if create_time is not None and self.process_start_time(pid) != create_time:
+                return False
+            if capabilities["process_reclaim"]:
+                self._write("process_reclaim",
+                            os.path.join(self.proc_root, str(pid), "reclaim"), "all")
+                return True
+            if capabilities["process_madvise"]:
+                if self.dry_run:
+                    ranges = self.linuxapi.private_ranges(
+                        os.path.join(self.proc_root, str(pid), "maps"))
+                    self.actions.append(("process_madvise", pid,
+                                         sum(length for start, length in ranges)))
+                    return True
+                self.linuxapi.pageout(pid, self.proc_root)
+                return True
+        except OSError:
+            return False
+        return False
+
+    def compact_memory(self):
+        """写入 compact_memory 整理内存碎片，需要 root 权限"""
+        self._write("compact_memory", os.path.join(self.proc_root, "sys/vm/compact_memory"), 1)
+        return True
+
+    def reclaim_cgroup(self, group, nbytes, root=None):
+        """通过 cgroup v2 的 memory.reclaim 回收指定控制组的内存
+
+        group 为相对 root（默认为检测到的挂载点）的路径；
+        内核未能回收足够的内存时抛出 OSError (EAGAIN)。
+        """
+        if root is None:
+            root = self.capabilities()["cgroup_root"]
+        if root is None:
+            raise OSError("未挂载 cgroup v2")
+        path = os.path.join(root, group.strip("/"), "memory.reclaim")
+        self._write("cgroup_reclaim", path, int(nbytes))
+        return True
+
+
+class FakeBackend(BaseBackend):
+    """完全在内存中模拟的后端，用于测试与基准"""
+
+    name = "fake"
+
+    def __init__(self, total=16 * 1024 ** 3, available=8 * 1024 ** 3,
+                 processes=None, admin=True, trim_latency=0.0):
+        self.total = total
+        self.available = available
+        self.swap_total = 4 * 1024 ** 3
+        self.swap_used = 0
+        # 累计换入、换出字节数
+        self.swap_in = 0
+        self.swap_out = 0
+        self.admin = admin
+        # pid -> {"name": 进程名, "rss": 工作集字节数, 可选 "private"、"swap"、"cpu_time"}
+        self.processes = dict(processes or {})
+        self.calls = []
+        # 模拟内核换页耗时，清理可能被多个线程并发调用
+        self.trim_latency = trim_latency
+        self._lock = threading.Lock()
+
+    def is_admin(self):
+        return self.admin
+
+    def virtual_memory(self):
+        used = self.total - self.available
+        return MemoryStat(self.total, self.available, used / self.total * 100,
+                          used, self.available)
+
+    def memory_breakdown(self):
+        memory = self.virtual_memory()
+        with self._lock:
+            working_set = sum(proc["rss"] for proc in self.processes.values())
+        return make_breakdown(
+            memory.total, memory.available, memory.used, memory.percent,
+            self.swap_total, self.swap_used,
+            system=max(0, memory.used - working_set),
+            working_set=working_set,
+        )
+
+    def swap_memory(self):
+        percent = self.swap_used / self.swap_total * 100 if self.swap_total else 0.0
+        return SwapStat(self.swap_total, self.swap_used,
+                        self.swap_total - self.swap_used, percent, self.swap_in, self.swap_out)
+
+    def iter_processes(self):
+        for pid, proc in list(self.processes.items()):
+            yield pid, proc["name"]
+
+    def list_pids(self):
+        return list(self.processes)
+
+    def pid_tokens(self):
+        return {pid: proc.get("create_time", 0.0) for pid, proc in list(self.processes.items())}
+
+    def process_identity(self, pid):
+        proc = self.processes.get(pid)
+        if proc is None:
+            raise psutil.NoSuchProcess(pid)
+        return proc["name"], proc.get("create_time", 0.0)
+
+    def process_start_time(self, pid):
+        proc = self.processes.get(pid)
+        if proc is None:
+            raise psutil.NoSuchProcess(pid)
+        return proc.get("create_time", 0.0)
+
+    def process_info(self, pid):
+        proc = self.processes.get(pid)
+        if proc is None:
+            return None
+        return {'rss': proc["rss"], 'private': proc.get("private", proc["rss"]),
+                'cpu_time': proc.get("cpu_time", 0.0)}
+
+    def process_faults(self, pid):
+        proc = self.processes.get(pid)
+        if proc is None:
+            raise psutil.NoSuchProcess(pid)
+        return proc.get("faults", 0), proc.get("major_faults", 0)
+
+    def process_activity(self, pid):
+        proc = self.processes.get(pid)
+        if proc is None:
+            raise psutil.NoSuchProcess(pid)
+        return proc.get("cpu_time", 0.0), proc.get("faults", 0), proc["rss"]
+
+    def process_memory(self, pid):
+        proc = self.processes.get(pid)
+        if proc is None:
+            raise psutil.NoSuchProcess(pid)
+        return {'rss': proc["rss"], 'private': proc.get("private", proc["rss"]),
+                'swap': proc.get("swap", 0)}
+
+    def trim_current_process(self):
+        self.calls.append(("trim_current_process",))
+        return True
+
+    def trim_system_working_set(self):
+        self.calls.append(("trim_system_working_set",))
+        return True
+
+    def compact_memory(self):
+        self.calls.append(("compact_memory",))
+        return True
+
+    def reclaim_cgroup(self, group, nbytes, root=None):
+        self.calls.append(("reclaim_cgroup", group, nbytes))
+        return True
+
+    def trim_process(self, pid, create_time=None):
+        self.calls.append(("trim_process", pid))
+        if self.trim_latency:
+            time.sleep(self.trim_latency)
+        with self._lock:
+            proc = self.processes.get(pid)
+            if proc is None:
+                return False
+            if create_time is not None and proc.get("create_time", 0.0) != create_time:
+                return False
+            self.available = min(self.total, self.available + proc["rss"])
+            proc["rss"] = 0
+        return True
+
+
+def create_backend(name=None, **options):
+    """按名称或当前平台创建后端，options 传给后端的构造函数"""
+    if name is None:
+        if sys.platform == "win32":
+            name = "windows"
+        elif sys.platform.startswith("linux"):
+            name = "linux"
+        else:
+            name = "base"
+
+    backends = {
+        "windows": WindowsBackend,
+        "linux": LinuxBackend,
+        "fake": FakeBackend,
+        "base": BaseBackend,
+    }
+    if name not in backends:
+        raise ValueError(f"未知的后端: {name}")
+    cls = backends[name]
+    # 先按构造函数签名检查选项，构造过程中抛出的 TypeError 原样向上传递
+    unsupported = [option for option in options
+                   if option not in inspect.signature(cls).parameters]
+    if unsupported:
+        raise ValueError(f"{name} 后端不支持选项: {', '.join(unsupported)}")
+    return cls(**options)
@@ -0,0 +1,220 @@
+"""清理性能基准
+
+trim:       在合成进程表上比较串行与并行的按进程清理
+strategies: 启动可控的内存占用子进程，逐个运行清理项目，记录释放量、耗时、
+            CPU 时间以及清理后一段时间内的缺页回弹，结果写入 JSON 便于版本间比较
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from backends import FakeBackend, create_backend
+from engine import STRATEGIES, MemoryCleanEngine
+from trim import TrimScheduler
+
+# 子进程脚本：按类型占用内存，就绪后输出一行，空闲型只休眠，活跃型持续访问页面
+HOG_SCRIPT = r"""
+import mmap, sys, time
+kind, mode, size, path = sys.argv[1], sys.argv[2], int(sys.argv[3]), sys.argv[4]
+page = mmap.PAGESIZE
+if kind == "anon":
+    buf = bytearray(size)
+    for i in range(0, size, page):
+        buf[i] = 1
+else:
+    f = open(path, "rb")
+    buf = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+    for i in range(0, size, page):
+        buf[i]
+print("ready", flush=True)
+while True:
+    if mode == "active":
+        total = 0
+        for i in range(0, size, page):
+            total += buf[i]
+    time.sleep(0.1)
+"""
+
+# (内存类型, 活跃程度)
+FIXTURES = (
+    ("anon", "idle"),
+    ("anon", "active"),
+    ("file", "idle"),
+    ("file", "active"),
+)
+
+
+def synthetic_processes(count, rss=64 * 1024 ** 2):
+    """生成合成进程表"""
+    return {1000 + i: {"name": f"proc{i}", "rss": rss} for i in range(count)}
+
+
+def bench_trim(process_count=600, trim_latency=0.005, workers=(1, 4, 8, 16)):
+    """对不同线程数分别执行一次完整的清理，返回各自的耗时"""
+    rows = []
+    serial_time = None
+    for count in workers:
+        backend = FakeBackend(processes=synthetic_processes(process_count),
+                              trim_latency=trim_latency)
+        report = TrimScheduler(backend.trim, count).run(backend.processes)
+        if serial_time is None and count == 1:
+            serial_time = report['wall_time']
+        rows.append({
+            'workers': count,
+            'processes': process_count,
+            'cleaned': report['cleaned'],
+            'wall_time': report['wall_time'],
+            'latency_avg': report['latency_avg'],
+            'latency_p95': report['latency_p95'],
+            'speedup': serial_time / report['wall_time'] if serial_time else None,
+        })
+    return rows
+
+
+class MemoryHogs:
+    """一组内存占用子进程，退出上下文时全部结束"""
+
+    def __init__(self, size, fixtures=FIXTURES):
+        self.size = size
+        self.fixtures = fixtures
+        self.procs = []
+        self.backing_file = None
+
+    def __enter__(self):
+        # 文件型子进程共享一个预先写好的文件，读取后进入页缓存
+        fd, self.backing_file = tempfile.mkstemp(prefix="mc-bench-")
+        with os.fdopen(fd, "wb") as f:
+            chunk = b"\1" * (1024 ** 2)
+            for i in range(self.size // len(chunk)):
+                f.write(chunk)
+
+        for kind, mode in self.fixtures:
+            proc = subprocess.Popen(
+                [sys.executable, "-c", HOG_SCRIPT, kind, mode, str(self.size), self.backing_file],
+                stdout=subprocess.PIPE, text=True
+            )
+            self.procs.append({"pid": proc.pid, "kind": kind, "mode": mode, "popen": proc})
+        for hog in self.procs:
+            hog["popen"].stdout.readline()
+        return self
+
+    def __exit__(self, *exc):
+        for hog in self.procs:
+            hog["popen"].kill()
+            hog["popen"].wait()
+        if self.backing_file:
+            os.unlink(self.backing_file)
+
+
+def _fixture_state(backend, hogs):
+    state = {}
+    for hog in hogs.procs:
+        faults, major = backend.process_faults(hog["pid"])
+        state[hog["pid"]] = {
+            "faults": faults,
+            "major_faults": major,
+            "rss": backend.process_info(hog["pid"])["rss"],
+        }
+    return state
+
+
+def bench_strategy(strategy, backend_name=None, size=256 * 1024 ** 2,
+                   rebound_window=30.0):
+    """对单个清理项目运行一次基准"""
+    backend = create_backend(backend_name)
+    engine = MemoryCleanEngine(backend=backend)
+
+    with MemoryHogs(size) as hogs:
+        before = _fixture_state(backend, hogs)
+
+        cpu_started = time.process_time()
+        result = engine.perform_clean([strategy])
+        cpu_time = time.process_time() - cpu_started
+        after = _fixture_state(backend, hogs)
+
+        # 观察清理后的缺页回弹与工作集回涨
+        time.sleep(rebound_window)
+        rebound = _fixture_state(backend, hogs)
+
+        fixtures = []
+        for hog in hogs.procs:
+            pid = hog["pid"]
+            fixtures.append({
+                "kind": hog["kind"],
+                "mode": hog["mode"],
+                "rss_before": before[pid]["rss"],
+                "rss_after": after[pid]["rss"],
+                "rss_rebound": rebound[pid]["rss"] - after[pid]["rss"],
+                "faults_rebound": rebound[pid]["faults"] - after[pid]["faults"],
+                "major_faults_rebound": rebound[pid]["major_faults"] - after[pid]["major_faults"],
+            })
+    backend.close()
+
+    return {
+        "strategy": strategy,
+        "backend": backend.name,
+        "success": result["success_count"] > 0,
+        "freed_bytes": result["freed_bytes"],
+        "wall_time": result["duration"],
+        "cpu_time": cpu_time,
+        "settle_time": result["settle_time"],
+        "faults_rebound": sum(f["faults_rebound"] for f in fixtures),
+        "rss_rebound": sum(f["rss_rebound"] for f in fixtures),
+        "fixtures": fixtures,
+    }
+
+
+def bench_strategies(strategies=STRATEGIES, backend_name=None, size=256 * 1024 ** 2,
+                     rebound_window=30.0):
+    """逐个清理项目运行基准，每个项目使用一组新的子进程"""
+    return {
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "hog_size": size,
+        "rebound_window": rebound_window,
+        "results": [
+            bench_strategy(strategy, backend_name, size, rebound_window)
+            for strategy in strategies
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="内存清理基准测试")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    trim_parser = subparsers.add_parser("trim", help="串行与并行按进程清理的对比")
+    trim_parser.add_argument("--processes", type=int, default=600, help="合成进程数量")
+    trim_parser.add_argument("--latency", type=float, default=0.005, help="单个进程清理耗时(秒)")
+    trim_parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8, 16],
+                             help="要比较的线程数")
+
+    strategy_parser = subparsers.add_parser("strategies", help="在真实内存压力下比较各清理项目")
+    strategy_parser.add_argument("--strategy", nargs="+", choices=STRATEGIES, default=list(STRATEGIES))
+    strategy_parser.add_argument("--backend", default=None, help="后端名称，默认按当前平台选择")
+    strategy_parser.add_argument("--size", type=int, default=256, help="每个子进程占用的内存(MB)")
+    strategy_parser.add_argument("--window", type=float, default=30.0, help="观察缺页回弹的秒数")
+    strategy_parser.add_argument("--output", default=None, help="结果 JSON 文件，默认输出到标准输出")
+    args = parser.parse_args()
+
+    if args.command == "trim":
+        for row in bench_trim(args.processes, args.latency, args.workers):
+            print(json.dumps(row))
+        return
+
+    report = bench_strategies(args.strategy, args.backend, args.size * 1024 ** 2, args.window)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""真实的内存分类统计：Linux 读取 /proc/meminfo，Windows 调用 GetPerformanceInfo"""
+import ctypes
+import os
+
+# 需要从 /proc/meminfo 读取的字段
+MEMINFO_FIELDS = (
+    "MemTotal", "MemFree", "MemAvailable", "Buffers", "Cached",
+    "Active(file)", "Inactive(file)", "AnonPages", "Shmem",
+    "Slab", "SReclaimable", "SUnreclaim", "SwapTotal", "SwapFree",
+)
+
+
+def make_breakdown(total, available, used, percent, swap_total, swap_used,
+                   system, working_set, fields=None):
+    """统一的内存分类结果，所有数值均为字节"""
+    return {
+        'total': total,
+        'available': available,
+        'used': used,
+        'percent': percent,
+        'swap_total': swap_total,
+        'swap_used': swap_used,
+        'swap_percent': swap_used / swap_total * 100 if swap_total else 0.0,
+        # 系统占用：页缓存、缓冲区与内核 slab（Windows 为系统缓存与内核池）
+        'system': system,
+        # 进程工作集：匿名页（Windows 为已用内存扣除系统占用）
+        'working_set': working_set,
+        'fields': fields or {},
+    }
+
+
+class MeminfoReader:
+    """每次采样只读取一次 /proc/meminfo，并用预先建立的行号索引取字段"""
+
+    def __init__(self, path="/proc/meminfo", fields=MEMINFO_FIELDS):
+        self.path = path
+        self.fields = fields
+        self._fd = os.open(path, os.O_RDONLY)
+        # 字段名 -> 行号，内核的字段顺序固定，只需建立一次
+        self._index = None
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def _build_index(self, lines):
+        index = {}
+        for number, line in enumerate(lines):
+            name = line.split(b":", 1)[0].decode()
+            if name in self.fields:
+                index[name] = (number, line[:len(name) + 1])
+        return index
+
+    def read(self):
+        """返回 字段名 -> 字节数"""
+        lines = os.pread(self._fd, 16384, 0).splitlines()
+        if self._index is None:
+            self._index = self._build_index(lines)
+
+        values = {}
+        for name, (number, prefix) in self._index.items():
+            if number >= len(lines) or not lines[number].startswith(prefix):
+                # 字段布局发生变化（例如内核升级后），重新建立索引
+                self._index = self._build_index(lines)
+                return self.read()
+            # 形如 "MemTotal:        6158152 kB"
+            values[name] = int(lines[number][len(prefix):].split()[0]) * 1024
+        return values
+
+    def breakdown(self):
+        values = self.read()
+        get = values.get
+        total = get("MemTotal", 0)
+        available = get("MemAvailable", get("MemFree", 0))
+        # 与 psutil 的口径一致：已用内存为总量减去可用内存
+        used = max(0, total - available)
+        percent = (total - available) / total * 100 if total else 0.0
+        swap_total = get("SwapTotal", 0)
+        return make_breakdown(
+            total, available, used, percent, swap_total, swap_total - get("SwapFree", 0),
+            system=get("Buffers", 0) + get("Cached", 0) + get("Slab", 0),
+            working_set=get("AnonPages", 0),
+            fields=values,
+        )
+
+
+class PERFORMANCE_INFORMATION(ctypes.Structure):
+    _fields_ = [
+        ("cb", ctypes.c_uint32),
+        ("CommitTotal", ctypes.c_size_t),
+        ("CommitLimit", ctypes.c_size_t),
+        ("CommitPeak", ctypes.c_size_t),
+        ("PhysicalTotal", ctypes.c_size_t),
+        ("PhysicalAvailable", ctypes.c_size_t),
+        ("SystemCache", ctypes.c_size_t),
+        ("KernelTotal", ctypes.c_size_t),
+        ("KernelPaged", ctypes.c_size_t),
+        ("KernelNonpaged", ctypes.c_size_t),
+        ("PageSize", ctypes.c_size_t),
+        ("HandleCount", ctypes.c_uint32),
+        ("ProcessCount", ctypes.c_uint32),
+        ("ThreadCount", ctypes.c_uint32),
+    ]
+
+
+def performance_breakdown(GetPerformanceInfo, swap):
+    """调用已设置好原型的 GetPerformanceInfo，换算为字节"""
+    info = PERFORMANCE_INFORMATION()
+    info.cb = ctypes.sizeof(info)
+    if not GetPerformanceInfo(ctypes.byref(info), info.cb):
+        raise OSError("GetPerformanceInfo 调用失败")
+
+    page = info.PageSize
+    total = info.PhysicalTotal * page
+    available = info.PhysicalAvailable * page
+    used = total - available
+    system = (info.SystemCache + info.KernelTotal) * page
+    return make_breakdown(
+        total, available, used, used / total * 100 if total else 0.0,
+        swap.total, swap.used,
+        system=system,
+        working_set=max(0, used - system),
+        fields={name: getattr(info, name) * page for name in (
+            "CommitTotal", "CommitLimit", "SystemCache",
+            "KernelTotal", "KernelPaged", "KernelNonpaged",
+        )},
+    )
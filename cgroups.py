@@ -0,0 +1,236 @@
+"""cgroup v2 按控制组监控与回收：每个组每次采样只 pread 一次 memory.current 与 memory.stat"""
+import errno
+import fnmatch
+import os
+import time
+
+from scheduler import DEFAULT_INTERVAL, DEFAULT_THRESHOLD, AutoCleanScheduler
+
+# 需要从 memory.stat 读取的字段，其余字段忽略
+STAT_FIELDS = (
+    "anon", "file", "kernel", "shmem", "active_file", "inactive_file",
+    "file_dirty", "file_writeback", "pgmajfault",
+)
+
+
+def read_limit(path):
+    """读取 memory.max / memory.high，"max" 或文件不存在时返回 None"""
+    try:
+        with open(path) as f:
+            value = f.read().strip()
+    except OSError:
+        return None
+    return None if value == "max" else int(value)
+
+
+def discover_groups(root, max_depth=None):
+    """列出启用了内存控制器的控制组（相对 root 的路径），不含根组"""
+    groups = []
+    base_depth = root.rstrip("/").count("/")
+    for path, dirs, files in os.walk(root):
+        depth = path.rstrip("/").count("/") - base_depth
+        if max_depth is not None and depth >= max_depth:
+            dirs[:] = []
+        if depth > 0 and "memory.current" in files:
+            groups.append(os.path.relpath(path, root))
+    return groups
+
+
+class GroupReader:
+    """持有一个控制组的文件描述符，限额只在刷新时读取"""
+
+    def __init__(self, root, group, stat_fields=STAT_FIELDS):
+        self.group = group
+        self.path = os.path.join(root, group)
+        self.stat_fields = stat_fields
+        self._current_fd = os.open(os.path.join(self.path, "memory.current"), os.O_RDONLY)
+        try:
+            self._stat_fd = os.open(os.path.join(self.path, "memory.stat"), os.O_RDONLY)
+        except OSError:
+            os.close(self._current_fd)
+            raise
+        self.max = None
+        self.high = None
+        self.read_limits()
+
+    def read_limits(self):
+        self.max = read_limit(os.path.join(self.path, "memory.max"))
+        self.high = read_limit(os.path.join(self.path, "memory.high"))
+
+    @property
+    def limit(self):
+        """生效的限额：memory.high 先于 memory.max 触发回收"""
+        limits = [value for value in (self.high, self.max) if value is not None]
+        return min(limits) if limits else None
+
+    def read_current(self):
+        return int(os.pread(self._current_fd, 64, 0))
+
+    def read(self):
+        """返回一次采样：当前用量、限额、使用率与 memory.stat 中的字段"""
+        current = self.read_current()
+        stat = {}
+        for line in os.pread(self._stat_fd, 65536, 0).splitlines():
+            name, value = line.split(b" ", 1)
+            name = name.decode()
+            if name in self.stat_fields:
+                stat[name] = int(value)
+        limit = self.limit
+        return {
+            'current': current,
+            'max': self.max,
+            'high': self.high,
+            'limit': limit,
+            'percent': current / limit * 100 if limit else None,
+            'stat': stat,
+        }
+
+    def close(self):
+        for fd in (self._current_fd, self._stat_fd):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+class CgroupMonitor:
+    """发现 cgroup v2 控制组并按组采样，定期重新扫描以跟上容器的创建与销毁"""
+
+    def __init__(self, root=None, groups=None, max_depth=None, stat_fields=STAT_FIELDS,
+                 rescan_interval=10.0, clock=time.monotonic):
+        if root is None:
+            import linuxapi
+            root = linuxapi.cgroup2_mount()
+        if root is None:
+            raise OSError("未挂载 cgroup v2")
+        self.root = root
+        # 指定 groups 时只监控这些组，否则自动发现
+        self.groups = list(groups) if groups else None
+        self.max_depth = max_depth
+        self.stat_fields = stat_fields
+        self.rescan_interval = rescan_interval
+        self.clock = clock
+        self.readers = {}
+        self._last_scan = None
+
+    def refresh(self):
+        """重新发现控制组并刷新限额"""
+        found = self.groups if self.groups is not None else discover_groups(self.root, self.max_depth)
+        added = removed = 0
+        for group in set(self.readers) - set(found):
+            self.readers.pop(group).close()
+            removed += 1
+        for group in found:
+            reader = self.readers.get(group)
+            if reader is not None:
+                reader.read_limits()
+                continue
+            try:
+                self.readers[group] = GroupReader(self.root, group, self.stat_fields)
+                added += 1
+            except OSError:
+                continue
+        self._last_scan = self.clock()
+        return {'added': added, 'removed': removed, 'total': len(self.readers)}
+
+    def sample(self):
+        """采样所有控制组，返回 组路径 -> 采样结果，已删除的组被移除"""
+        if self._last_scan is None or self.clock() - self._last_scan >= self.rescan_interval:
+            self.refresh()
+        samples = {}
+        for group, reader in list(self.readers.items()):
+            try:
+                samples[group] = reader.read()
+            except (OSError, ValueError):
+                # 控制组已被删除
+                self.readers.pop(group).close()
+        return samples
+
+    def close(self):
+        for reader in self.readers.values():
+            reader.close()
+        self.readers.clear()
+
+
+class CgroupCleaner:
+    """按组应用阈值与冷却策略，只回收超过阈值的控制组
+
+    policies 为 [(通配模式, {"threshold": 阈值(%), "cooldown": 冷却(秒), "enabled": 是否回收})]，
+    第一个匹配组路径的策略生效，未匹配的组使用默认阈值与冷却时间。
+    """
+
+    def __init__(self, backend, monitor, policies=(), threshold=DEFAULT_THRESHOLD,
+                 cooldown=DEFAULT_INTERVAL, log=None):
+        self.backend = backend
+        self.monitor = monitor
+        self.policies = list(policies)
+        self.default_policy = {"threshold": threshold, "cooldown": cooldown, "enabled": True}
+        self._log = log
+        # 组路径 -> AutoCleanScheduler，每个组独立的滞回与退避状态
+        self.schedulers = {}
+
+    def log(self, message):
+        if self._log is not None:
+            self._log(message)
+
+    def policy_for(self, group):
+        for pattern, policy in self.policies:
+            if fnmatch.fnmatch(group, pattern):
+                return dict(self.default_policy, **policy)
+        return self.default_policy
+
+    def scheduler_for(self, group, policy):
+        scheduler = self.schedulers.get(group)
+        if scheduler is None:
+            scheduler = AutoCleanScheduler(high_watermark=policy["threshold"],
+                                           min_interval=policy["cooldown"])
+            self.schedulers[group] = scheduler
+        return scheduler
+
+    def check(self, samples):
+        """根据采样结果回收超过阈值的组，返回每次回收的报告"""
+        reports = []
+        for group in set(self.schedulers) - set(samples):
+            del self.schedulers[group]
+        for group, info in samples.items():
+            if info['percent'] is None:
+                continue
+            policy = self.policy_for(group)
+            if not policy["enabled"]:
+                continue
+            scheduler = self.scheduler_for(group, policy)
+            if scheduler.should_clean(info['percent']):
+                reports.append(self.reclaim(group, info, scheduler))
+        return reports
+
+    def reclaim(self, group, info, scheduler):
+        """回收到低水位，返回 {group, requested, freed, before, after, complete}"""
+        target = info['limit'] * scheduler.low_watermark / 100
+        requested = max(0, int(info['current'] - target))
+        complete = True
+        try:
+            self.backend.reclaim_cgroup(group, requested, root=self.monitor.root)
+        except NotImplementedError as e:
+            complete = False
+            self.log(f"✗ 控制组 {group} 回收失败: {str(e)}")
+        except OSError as e:
+            # EAGAIN 表示内核未能回收到请求的数量，但可能已部分回收
+            complete = False
+            if e.errno != errno.EAGAIN:
+                self.log(f"✗ 控制组 {group} 回收失败: {str(e)}")
+        try:
+            after = self.monitor.readers[group].read_current()
+        except (KeyError, OSError, ValueError):
+            after = info['current']
+        freed = max(0, info['current'] - after)
+        scheduler.finish(freed)
+        self.log(f"控制组 {group}: 请求回收 {requested / 1024 ** 2:.1f}MB，"
+                 f"实际 {freed / 1024 ** 2:.1f}MB")
+        return {
+            'group': group,
+            'requested': requested,
+            'freed': freed,
+            'before': info['current'],
+            'after': after,
+            'complete': complete,
+        }
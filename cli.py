@@ -0,0 +1,466 @@
+"""命令行入口：clean / status / watch / top / daemon / cgroups / journal / profile，输出 JSON 行，不导入 tkinter"""
+import argparse
+import json
+import signal
+import sys
+import threading
+import time
+
+from backends import create_backend
+from engine import DEFAULT_OPTIONS, STRATEGIES, MemoryCleanEngine
+from proctop import SORT_KEYS
+from scheduler import DEFAULT_INTERVAL, DEFAULT_THRESHOLD, AutoCleanScheduler
+from selection import ProcessSelector
+
+
+def emit(event, stream=None, **fields):
+    """输出一行 JSON"""
+    record = {"event": event, "time": time.time()}
+    record.update(fields)
+    stream = stream or sys.stdout
+    stream.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+    stream.flush()
+
+
+def summarize_clean(result, verbose=False):
+    """去掉逐进程明细，只保留汇总数据"""
+    summary = {key: value for key, value in result.items() if key != 'trim_report'}
+    report = result.get('trim_report')
+    if report is not None:
+        summary['trim'] = {key: value for key, value in report.items()
+                           if key != 'results' or verbose}
+    return summary
+
+
+def build_engine(args):
+    selector = ProcessSelector(
+        top_n=args.top_n,
+        target_available=args.target_available * 1024 ** 2 if args.target_available else None,
+        allow=args.allow, deny=args.deny,
+    )
+    log = (lambda message: emit("log", stream=sys.stderr, message=message)) if args.verbose else None
+    kwargs = {}
+    if args.workers:
+        kwargs['trim_workers'] = args.workers
+    if args.swap_budget is not None:
+        kwargs['swap_budget'] = args.swap_budget * 1024 ** 2
+    backend_options = {'dry_run': True} if args.dry_run else {}
+    return MemoryCleanEngine(backend=create_backend(args.backend, **backend_options), log=log,
+                             selector=selector, **kwargs)
+
+
+def status_fields(engine):
+    return {
+        "backend": engine.backend.name,
+        "admin": engine.is_admin(),
+        "capabilities": engine.backend.capabilities(),
+        "memory": engine.get_detailed_memory_info(),
+    }
+
+
+def start_metrics(engine, args):
+    """按 --metrics-port 启动指标端点，未设置时返回 (None, None)"""
+    if args.metrics_port is None:
+        return None, None
+    from metrics import CleanerMetrics, MetricsExporter
+
+    metrics = CleanerMetrics()
+    exporter = MetricsExporter(metrics, host=args.metrics_host, port=args.metrics_port).start()
+    engine.clean_listeners.append(metrics.observe_clean)
+    host, port = exporter.address[:2]
+    emit("metrics", url=f"http://{host}:{port}/metrics")
+    return metrics, exporter
+
+
+def sample_memory(engine, metrics):
+    """采样一次，同时更新指标"""
+    started = time.perf_counter()
+    memory = engine.get_detailed_memory_info()
+    if metrics is not None:
+        metrics.observe_sample(memory, time.perf_counter() - started)
+    return memory
+
+
+def cmd_clean(engine, args):
+    result = engine.perform_clean(args.options)
+    summary = summarize_clean(result, args.verbose)
+    if args.dry_run:
+        summary['actions'] = engine.backend.actions
+    emit("clean", **summary)
+    return 0 if result['success_count'] > 0 else 1
+
+
+def cmd_status(engine, args):
+    emit("status", **status_fields(engine))
+    return 0
+
+
+def cmd_watch(engine, args):
+    metrics, exporter = start_metrics(engine, args)
+    count = 0
+    try:
+        while args.count is None or count < args.count:
+            started = time.monotonic()
+            emit("sample", memory=sample_memory(engine, metrics))
+            count += 1
+            if args.count is not None and count >= args.count:
+                break
+            time.sleep(max(0.0, args.interval - (time.monotonic() - started)))
+    finally:
+        if exporter is not None:
+            exporter.stop()
+    return 0
+
+
+def cmd_top(engine, args):
+    from proctop import ProcessIndex
+
+    index = ProcessIndex(engine.backend)
+    count = 0
+    while args.count is None or count < args.count:
+        started = time.monotonic()
+        stats = index.refresh()
+        emit("top", stats=stats, processes=[stat._asdict() for stat in index.top(args.limit, args.sort)])
+        count += 1
+        if args.count is not None and count >= args.count:
+            break
+        time.sleep(max(0.0, args.interval - (time.monotonic() - started)))
+    return 0
+
+
+def snapshot_fields(snapshot):
+    """把 MemorySnapshot 转换为与 get_detailed_memory_info 相同的结构"""
+    from sampler import CARD_KEYS
+    return {key: getattr(snapshot, key)._asdict() for key in CARD_KEYS}
+
+
+def cmd_daemon(engine, args):
+    import asyncio
+    from journal import Journal
+    from orchestrator import CleanerRuntime
+
+    scheduler = AutoCleanScheduler(high_watermark=args.threshold, min_interval=args.cooldown)
+    source = None
+    if args.pressure:
+        from pressure import create_pressure_source
+        source = create_pressure_source(stall_ms=args.stall_ms)
+
+    policy = None
+    if args.profile is not None:
+        from policy import load_profile
+        try:
+            policy = load_profile(args.profile, engine.selector)
+        except (OSError, ValueError) as e:
+            emit("error", message=f"加载策略配置失败: {str(e)}")
+            return 2
+
+    journal = None
+    if args.journal:
+        try:
+            journal = Journal(args.journal)
+        except OSError as e:
+            emit("error", message=f"打开历史日志失败: {str(e)}")
+            return 2
+
+    metrics = exporter = None
+    if args.metrics_port is not None:
+        from metrics import CleanerMetrics, MetricsExporter
+        metrics = CleanerMetrics()
+        exporter = MetricsExporter(metrics, host=args.metrics_host, port=args.metrics_port).start()
+        host, port = exporter.address[:2]
+        emit("metrics", url=f"http://{host}:{port}/metrics")
+
+    index = detector = None
+    # --exclude-leaks 需要泄漏检测的结果，单独给出时同样开启检测
+    if args.detect_leaks or args.exclude_leaks:
+        from leak import LeakDetector
+        from proctop import ProcessIndex
+        index = ProcessIndex(engine.backend)
+        detector = LeakDetector()
+        if args.exclude_leaks:
+            engine.selector.add_exclusion(detector.skip_pids)
+
+    def on_event(event, data):
+        if event == "clean_done":
+            emit("clean", **summarize_clean(data['result'], args.verbose))
+        elif event in ("clean_error", "error"):
+            emit("error", message=data['message'])
+        elif event == "clean_cancelled":
+            emit("cancelled", trigger=data['trigger'])
+        elif event == "clean_started" and data['rule'] is not None:
+            emit("rule", rule=data['rule'], options=data['options'])
+        elif event == "leak":
+            emit("leak", **data['suspect']._asdict())
+
+    runtime = CleanerRuntime(
+        engine, scheduler, interval=args.interval, metrics=metrics, exporter=exporter,
+        pressure_source=source, process_index=index, index_interval=args.leak_interval,
+        leak_detector=detector, journal=journal, policy=policy,
+        # 使用压力事件且不需要输出、导出或记录采样时，空闲期间不做任何采样
+        always_sample=args.samples or exporter is not None or journal is not None,
+        default_timeout=args.strategy_timeout, on_event=on_event,
+    )
+    runtime.auto_options = tuple(args.options)
+    if args.samples:
+        runtime.sampler.add_listener(lambda snapshot: emit("sample", memory=snapshot_fields(snapshot)))
+
+    def reload_profile():
+        # SIGHUP: 重新读取 --profile 指定的文件，失败时保留当前配置
+        from policy import load_profile
+        try:
+            runtime.policy = load_profile(args.profile, engine.selector)
+        except (OSError, ValueError) as e:
+            emit("error", message=f"重新加载策略配置失败: {str(e)}")
+            return
+        emit("profile", name=runtime.policy.name, rules=[rule.name for rule in runtime.policy.rules])
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, runtime.request_stop)
+        if args.profile is not None and hasattr(signal, "SIGHUP"):
+            loop.add_signal_handler(signal.SIGHUP, reload_profile)
+        await runtime.run()
+
+    emit("start", threshold=args.threshold, cooldown=args.cooldown, options=args.options,
+         profile=policy.name if policy is not None else None,
+         pressure=source.name if source is not None else None, **status_fields(engine))
+    asyncio.run(run())
+    emit("stop")
+    return 0
+
+
+def parse_policy(text):
+    """解析 --policy 模式=阈值[:冷却秒数]，阈值为 off 时不回收匹配的组"""
+    pattern, _, value = text.rpartition("=")
+    if not pattern:
+        raise argparse.ArgumentTypeError(f"无效的策略: {text}")
+    threshold, _, cooldown = value.partition(":")
+    if threshold == "off":
+        return pattern, {"enabled": False}
+    policy = {"threshold": float(threshold)}
+    if cooldown:
+        policy["cooldown"] = float(cooldown)
+    return pattern, policy
+
+
+def cmd_cgroups(engine, args):
+    from cgroups import CgroupCleaner, CgroupMonitor
+
+    monitor = CgroupMonitor(root=args.root, max_depth=args.max_depth)
+    cleaner = None
+    if args.reclaim:
+        log = (lambda message: emit("log", stream=sys.stderr, message=message)) if args.verbose else None
+        cleaner = CgroupCleaner(engine.backend, monitor, policies=args.policy,
+                                threshold=args.threshold, cooldown=args.cooldown, log=log)
+    stop = threading.Event()
+
+    def handle_signal(signum, frame):
+        stop.set()
+
+    signal.signal(signal.SIGINT, handle_signal)
+    signal.signal(signal.SIGTERM, handle_signal)
+
+    count = 0
+    try:
+        while not stop.is_set() and (args.count is None or count < args.count):
+            started = time.monotonic()
+            samples = monitor.sample()
+            emit("cgroups", groups=samples)
+            if cleaner is not None:
+                for report in cleaner.check(samples):
+                    emit("cgroup_reclaim", **report)
+            count += 1
+            if args.count is not None and count >= args.count:
+                break
+            stop.wait(max(0.0, args.interval - (time.monotonic() - started)))
+    finally:
+        monitor.close()
+    return 0
+
+
+def parse_time(text):
+    """绝对时间 (ISO 8601) 或相对现在的时长，例如 30m、24h、7d"""
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    try:
+        if text[-1] in units:
+            return time.time() - float(text[:-1]) * units[text[-1]]
+        from datetime import datetime
+        return datetime.fromisoformat(text).timestamp()
+    except (ValueError, IndexError):
+        raise argparse.ArgumentTypeError(f"无效的时间: {text}")
+
+
+def cmd_journal(engine, args):
+    from journal import KIND_CLEAN, KIND_SAMPLE, Journal
+
+    journal = Journal(args.dir)
+    kind = KIND_CLEAN if args.kind == "clean" else KIND_SAMPLE
+    if args.csv is not None:
+        if args.csv == "-":
+            rows = journal.export_csv(sys.stdout, args.since, args.until, kind)
+        else:
+            with open(args.csv, "w", newline="", encoding="utf-8") as f:
+                rows = journal.export_csv(f, args.since, args.until, kind)
+        emit("exported", stream=sys.stderr, rows=rows)
+        return 0
+    if args.points is not None:
+        until = args.until if args.until is not None else time.time()
+        since = args.since if args.since is not None else until - 86400
+        for start, average, peak in journal.downsample(since, until, args.points):
+            emit("usage", start=start, average=average, peak=peak)
+        return 0
+    for record in journal.query(args.since, args.until, kind):
+        emit(args.kind, **record._asdict())
+    return 0
+
+
+def cmd_profile(engine, args):
+    from policy import load_profile, make_context
+    from sampler import MemorySampler
+
+    try:
+        policy = load_profile(args.path, engine.selector)
+    except (OSError, ValueError) as e:
+        emit("error", message=str(e))
+        return 2
+    # 用当前内存状态求值一次，便于确认规则是否符合预期
+    snapshot = MemorySampler(engine).sample()
+    decision = policy.evaluate(make_context(snapshot, args.pressure))
+    emit("profile", name=policy.name, rules=[
+        {"name": rule.name, "conditions": len(rule.predicates), "strategies": list(rule.strategies),
+         "cooldown": rule.cooldown, "trim": rule.selector is not None}
+        for rule in policy.rules
+    ], decision=None if decision is None else {"rule": decision.rule,
+                                               "strategies": list(decision.strategies)})
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="memoptima", description="内存清理工具命令行")
+    parser.add_argument("--backend", default=None, help="后端: windows / linux / fake，默认按平台选择")
+    parser.add_argument("--verbose", action="store_true", help="把清理日志以 JSON 行输出到标准错误")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="只记录将要执行的回收操作，不写入任何控制文件（仅 linux 后端）")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_metrics_arguments(sub):
+        sub.add_argument("--metrics-port", type=int, default=None,
+                         help="在该端口提供 Prometheus 指标，0 表示随机端口")
+        sub.add_argument("--metrics-host", default="127.0.0.1", help="指标端点监听的地址")
+
+    def add_clean_arguments(sub):
+        sub.add_argument("--options", nargs="+", choices=STRATEGIES, default=list(DEFAULT_OPTIONS),
+                         help="清理项目，默认与界面的默认勾选一致")
+        sub.add_argument("--workers", type=int, default=None, help="按进程清理的线程数")
+        sub.add_argument("--top-n", type=int, default=None, help="只清理得分最高的 N 个进程")
+        sub.add_argument("--target-available", type=int, default=None,
+                         help="清理到可用内存达到该值(MB)为止")
+        sub.add_argument("--allow", nargs="*", default=(), help="只清理这些进程名")
+        sub.add_argument("--deny", nargs="*", default=(), help="不清理这些进程名")
+        sub.add_argument("--swap-budget", type=float, default=None,
+                         help="交换区读写预算(MB/s)，超出时暂停或中止按进程清理，0 表示不限制，默认 64")
+
+    clean_parser = subparsers.add_parser("clean", help="立即执行一次清理")
+    add_clean_arguments(clean_parser)
+
+    subparsers.add_parser("status", help="输出当前内存状态")
+
+    watch_parser = subparsers.add_parser("watch", help="持续输出内存状态")
+    watch_parser.add_argument("--interval", type=float, default=1.0, help="采样间隔(秒)")
+    watch_parser.add_argument("--count", type=int, default=None, help="采样次数，默认不限")
+    add_metrics_arguments(watch_parser)
+
+    top_parser = subparsers.add_parser("top", help="持续输出内存占用最高的进程")
+    top_parser.add_argument("-n", "--limit", type=int, default=10, help="输出的进程数")
+    top_parser.add_argument("--sort", choices=SORT_KEYS, default="rss", help="排序指标")
+    top_parser.add_argument("--interval", type=float, default=2.0, help="刷新间隔(秒)")
+    top_parser.add_argument("--count", type=int, default=None, help="刷新次数，默认不限")
+
+    daemon_parser = subparsers.add_parser("daemon", help="后台运行自动清理")
+    add_clean_arguments(daemon_parser)
+    daemon_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                               help="自动清理阈值(%%)")
+    daemon_parser.add_argument("--cooldown", type=float, default=DEFAULT_INTERVAL,
+                               help="两次自动清理的最小间隔(秒)")
+    daemon_parser.add_argument("--interval", type=float, default=1.0, help="采样间隔(秒)")
+    daemon_parser.add_argument("--samples", action="store_true", help="同时输出每次采样")
+    daemon_parser.add_argument("--pressure", action="store_true",
+                               help="由内核内存压力事件(PSI / 低内存通知)触发清理，不可用时回退到定时检查")
+    daemon_parser.add_argument("--stall-ms", type=int, default=200,
+                               help="PSI 触发阈值：每 2 秒窗口内内存停顿的毫秒数")
+    daemon_parser.add_argument("--strategy-timeout", type=float, default=60.0,
+                               help="单个清理项目的超时(秒)，超时后跳过")
+    daemon_parser.add_argument("--detect-leaks", action="store_true",
+                               help="按进程跟踪工作集趋势，输出疑似内存泄漏的进程")
+    daemon_parser.add_argument("--leak-interval", type=float, default=1.0,
+                               help="泄漏检测的进程采样间隔(秒)")
+    daemon_parser.add_argument("--exclude-leaks", action="store_true",
+                               help="清理时跳过疑似泄漏的进程（隐含 --detect-leaks）")
+    daemon_parser.add_argument("--journal", default=None, help="把采样与清理结果写入该目录的历史日志")
+    daemon_parser.add_argument("--profile", default=None,
+                               help="策略配置文件(.json / .toml)，由规则决定何时清理与清理什么；SIGHUP 重新加载")
+    add_metrics_arguments(daemon_parser)
+
+    cgroups_parser = subparsers.add_parser("cgroups", help="按 cgroup v2 控制组监控，可按组回收")
+    cgroups_parser.add_argument("--root", default=None, help="cgroup v2 挂载点，默认自动检测")
+    cgroups_parser.add_argument("--max-depth", type=int, default=None, help="只发现该深度以内的组")
+    cgroups_parser.add_argument("--interval", type=float, default=1.0, help="采样间隔(秒)")
+    cgroups_parser.add_argument("--count", type=int, default=None, help="采样次数，默认不限")
+    cgroups_parser.add_argument("--reclaim", action="store_true",
+                                help="对超过阈值的组写入 memory.reclaim")
+    cgroups_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                                help="默认阈值：memory.current 占 memory.high/max 的百分比")
+    cgroups_parser.add_argument("--cooldown", type=float, default=DEFAULT_INTERVAL,
+                                help="同一组两次回收的最小间隔(秒)")
+    cgroups_parser.add_argument("--policy", type=parse_policy, action="append", default=[],
+                                help="按组覆盖策略：模式=阈值[:冷却]，例如 'system.slice/docker-*=90:60'")
+
+    profile_parser = subparsers.add_parser("profile", help="检查策略配置，并按当前内存状态求值")
+    profile_parser.add_argument("path", help="策略配置文件(.json / .toml)")
+    profile_parser.add_argument("--pressure", action="store_true", help="求值时视为存在内存压力")
+
+    journal_parser = subparsers.add_parser("journal", help="读取或导出历史日志")
+    journal_parser.add_argument("--dir", default=None, help="历史日志目录，默认与图形界面相同")
+    journal_parser.add_argument("--kind", choices=("sample", "clean"), default="sample", help="记录类型")
+    journal_parser.add_argument("--since", type=parse_time, default=None,
+                                help="起始时间：ISO 8601 或相对现在的时长，例如 24h")
+    journal_parser.add_argument("--until", type=parse_time, default=None, help="结束时间，格式同 --since")
+    journal_parser.add_argument("--csv", default=None, help="导出为 CSV 文件，- 表示标准输出")
+    journal_parser.add_argument("--points", type=int, default=None,
+                                help="把物理内存使用率按时间合并为 N 个点输出（平均与峰值），用于绘图")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    for name in ("top_n", "target_available", "workers", "swap_budget"):
+        if not hasattr(args, name):
+            setattr(args, name, None)
+    for name in ("allow", "deny"):
+        if not hasattr(args, name):
+            setattr(args, name, ())
+
+    try:
+        engine = build_engine(args)
+    except ValueError as e:
+        emit("error", message=str(e))
+        return 2
+    commands = {
+        "clean": cmd_clean,
+        "status": cmd_status,
+        "watch": cmd_watch,
+        "top": cmd_top,
+        "daemon": cmd_daemon,
+        "cgroups": cmd_cgroups,
+        "journal": cmd_journal,
+        "profile": cmd_profile,
+    }
+    try:
+        return commands[args.command](engine, args)
+    finally:
+        engine.backend.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
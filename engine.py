@@ -0,0 +1,343 @@
+"""无界面的内存清理引擎，不依赖 tkinter，可在服务器与构建机上直接使用"""
+import os
+import time
+
+from backends import create_backend
+from rebound import ReboundTracker
+from registry import ProcessRegistry
+from selection import ProcessSelector
+from settle import wait_for_settle
+from swap import MB, SwapGovernor
+from trim import DEFAULT_TRIM_WORKERS, TrimScheduler
+
+# 清理项目及其显示名称
+STRATEGIES = ("working_set", "system_working_set", "standby_list", "virtual_memory")
+# 界面与命令行默认启用的清理项目
+DEFAULT_OPTIONS = ("working_set", "system_working_set", "standby_list")
+STRATEGY_LABELS = {
+    "working_set": "工作集",
+    "system_working_set": "系统工作集",
+    "standby_list": "备用列表",
+    "virtual_memory": "虚拟内存",
+}
+
+
+class MemoryCleanEngine:
+    def __init__(self, backend=None, log=None, trim_workers=DEFAULT_TRIM_WORKERS,
+                 selector=None, track_rebound=False, rebound_window=30.0, swap_budget=64 * MB):
+        self.backend = backend if backend is not None else create_backend()
+        self._log = log
+        # 决定清理哪些进程，默认清理全部可打开的非关键进程
+        self.selector = selector if selector is not None else ProcessSelector()
+        # 在多次清理之间缓存的进程表
+        self.registry = ProcessRegistry(
+            self.backend, on_evict=lambda entry: self.backend.release_process(entry['pid'])
+        )
+        # 交换区 I/O 超出预算时暂停或中止按进程清理
+        self.swap_governor = SwapGovernor(self.backend, budget=swap_budget)
+        # 后端不提供换页计数时（Windows）没有限速依据，跳过逐进程的检查
+        self.trim_scheduler = TrimScheduler(
+            self._trim_batch, trim_workers,
+            gate=self.swap_governor.gate if self.backend.swap_io_counters else None
+        )
+        # 清理后等待内存状态稳定的参数：波动容差(字节)、采样间隔与最长等待(秒)
+        self.settle_tolerance = 8 * 1024 ** 2
+        self.settle_interval = 0.05
+        self.settle_timeout = 3.0
+        # 最近一次按进程清理的报告（每个进程的耗时与总耗时）
+        self.last_trim_report = None
+        # 每次 perform_clean 结束后以结果字典调用，例如指标导出
+        self.clean_listeners = []
+        # 本次清理使用的进程挑选规则（策略配置中的 trim），None 时使用 selector
+        self._clean_selector = None
+
+        # 清理后跟踪缺页回弹，回弹严重的进程下次清理时被跳过
+        self.rebound_tracker = None
+        self._rebound_baseline = None
+        # 本次清理中每个项目执行前后可用内存的增量，供按项目计算净收益
+        self._strategy_freed = {}
+        # 回弹评估结束后以报告调用，例如指标导出
+        self.rebound_listeners = []
+        if track_rebound:
+            self.rebound_tracker = ReboundTracker(
+                self.backend, window=rebound_window, on_complete=self._on_rebound_report
+            )
+            self.selector.add_exclusion(self.rebound_tracker.skip_pids)
+
+    def log(self, message):
+        """输出日志，未设置回调时静默"""
+        if self._log is not None:
+            self._log(message)
+
+    def is_admin(self):
+        return self.backend.is_admin()
+
+    def _trim_batch(self, pids):
+        # 带上登记时的创建时间，pid 在挑选之后被复用时不会清理到新进程
+        create_times = {}
+        for pid in pids:
+            entry = self.registry.get(pid)
+            if entry is not None:
+                create_times[pid] = entry['create_time']
+        return self.backend.trim(pids, create_times)
+
+    def clean_working_set(self):
+        """清理当前进程工作集"""
+        try:
+            self.backend.trim_current_process()
+            self.log("✓ 工作集清理成功")
+            return True
+        except OSError as e:
+            self.log(f"✗ {e}")
+            return False
+        except Exception as e:
+            self.log(f"✗ 工作集清理异常: {str(e)}")
+            return False
+
+    def clean_system_working_set(self):
+        """清理系统工作集"""
+        try:
+            self.backend.trim_system_working_set()
+            self.log("✓ 系统工作集清理成功")
+            return True
+        except OSError as e:
+            self.log(f"✗ 系统工作集清理失败: {str(e)}")
+            return False
+        except Exception as e:
+            self.log(f"✗ 系统工作集清理异常: {str(e)}")
+            return False
+
+    def clean_standby_list(self):
+        """清理备用列表 - 逐个清空非关键进程的工作集"""
+        try:
+            cleaned_count = 0
+
+            # 首先尝试清理当前进程
+            if self.clean_working_set():
+                cleaned_count += 1
+
+            # 交换区将满时换出页面只会造成 I/O 风暴
+            reason = self.swap_governor.begin()
+            if reason is not None:
+                self.log(f"⚠ {reason}，跳过按进程清理")
+                return cleaned_count > 0
+
+            # 然后在线程池中并行清理其他非关键进程
+            own_pid = os.getpid()
+            self.registry.refresh()
+            candidates = [
+                (pid, name) for pid, name in self.registry.processes()
+                # 跳过系统关键进程和自身
+                if pid != own_pid and not self.backend.is_protected(pid)
+            ]
+            selector = self._clean_selector or self.selector
+            pids = selector.select(
+                self.backend, candidates, self.backend.virtual_memory().available
+            )
+            if len(pids) < len(candidates):
+                self.log(f"按可回收内存挑选了 {len(pids)}/{len(candidates)} 个进程")
+            if self.rebound_tracker is not None:
+                self._rebound_baseline = self.rebound_tracker.snapshot(pids)
+            report = self.trim_scheduler.run(pids)
+            self.last_trim_report = report
+            cleaned_count += report['cleaned']
+
+            self.log(f"✓ 备用列表清理完成，清理了 {cleaned_count} 个进程 "
+                     f"(耗时 {report['wall_time']:.2f}s, {report['workers']} 线程)")
+            if self.swap_governor.aborted is not None:
+                self.log(f"⚠ {self.swap_governor.aborted}，跳过了其余 {report['skipped']} 个进程")
+            elif self.swap_governor.throttled:
+                self.log(f"交换区 I/O 超出预算，清理暂停了 {self.swap_governor.throttled} 次")
+            return cleaned_count > 0
+
+        except Exception as e:
+            self.log(f"✗ 备用列表清理异常: {str(e)}")
+            # 使用备选方法
+            return self.alternative_standby_clean()
+
+    def alternative_standby_clean(self):
+        """备用的备用列表清理方法"""
+        self.log("⚠ 使用备用方法清理备用列表")
+        return True
+
+    def clean_virtual_memory(self):
+        """清理虚拟内存"""
+        try:
+            self.backend.collect_garbage()
+            # 支持的平台上同时整理物理内存碎片
+            try:
+                self.backend.compact_memory()
+            except NotImplementedError:
+                pass
+            except OSError as e:
+                self.log(f"⚠ 内存整理失败: {str(e)}")
+            self.log("✓ 虚拟内存优化完成")
+            return True
+        except Exception as e:
+            self.log(f"✗ 虚拟内存清理异常: {str(e)}")
+            return False
+
+    def get_detailed_memory_info(self):
+        """获取详细的内存信息，系统与工作集来自平台的真实分类统计"""
+        info = self.backend.memory_breakdown()
+        total = info['total']
+
+        return {
+            'physical': {
+                'used': info['used'],
+                'total': total,
+                'percent': info['percent']
+            },
+            'virtual': {
+                'used': info['swap_used'],
+                'total': info['swap_total'] if info['swap_total'] > 0 else total * 2,
+                'percent': info['swap_percent']
+            },
+            'system': {
+                'used': info['system'],
+                'total': total,
+                'percent': info['system'] / total * 100 if total else 0.0
+            },
+            'working_set': {
+                'used': info['working_set'],
+                'total': total,
+                'percent': info['working_set'] / total * 100 if total else 0.0
+            }
+        }
+
+    def _on_rebound_report(self, report):
+        """回弹观察窗口结束后输出评估结果"""
+        threshold = self.rebound_tracker.skip_threshold
+        bad = sum(1 for p in report['processes'].values() if p['score'] < threshold)
+        self.log(f"回弹评估: 净收益 {report['net_bytes'] / (1024 ** 2):.1f}MB, "
+                 f"回涨 {report['rebound_bytes'] / (1024 ** 2):.1f}MB, "
+                 f"{bad} 个进程回弹严重，下次将跳过")
+        if report['strategy_scores']:
+            self.log("各项目平均净收益: " + ", ".join(
+                f"{STRATEGY_LABELS.get(name, name)} {score['net_bytes'] / (1024 ** 2):.1f}MB"
+                for name, score in report['strategy_scores'].items()
+            ))
+        for listener in self.rebound_listeners:
+            try:
+                listener(report)
+            except Exception as e:
+                self.log(f"⚠ 回弹评估回调失败: {str(e)}")
+
+    def run_strategy(self, name):
+        """执行单个清理项目"""
+        handlers = {
+            "working_set": self.clean_working_set,
+            "system_working_set": self.clean_system_working_set,
+            "standby_list": self.clean_standby_list,
+            "virtual_memory": self.clean_virtual_memory,
+        }
+        if self.rebound_tracker is None:
+            return handlers[name]()
+        before = self.backend.virtual_memory().available
+        ok = handlers[name]()
+        self._strategy_freed[name] = self.backend.virtual_memory().available - before
+        return ok
+
+    def _swap_io(self):
+        try:
+            return self.backend.swap_io()
+        except (OSError, ValueError):
+            return None
+
+    def perform_clean(self, options):
+        """执行真实的内存清理操作，返回清理结果"""
+        state = self.begin_clean()
+
+        # 执行清理操作
+        strategy_results = {}
+        for name in STRATEGIES:
+            if name in options:
+                strategy_results[name] = self.run_strategy(name)
+
+        return self.finish_clean(state, strategy_results)
+
+    def begin_clean(self, trigger="manual", trigger_percent=None, selector=None, rule=None):
+        """记录清理前的内存状态，供 finish_clean 计算释放量"""
+        self._clean_selector = selector
+        self._strategy_freed = {}
+        self.trim_scheduler.reset()
+        # 获取清理前的内存状态
+        memory_before = self.backend.virtual_memory()
+        self.log(f"清理前 - 使用率: {memory_before.percent:.1f}%, "
+                 f"可用: {memory_before.available / (1024 ** 3):.2f}GB")
+        return {
+            'started': time.monotonic(),
+            'before_percent': memory_before.percent,
+            'before_available': memory_before.available,
+            'trigger': trigger,
+            'trigger_percent': trigger_percent,
+            'rule': rule,
+            'swap_io': self._swap_io(),
+        }
+
+    def finish_clean(self, state, strategy_results):
+        """等待内存状态稳定并汇总结果，strategy_results 为 清理项目 -> 是否成功"""
+        results = [STRATEGY_LABELS[name] for name, ok in strategy_results.items() if ok]
+        self._clean_selector = None
+
+        # 高频采样可用内存，系统状态稳定后立即结束等待
+        settle = wait_for_settle(
+            self.backend.virtual_memory, key=lambda m: m.available,
+            tolerance=self.settle_tolerance, interval=self.settle_interval,
+            timeout=self.settle_timeout
+        )
+        if settle['converged']:
+            self.log(f"内存状态在 {settle['elapsed']:.2f}s 后稳定")
+        else:
+            self.log(f"⚠ 内存状态在 {self.settle_timeout:.1f}s 内未稳定，使用最后的采样")
+
+        after_physical = settle['sample'].percent
+        after_available = settle['value']
+
+        # 计算实际释放量
+        freed_bytes = after_available - state['before_available']
+
+        # 清理期间（含等待稳定）产生的交换区读写
+        swap_in = swap_out = 0
+        swap_after = self._swap_io()
+        if state['swap_io'] is not None and swap_after is not None:
+            swap_in = max(0, swap_after[0] - state['swap_io'][0])
+            swap_out = max(0, swap_after[1] - state['swap_io'][1])
+            if swap_in or swap_out:
+                self.log(f"交换区 I/O: 换入 {swap_in / MB:.1f}MB, 换出 {swap_out / MB:.1f}MB")
+
+        # 在后台观察清理后的回弹，结果反馈给下一次的进程挑选
+        baseline = self._rebound_baseline
+        self._rebound_baseline = None
+        # 没有按进程清理时没有可观察的回弹，不必启动观察线程
+        if self.rebound_tracker is not None and baseline:
+            strategies = {name: self._strategy_freed.get(name, 0) for name in strategy_results}
+            self.rebound_tracker.track(baseline, strategies, freed_bytes)
+
+        result = {
+            'before_percent': state['before_percent'],
+            'after_percent': after_physical,
+            'before_available': state['before_available'],
+            'after_available': after_available,
+            'freed_bytes': freed_bytes,
+            'freed_gb': freed_bytes / (1024 ** 3),
+            'results': results,
+            'strategy_results': strategy_results,
+            'success_count': len(results),
+            'duration': time.monotonic() - state['started'],
+            'settle_time': settle['elapsed'],
+            'settled': settle['converged'],
+            'trim_report': self.last_trim_report if "standby_list" in strategy_results else None,
+            'trigger': state['trigger'],
+            'trigger_percent': state['trigger_percent'],
+            'rule': state['rule'],
+            'swap_in_bytes': swap_in,
+            'swap_out_bytes': swap_out,
+            'swap_io_bytes': swap_in + swap_out,
+        }
+        for listener in self.clean_listeners:
+            try:
+                listener(result)
+            except Exception as e:
+                self.log(f"⚠ 清理结果回调失败: {str(e)}")
+        return result
@@ -0,0 +1,141 @@
+"""固定内存占用的内存历史：基于 array('d') 的环形缓冲区与 1秒/1分钟/1小时 汇总层级
+
+写入方只有采样线程一个，读取方无需加锁：写入方先写完槽位再递增计数，
+读取方先读取计数再读取槽位，只要读取的记录数少于容量就不会读到正在写入的槽位。
+"""
+from array import array
+
+# 每条记录的字段：桶起始时间、最小值、最大值、平均值
+RECORD_FIELDS = 4
+
+# (名称, 桶宽度秒数, 保留条数)：1 小时秒级、7 天分钟级、1 年小时级
+DEFAULT_TIERS = (
+    ("1s", 1, 3600),
+    ("1m", 60, 7 * 24 * 60),
+    ("1h", 3600, 365 * 24),
+)
+
+
+class RingBuffer:
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.data = array('d', bytes(8 * RECORD_FIELDS * capacity))
+        # 已写入的总条数，只由写入方递增
+        self.count = 0
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def append(self, start, low, high, avg):
+        """写入一条记录，写完后才发布新的计数"""
+        offset = (self.count % self.capacity) * RECORD_FIELDS
+        self.data[offset:offset + RECORD_FIELDS] = array('d', (start, low, high, avg))
+        self.count += 1
+
+    def segments(self):
+        """按时间顺序返回最多两个 memoryview 片段，不复制数据"""
+        count = self.count
+        view = memoryview(self.data)
+        if count <= self.capacity:
+            return [view[:count * RECORD_FIELDS]]
+        # 最旧的一条可能正被写入方覆盖，读取时跳过
+        head = (count % self.capacity) * RECORD_FIELDS
+        return [view[head + RECORD_FIELDS:], view[:head]]
+
+    def records(self, since=None):
+        """按时间顺序逐条产出 (start, min, max, avg)"""
+        for segment in self.segments():
+            for offset in range(0, len(segment), RECORD_FIELDS):
+                if since is not None and segment[offset] < since:
+                    continue
+                yield tuple(segment[offset:offset + RECORD_FIELDS])
+
+    def latest(self):
+        if self.count == 0:
+            return None
+        offset = ((self.count - 1) % self.capacity) * RECORD_FIELDS
+        return tuple(self.data[offset:offset + RECORD_FIELDS])
+
+
+class _Bucket:
+    """正在累积的汇总桶"""
+
+    __slots__ = ("index", "low", "high", "total", "weight")
+
+    def __init__(self, index, low, high, total, weight):
+        self.index = index
+        self.low = low
+        self.high = high
+        self.total = total
+        self.weight = weight
+
+    def merge(self, low, high, total, weight):
+        if low < self.low:
+            self.low = low
+        if high > self.high:
+            self.high = high
+        self.total += total
+        self.weight += weight
+
+
+class SeriesHistory:
+    """单个指标的多层级历史"""
+
+    def __init__(self, tiers=DEFAULT_TIERS):
+        self.tiers = tiers
+        self.buffers = {name: RingBuffer(capacity) for name, width, capacity in tiers}
+        self._pending = [None] * len(tiers)
+
+    def add(self, timestamp, value):
+        """加入一个原始采样"""
+        self._feed(0, timestamp, value, value, value, 1)
+
+    def _feed(self, level, timestamp, low, high, total, weight):
+        name, width, capacity = self.tiers[level]
+        index = int(timestamp // width)
+        bucket = self._pending[level]
+
+        if bucket is not None and bucket.index != index:
+            # 桶已结束：写入本层并把汇总结果交给下一层
+            start = bucket.index * width
+            self.buffers[name].append(start, bucket.low, bucket.high,
+                                      bucket.total / bucket.weight)
+            if level + 1 < len(self.tiers):
+                self._feed(level + 1, start, bucket.low, bucket.high,
+                           bucket.total, bucket.weight)
+            bucket = None
+
+        if bucket is None:
+            self._pending[level] = _Bucket(index, low, high, total, weight)
+        else:
+            bucket.merge(low, high, total, weight)
+
+    def query(self, tier="1s", since=None):
+        return self.buffers[tier].records(since)
+
+    def latest(self, tier="1s"):
+        return self.buffers[tier].latest()
+
+    def footprint(self):
+        """占用的缓冲区字节数"""
+        return sum(buf.data.itemsize * len(buf.data) for buf in self.buffers.values())
+
+
+class MemoryHistory:
+    """记录 get_detailed_memory_info 中各类内存的使用率历史"""
+
+    def __init__(self, keys=("physical", "virtual", "system", "working_set"),
+                 tiers=DEFAULT_TIERS):
+        self.series = {key: SeriesHistory(tiers) for key in keys}
+
+    def record(self, timestamp, memory_info):
+        for key, series in self.series.items():
+            info = memory_info.get(key)
+            if info is not None:
+                series.add(timestamp, info['percent'])
+
+    def query(self, key, tier="1s", since=None):
+        return self.series[key].query(tier, since)
+
+    def footprint(self):
+        return sum(series.footprint() for series in self.series.values())
@@ -0,0 +1,286 @@
+"""磁盘上的二进制日志：定长记录保存内存采样与清理结果，按段轮转，用 mmap 按时间范围读取
+
+每个段文件以 16 字节的文件头开始，之后是按时间追加的 40 字节记录，文件名为段内第一条记录的时间戳。
+进程异常退出时末尾可能残留不完整的记录，读取时忽略，再次写入前截断。
+"""
+import csv
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import namedtuple
+
+from engine import STRATEGIES
+
+MAGIC = b"MCJ1"
+HEADER = struct.Struct("<4sHH8x")
+# 时间戳、记录类型、触发方式、清理项目位图（低 8 位请求、高 8 位成功）、两个浮点数、两个整数、一个浮点数
+RECORD = struct.Struct("<dBBHffqqf")
+# 只取时间、记录类型与第一个浮点数（采样记录为物理内存使用率）
+PERCENT_FIELDS = struct.Struct("<dB3xf")
+SEGMENT_SUFFIX = ".mcj"
+
+KIND_SAMPLE = 1
+KIND_CLEAN = 2
+TRIGGERS = ("manual", "threshold", "pressure")
+
+JournalSample = namedtuple("JournalSample", [
+    "time", "physical_percent", "virtual_percent", "physical_used", "virtual_used", "latency",
+])
+JournalClean = namedtuple("JournalClean", [
+    "time", "trigger", "strategies", "succeeded", "before_percent", "after_percent",
+    "freed_bytes", "swap_io_bytes", "duration",
+])
+
+
+def default_directory():
+    """按平台选择的日志目录"""
+    base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(base, "memoptima", "journal")
+
+
+def _segment_start(path):
+    return int(os.path.basename(path)[:-len(SEGMENT_SUFFIX)])
+
+
+def _strategy_bits(names):
+    return sum(1 << i for i, name in enumerate(STRATEGIES) if name in names)
+
+
+def _strategy_names(bits):
+    return [name for i, name in enumerate(STRATEGIES) if bits & (1 << i)]
+
+
+def decode(record):
+    """把解包后的元组转换为 JournalSample 或 JournalClean"""
+    timestamp, kind, trigger, bits, f1, f2, q1, q2, f3 = record
+    if kind == KIND_SAMPLE:
+        return JournalSample(timestamp, f1, f2, q1, q2, f3)
+    return JournalClean(
+        timestamp, TRIGGERS[trigger] if trigger < len(TRIGGERS) else "other",
+        _strategy_names(bits & 0xFF), _strategy_names(bits >> 8), f1, f2, q1, q2, f3,
+    )
+
+
+class Segment:
+    """只读映射的段文件，按时间二分查找"""
+
+    def __init__(self, path):
+        self.path = path
+        self.start = _segment_start(path)
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            self.count = max(0, (size - HEADER.size) // RECORD.size)
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.count else None
+        if self.map is not None:
+            magic, version, record_size = HEADER.unpack_from(self.map, 0)
+            if magic != MAGIC or record_size != RECORD.size:
+                self.close()
+                raise ValueError(f"不是有效的日志段: {path}")
+
+    def time_at(self, index):
+        return struct.unpack_from("<d", self.map, HEADER.size + index * RECORD.size)[0]
+
+    def percent_at(self, index):
+        return PERCENT_FIELDS.unpack_from(self.map, HEADER.size + index * RECORD.size)
+
+    def bisect(self, timestamp):
+        """第一条时间不早于 timestamp 的记录序号"""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.time_at(mid) < timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def records(self, start=None, end=None):
+        """时间范围 [start, end) 内的原始记录元组"""
+        if not self.count:
+            return
+        first = self.bisect(start) if start is not None else 0
+        last = self.bisect(end) if end is not None else self.count
+        if first >= last:
+            return
+        view = memoryview(self.map)[HEADER.size + first * RECORD.size:HEADER.size + last * RECORD.size]
+        try:
+            yield from RECORD.iter_unpack(view)
+        finally:
+            view.release()
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+
+
+class Journal:
+    def __init__(self, directory=None, segment_bytes=8 * 1024 ** 2, max_segments=16,
+                 flush_interval=5.0, clock=time.time):
+        self.directory = directory or default_directory()
+        # 单个段约 8MB（20 万条记录，1 秒采样约 2.4 天），最多保留 max_segments 个段
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        # 记录先写入缓冲区，每 flush_interval 秒落盘一次
+        self.flush_interval = flush_interval
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._file = None
+        self._size = 0
+        self._last_flush = 0.0
+        self._closed = False
+        os.makedirs(self.directory, exist_ok=True)
+
+    # ---- 写入 ----
+
+    def segments(self):
+        """按时间排序的段文件路径"""
+        names = [name for name in os.listdir(self.directory) if name.endswith(SEGMENT_SUFFIX)]
+        return [os.path.join(self.directory, name) for name in sorted(names)]
+
+    def _open_segment(self, timestamp):
+        paths = self.segments()
+        if paths and os.path.getsize(paths[-1]) < self.segment_bytes:
+            path = paths[-1]
+            f = open(path, "r+b")
+            # 截断异常退出时残留的不完整记录
+            size = os.fstat(f.fileno()).st_size
+            whole = HEADER.size + max(0, size - HEADER.size) // RECORD.size * RECORD.size
+            if size < HEADER.size:
+                f.truncate(0)
+                f.write(HEADER.pack(MAGIC, 1, RECORD.size))
+                whole = HEADER.size
+            elif whole != size:
+                f.truncate(whole)
+            f.seek(whole)
+            self._file, self._size = f, whole
+            return
+        start = int(timestamp)
+        if paths:
+            # 系统时间回拨时段名仍须递增，不能覆盖已有的段
+            start = max(start, _segment_start(paths[-1]) + 1)
+        path = os.path.join(self.directory, f"{start:012d}{SEGMENT_SUFFIX}")
+        f = open(path, "wb")
+        f.write(HEADER.pack(MAGIC, 1, RECORD.size))
+        self._file, self._size = f, HEADER.size
+        self._prune()
+
+    def _prune(self):
+        paths = self.segments()
+        for path in paths[:max(0, len(paths) - self.max_segments)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _append(self, record):
+        with self._lock:
+            if self._closed:
+                return
+            if self._file is None or self._size >= self.segment_bytes:
+                if self._file is not None:
+                    self._file.close()
+                self._open_segment(record[0])
+            self._file.write(RECORD.pack(*record))
+            self._size += RECORD.size
+            now = time.monotonic()
+            if now - self._last_flush >= self.flush_interval:
+                self._file.flush()
+                self._last_flush = now
+
+    def append_sample(self, snapshot):
+        """采样监听器：记录 MemorySnapshot"""
+        self._append((snapshot.timestamp, KIND_SAMPLE, 0, 0,
+                      snapshot.physical.percent, snapshot.virtual.percent,
+                      int(snapshot.physical.used), int(snapshot.virtual.used), snapshot.latency))
+
+    def append_clean(self, result):
+        """清理结果监听器：记录 finish_clean 的结果"""
+        trigger = result.get('trigger', "manual")
+        strategy_results = result['strategy_results']
+        bits = (_strategy_bits(strategy_results) |
+                _strategy_bits([name for name, ok in strategy_results.items() if ok]) << 8)
+        self._append((self.clock(), KIND_CLEAN, TRIGGERS.index(trigger) if trigger in TRIGGERS else 255,
+                      bits, result['before_percent'], result['after_percent'],
+                      int(result['freed_bytes']), int(result.get('swap_io_bytes', 0)),
+                      result['duration']))
+
+    def flush(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    # ---- 读取 ----
+
+    def open_segments(self, start=None, end=None):
+        """依次映射与时间范围相交的段，调用方用完后段被关闭"""
+        self.flush()
+        paths = self.segments()
+        for i, path in enumerate(paths):
+            # 段的时间范围为 [文件名时间, 下一段的文件名时间)
+            if end is not None and _segment_start(path) >= end:
+                break
+            if start is not None and i + 1 < len(paths) and _segment_start(paths[i + 1]) <= start:
+                continue
+            try:
+                segment = Segment(path)
+            except (OSError, ValueError):
+                continue
+            try:
+                yield segment
+            finally:
+                segment.close()
+
+    def query(self, start=None, end=None, kind=None):
+        """按时间范围 [start, end) 读取记录，kind 为 KIND_SAMPLE / KIND_CLEAN 时只返回该类"""
+        for segment in self.open_segments(start, end):
+            for record in segment.records(start, end):
+                if kind is None or record[1] == kind:
+                    yield decode(record)
+
+    def downsample(self, start, end, points=300, max_reads=64):
+        """把物理内存使用率按时间分成 points 段，返回 [(段起始时间, 平均值, 峰值)]，用于绘制图表
+
+        每段先二分定位，再最多等间隔读取 max_reads 条记录，一个月的数据也只读取几万条。
+        """
+        width = (end - start) / points
+        buckets = {}
+        for segment in self.open_segments(start, end):
+            for index in range(points):
+                first = segment.bisect(start + index * width)
+                last = segment.bisect(start + (index + 1) * width)
+                if first >= last:
+                    continue
+                bucket = buckets.setdefault(index, [0.0, 0.0, 0])
+                for i in range(first, last, max(1, (last - first) // max_reads)):
+                    timestamp, kind, percent = segment.percent_at(i)
+                    if kind != KIND_SAMPLE:
+                        continue
+                    bucket[0] += percent
+                    bucket[1] = max(bucket[1], percent)
+                    bucket[2] += 1
+        return [(start + index * width, total / count, peak)
+                for index, (total, peak, count) in sorted(buckets.items()) if count]
+
+    def export_csv(self, stream, start=None, end=None, kind=KIND_SAMPLE):
+        """把一类记录写为 CSV，返回写入的行数"""
+        fields = JournalSample._fields if kind == KIND_SAMPLE else JournalClean._fields
+        writer = csv.writer(stream)
+        writer.writerow(fields)
+        rows = 0
+        for record in self.query(start, end, kind):
+            if kind == KIND_CLEAN:
+                record = record._replace(strategies=" ".join(record.strategies),
+                                         succeeded=" ".join(record.succeeded))
+            writer.writerow(record)
+            rows += 1
+        return rows
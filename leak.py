@@ -0,0 +1,176 @@
+"""内存泄漏检测：按进程维护分桶的工作集序列，对滑动窗口做线性回归，持续增长且拟合度高的进程被标记
+
+没有引入 numpy 做跨进程的向量化回归：每个进程维护回归所需的累计和，追加、淘汰与拟合都是 O(1)，
+每个桶结束时的全部重新拟合是一次 O(进程数) 的循环，5000 个进程约 8ms，每分钟只执行一次。
+"""
+import threading
+import time
+from array import array
+from collections import namedtuple
+
+MB = 1024 ** 2
+
+LeakSuspect = namedtuple("LeakSuspect", ["pid", "name", "rss", "growth", "r2", "buckets"])
+
+
+class ProcessTrend:
+    """一个进程的环形序列与回归所需的累计和，追加与淘汰都是 O(1)"""
+
+    __slots__ = ("name", "values", "head", "count", "first", "sx", "sy", "sxx", "sxy", "syy",
+                 "bucket_sum", "bucket_count", "rss")
+
+    def __init__(self, name, window):
+        self.name = name
+        # 每个桶的平均工作集 (MB)，定长数组，内存占用固定
+        self.values = array("d", bytes(8 * window))
+        self.head = 0
+        self.count = 0
+        # 窗口中最早一个桶的序号，横坐标使用全局桶序号
+        self.first = 0
+        self.sx = self.sy = self.sxx = self.sxy = self.syy = 0.0
+        # 当前未结束的桶内的采样
+        self.bucket_sum = 0.0
+        self.bucket_count = 0
+        self.rss = 0
+
+    def push(self, x, y):
+        window = len(self.values)
+        if self.count == window:
+            old_x, old_y = self.first, self.values[self.head]
+            self.sx -= old_x
+            self.sy -= old_y
+            self.sxx -= old_x * old_x
+            self.sxy -= old_x * old_y
+            self.syy -= old_y * old_y
+            self.first += 1
+        else:
+            if self.count == 0:
+                self.first = x
+            self.count += 1
+        self.values[self.head] = y
+        self.head = (self.head + 1) % window
+        self.sx += x
+        self.sy += y
+        self.sxx += x * x
+        self.sxy += x * y
+        self.syy += y * y
+
+    def fit(self):
+        """返回 (每桶增长的 MB, 决定系数 R²)"""
+        n = self.count
+        # 横坐标按窗口起点平移，避免大序号下的相消误差
+        c = self.first
+        sx = self.sx - n * c
+        sxx = self.sxx - 2 * c * self.sx + n * c * c
+        sxy = self.sxy - c * self.sy
+        var_x = n * sxx - sx * sx
+        var_y = n * self.syy - self.sy * self.sy
+        if n < 2 or var_x <= 0:
+            return 0.0, 0.0
+        cov = n * sxy - sx * self.sy
+        slope = cov / var_x
+        r2 = cov * cov / (var_x * var_y) if var_y > 0 else 0.0
+        return slope, min(1.0, r2)
+
+
+class LeakDetector:
+    def __init__(self, bucket_seconds=60.0, window=120, min_buckets=30,
+                 min_growth=4 * MB, min_r2=0.8, min_rss=16 * MB,
+                 clock=time.monotonic, on_leak=None):
+        # 采样先按 bucket_seconds 取平均，回归窗口为最近 window 个桶（默认 2 小时）
+        self.bucket_seconds = bucket_seconds
+        self.window = window
+        # 至少积累 min_buckets 个桶才开始判断
+        self.min_buckets = min_buckets
+        # 每小时增长至少 min_growth 字节且 R² 不低于 min_r2 才标记
+        self.min_growth = min_growth
+        self.min_r2 = min_r2
+        # 工作集低于 min_rss 的进程不建立序列，限制跟踪的进程数
+        self.min_rss = min_rss
+        self.clock = clock
+        self.on_leak = on_leak
+
+        self._lock = threading.Lock()
+        # pid -> ProcessTrend
+        self.trends = {}
+        # pid -> LeakSuspect，当前被标记的进程
+        self.suspects = {}
+        self.bucket = 0
+        self._bucket_started = None
+
+    def observe(self, rows):
+        """记录一次采样（ProcessStat 序列）；桶结束时返回新标记的进程列表，否则返回 None"""
+        now = self.clock()
+        if self._bucket_started is None:
+            self._bucket_started = now
+        flagged = None
+        if now - self._bucket_started >= self.bucket_seconds:
+            flagged = self.close_bucket()
+            self._bucket_started = now
+
+        for row in rows:
+            trend = self.trends.get(row.pid)
+            if trend is not None and trend.name != row.name:
+                # pid 被新进程复用
+                trend = None
+            if trend is None:
+                if row.rss < self.min_rss:
+                    continue
+                trend = self.trends[row.pid] = ProcessTrend(row.name, self.window)
+            trend.bucket_sum += row.rss
+            trend.bucket_count += 1
+            trend.rss = row.rss
+        return flagged
+
+    def forget(self, pids):
+        """丢弃已退出或被复用的 pid 的序列，复用后同名的新进程不会沿用旧序列"""
+        for pid in pids:
+            self.trends.pop(pid, None)
+        with self._lock:
+            if any(pid in self.suspects for pid in pids):
+                self.suspects = {pid: s for pid, s in self.suspects.items() if pid not in pids}
+
+    def close_bucket(self):
+        """把每个进程当前桶的平均值加入序列，并对所有进程重新拟合"""
+        x = self.bucket
+        self.bucket += 1
+        per_hour = 3600 / self.bucket_seconds * MB
+        suspects = {}
+        flagged = []
+        for pid, trend in list(self.trends.items()):
+            if trend.bucket_count == 0:
+                # 本桶内没有采样：进程已退出
+                del self.trends[pid]
+                continue
+            trend.push(x, trend.bucket_sum / trend.bucket_count / MB)
+            trend.bucket_sum = 0.0
+            trend.bucket_count = 0
+            if trend.count < self.min_buckets:
+                continue
+            slope, r2 = trend.fit()
+            growth = slope * per_hour
+            previous = self.suspects.get(pid)
+            # 已标记的进程在拟合度降到阈值的 3/4 以下或不再增长时才取消标记
+            threshold = self.min_r2 * 0.75 if previous is not None else self.min_r2
+            if growth >= self.min_growth and r2 >= threshold:
+                suspect = LeakSuspect(pid, trend.name, trend.rss, growth, r2, trend.count)
+                suspects[pid] = suspect
+                if previous is None:
+                    flagged.append(suspect)
+        with self._lock:
+            self.suspects = suspects
+        if self.on_leak is not None:
+            for suspect in flagged:
+                self.on_leak(suspect)
+        return flagged
+
+    def current_suspects(self):
+        """当前被标记的进程，按增长速度降序"""
+        with self._lock:
+            suspects = list(self.suspects.values())
+        return sorted(suspects, key=lambda s: s.growth, reverse=True)
+
+    def skip_pids(self):
+        """疑似泄漏的进程：清理只会把泄漏的内存换出后再被换入，不值得清理"""
+        with self._lock:
+            return set(self.suspects)
@@ -0,0 +1,142 @@
+"""Linux 原生接口层：process_madvise、/proc 与 cgroup v2 控制文件，以及能力检测
+
+在非 Linux 平台上导入本模块不会加载 libc，AVAILABLE 为 False。
+"""
+import ctypes
+import errno
+import os
+import sys
+
+AVAILABLE = sys.platform.startswith("linux")
+
+# 自 5.1 起新增的系统调用在各架构上编号统一（alpha 除外）
+SYS_PROCESS_MADVISE = 440
+MADV_PAGEOUT = 21
+# 单次 process_madvise 最多提交的区间数 (UIO_MAXIOV)
+IOV_MAX = 1024
+
+# 无法换出的特殊映射
+SPECIAL_MAPPINGS = ("[vvar]", "[vsyscall]", "[vvar_vclock]")
+
+
+class IOVec(ctypes.Structure):
+    _fields_ = [("iov_base", ctypes.c_void_p), ("iov_len", ctypes.c_size_t)]
+
+
+if AVAILABLE:
+    libc = ctypes.CDLL(None, use_errno=True)
+    syscall = libc.syscall
+    syscall.restype = ctypes.c_long
+
+
+def process_madvise(pidfd, ranges, advice=MADV_PAGEOUT):
+    """对 ranges [(起始地址, 长度)] 提交建议，返回内核处理的字节数，失败时抛出 OSError"""
+    vector = (IOVec * len(ranges))(*ranges)
+    result = syscall(ctypes.c_long(SYS_PROCESS_MADVISE), ctypes.c_int(pidfd), vector,
+                     ctypes.c_size_t(len(ranges)), ctypes.c_int(advice), ctypes.c_uint(0))
+    if result < 0:
+        code = ctypes.get_errno()
+        raise OSError(code, os.strerror(code))
+    return result
+
+
+def private_ranges(maps_path):
+    """读取 /proc/[pid]/maps 中可换出的私有映射，返回 [(起始地址, 长度)]"""
+    ranges = []
+    with open(maps_path) as f:
+        for line in f:
+            fields = line.split(None, 5)
+            if "p" not in fields[1]:
+                continue
+            if len(fields) == 6 and fields[5].strip() in SPECIAL_MAPPINGS:
+                continue
+            start, end = fields[0].split("-")
+            start = int(start, 16)
+            ranges.append((start, int(end, 16) - start))
+    return ranges
+
+
+def pageout(pid, proc_root="/proc"):
+    """通过 process_madvise(MADV_PAGEOUT) 换出进程的私有页面，返回提交的字节数"""
+    ranges = private_ranges(os.path.join(proc_root, str(pid), "maps"))
+    pidfd = os.pidfd_open(pid)
+    advised = 0
+    try:
+        for i in range(0, len(ranges), IOV_MAX):
+            try:
+                advised += process_madvise(pidfd, ranges[i:i + IOV_MAX])
+            except OSError as e:
+                # 进程已退出或无权限时放弃，个别区间不支持时继续下一批
+                if e.errno in (errno.ESRCH, errno.EPERM, errno.ENOSYS):
+                    raise
+    finally:
+        os.close(pidfd)
+    return advised
+
+
+def write_control(path, value):
+    """写入 /proc/sys 或 cgroup 控制文件"""
+    with open(path, "w") as f:
+        f.write(str(value))
+
+
+def cgroup2_mount(proc_root="/proc"):
+    """cgroup v2 的挂载点，未挂载时返回 None"""
+    try:
+        with open(os.path.join(proc_root, "self/mounts")) as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) > 2 and fields[2] == "cgroup2":
+                    return fields[1]
+    except OSError:
+        pass
+    return None
+
+
+def _probe_process_madvise():
+    # 对自身提交 0 个区间：内核支持时返回 0，不支持时为 ENOSYS
+    if not hasattr(os, "pidfd_open"):
+        return False
+    try:
+        pidfd = os.pidfd_open(os.getpid())
+    except OSError:
+        return False
+    try:
+        process_madvise(pidfd, [])
+        return True
+    except OSError:
+        return False
+    finally:
+        os.close(pidfd)
+
+
+def detect_capabilities(proc_root="/proc", cgroup_root=None):
+    """检测当前内核与权限下可用的回收机制"""
+    vm = os.path.join(proc_root, "sys/vm")
+    if cgroup_root is None:
+        cgroup_root = cgroup2_mount(proc_root)
+    return {
+        "drop_caches": os.access(os.path.join(vm, "drop_caches"), os.W_OK),
+        "compact_memory": os.access(os.path.join(vm, "compact_memory"), os.W_OK),
+        "process_reclaim": os.path.exists(os.path.join(proc_root, "self/reclaim")),
+        "process_madvise": AVAILABLE and _probe_process_madvise(),
+        "cgroup_root": cgroup_root,
+        "cgroup_reclaim": _has_control(cgroup_root, "memory.reclaim"),
+    }
+
+
+def _has_control(root, name):
+    # 根 cgroup 可能没有 memory.* 文件，此时检查第一层子组
+    if not root:
+        return False
+    if os.path.exists(os.path.join(root, name)):
+        return True
+    try:
+        with os.scandir(root) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False) and os.path.exists(
+                        os.path.join(entry.path, name)):
+                    return True
+    except OSError:
+        pass
+    return False
@@ -0,0 +1,57 @@
+"""日志管道：任意线程写入有界队列，界面线程定时批量取出，可选写入滚动日志文件"""
+import threading
+from collections import deque
+
+
+class LogPipeline:
+    def __init__(self, max_lines=1000, max_pending=5000, log_file=None,
+                 max_bytes=1024 ** 2, backup_count=3):
+        # 界面中最多保留的行数，同时用于重建日志控件时回填
+        self.max_lines = max_lines
+        self.recent = deque(maxlen=max_lines)
+        # 等待界面取走的消息，积压过多时丢弃最旧的
+        self._pending = deque()
+        self.max_pending = max_pending
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+        self._file_logger = None
+        if log_file:
+            # 只有启用文件输出时才导入 logging，避免拖慢启动
+            import logging
+            from logging.handlers import RotatingFileHandler
+
+            handler = RotatingFileHandler(log_file, maxBytes=max_bytes,
+                                          backupCount=backup_count, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            self._file_logger = logging.getLogger(f"memoptima.log.{id(self)}")
+            self._file_logger.propagate = False
+            self._file_logger.setLevel(logging.INFO)
+            self._file_logger.addHandler(handler)
+
+    def put(self, message):
+        """写入一条日志，可在任意线程调用"""
+        with self._lock:
+            if len(self._pending) >= self.max_pending:
+                self._pending.popleft()
+                self.dropped += 1
+            self._pending.append(message)
+        if self._file_logger is not None:
+            self._file_logger.info(message)
+
+    def drain(self):
+        """取出全部待显示的日志行"""
+        with self._lock:
+            lines = list(self._pending)
+            self._pending.clear()
+            dropped, self.dropped = self.dropped, 0
+        if dropped:
+            lines.insert(0, f"⚠ 日志过多，已丢弃 {dropped} 条")
+        self.recent.extend(lines)
+        return lines
+
+    def close(self):
+        if self._file_logger is not None:
+            for handler in list(self._file_logger.handlers):
+                handler.close()
+                self._file_logger.removeHandler(handler)
@@ -0,0 +1,222 @@
+"""Prometheus 文本格式的指标导出：每次采样后预先渲染，抓取时直接返回缓存的文本"""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+FREED_BYTES_BUCKETS = tuple(2 ** n * 1024 ** 2 for n in range(4, 13))  # 16MB ~ 4GB
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SAMPLE_LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+class Metric:
+    def __init__(self, name, help_text, kind):
+        self.name = name
+        self.help_text = help_text
+        self.kind = kind
+        self._lock = threading.Lock()
+        # 标签元组 -> 数值
+        self.values = {}
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self):
+        with self._lock:
+            items = sorted(self.values.items())
+        return self.header() + [f"{self.name}{_labels(labels)} {value}" for labels, value in items]
+
+
+class Gauge(Metric):
+    def __init__(self, name, help_text):
+        super().__init__(name, help_text, "gauge")
+
+    def set(self, value, **labels):
+        with self._lock:
+            self.values[tuple(sorted(labels.items()))] = value
+
+    def replace(self, items):
+        """用 [(标签字典, 数值)] 整体替换，已消失的标签组合随之移除"""
+        values = {tuple(sorted(labels.items())): value for labels, value in items}
+        with self._lock:
+            self.values = values
+
+
+class Counter(Metric):
+    def __init__(self, name, help_text):
+        super().__init__(name, help_text, "counter")
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Histogram(Metric):
+    def __init__(self, name, help_text, buckets):
+        super().__init__(name, help_text, "histogram")
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        with self._lock:
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    def render(self):
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        lines = self.header()
+        for bound, value in zip(self.buckets, counts):
+            lines.append(f'{self.name}_bucket{{le="{bound}"}} {value}')
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {count}')
+        lines.append(f"{self.name}_sum {total}")
+        lines.append(f"{self.name}_count {count}")
+        return lines
+
+
+class CleanerMetrics:
+    """内存清理工具的全部指标"""
+
+    def __init__(self, prefix="memoptima"):
+        self.memory_used = Gauge(f"{prefix}_memory_used_bytes", "各类内存的已用字节数")
+        self.memory_total = Gauge(f"{prefix}_memory_total_bytes", "各类内存的总字节数")
+        self.memory_percent = Gauge(f"{prefix}_memory_usage_percent", "各类内存的使用率")
+        self.sample_latency = Histogram(f"{prefix}_sample_duration_seconds",
+                                        "单次内存采样耗时", SAMPLE_LATENCY_BUCKETS)
+        self.last_sample = Gauge(f"{prefix}_last_sample_timestamp_seconds", "最近一次采样的时间")
+        self.clean_runs = Counter(f"{prefix}_clean_runs_total", "清理执行次数")
+        self.strategy_results = Counter(f"{prefix}_clean_strategy_total",
+                                        "各清理项目的执行结果")
+        self.freed_bytes = Histogram(f"{prefix}_clean_freed_bytes",
+                                     "单次清理释放的字节数", FREED_BYTES_BUCKETS)
+        self.clean_duration = Histogram(f"{prefix}_clean_duration_seconds",
+                                        "单次清理耗时", DURATION_BUCKETS)
+        self.clean_swap_io = Counter(f"{prefix}_clean_swap_io_bytes_total",
+                                     "清理期间的交换区读写字节数")
+        self.strategy_net = Gauge(f"{prefix}_clean_strategy_net_bytes",
+                                  "各清理项目扣除回弹与缺页代价后的平均净收益")
+        self.leak_suspects = Gauge(f"{prefix}_leak_suspects", "疑似内存泄漏的进程数")
+        self.leak_growth = Gauge(f"{prefix}_leak_growth_bytes_per_hour",
+                                 "疑似泄漏进程的工作集增长速度")
+        self.metrics = [
+            self.memory_used, self.memory_total, self.memory_percent,
+            self.sample_latency, self.last_sample, self.clean_runs,
+            self.strategy_results, self.freed_bytes, self.clean_duration,
+            self.clean_swap_io, self.strategy_net, self.leak_suspects, self.leak_growth,
+        ]
+        # 预先渲染好的响应内容，抓取时直接返回
+        self.rendered = b""
+        self.refresh()
+
+    def observe_sample(self, memory_info, latency, timestamp=None):
+        """记录一次 get_detailed_memory_info 的结果"""
+        for kind, info in memory_info.items():
+            self.memory_used.set(info['used'], kind=kind)
+            self.memory_total.set(info['total'], kind=kind)
+            self.memory_percent.set(info['percent'], kind=kind)
+        self.sample_latency.observe(latency)
+        self.last_sample.set(timestamp if timestamp is not None else time.time())
+        self.refresh()
+
+    def observe_snapshot(self, snapshot):
+        """采样线程监听器：记录 MemorySnapshot"""
+        from sampler import CARD_KEYS
+        memory_info = {key: getattr(snapshot, key)._asdict() for key in CARD_KEYS}
+        self.observe_sample(memory_info, snapshot.latency, snapshot.timestamp)
+
+    def observe_clean(self, result):
+        """记录一次 perform_clean 的结果"""
+        self.clean_runs.inc()
+        for strategy, ok in result['strategy_results'].items():
+            self.strategy_results.inc(strategy=strategy, result="success" if ok else "failure")
+        self.freed_bytes.observe(max(0.0, result['freed_bytes']))
+        self.clean_duration.observe(result['duration'])
+        self.clean_swap_io.inc(result.get('swap_in_bytes', 0), direction="in")
+        self.clean_swap_io.inc(result.get('swap_out_bytes', 0), direction="out")
+        self.refresh()
+
+    def observe_rebound(self, report):
+        """记录回弹评估报告中按项目平滑后的净收益"""
+        self.strategy_net.replace(
+            ({"strategy": name}, round(score['net_bytes']))
+            for name, score in report['strategy_scores'].items()
+        )
+        self.refresh()
+
+    def observe_leaks(self, suspects):
+        """记录泄漏检测的结果（LeakSuspect 列表）"""
+        self.leak_suspects.set(len(suspects))
+        self.leak_growth.replace(
+            ({"pid": s.pid, "name": s.name}, round(s.growth)) for s in suspects
+        )
+        self.refresh()
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+    def refresh(self):
+        # 整体替换引用，抓取线程总能读到完整的一份
+        self.rendered = self.render()
+
+
+class MetricsExporter:
+    """基于标准库 http.server 的指标端点"""
+
+    def __init__(self, metrics, host="127.0.0.1", port=9100, path="/metrics"):
+        self.metrics = metrics
+        self.path = path
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != exporter.path:
+                    self.send_error(404)
+                    return
+                body = exporter.metrics.rendered
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # 不向标准错误输出访问日志
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def address(self):
+        return self.server.server_address
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever,
+                                        name="metrics-exporter", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
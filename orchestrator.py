@@ -0,0 +1,354 @@
+"""asyncio 编排核心：采样、自动清理、压力事件与指标导出作为受监督的任务运行
+
+所有阻塞调用（读取内存信息、各清理项目、按进程清理）都通过 run_in_executor 放进线程池，
+事件循环本身只做调度。界面通过线程安全的 events 队列与 request_clean() 与其交互。
+"""
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from engine import STRATEGIES, STRATEGY_LABELS
+from policy import make_context
+from sampler import MemorySampler
+
+# 单个清理项目的默认超时（秒）
+DEFAULT_STRATEGY_TIMEOUT = 60.0
+
+
+class CleanerRuntime:
+    def __init__(self, engine, scheduler, interval=1.0, history=None, metrics=None,
+                 exporter=None, pressure_source=None, pressure_gap=2.0, always_sample=True,
+                 strategy_timeouts=None, default_timeout=DEFAULT_STRATEGY_TIMEOUT,
+                 max_concurrent_cleans=1, workers=4, restart_delay=1.0,
+                 shutdown_timeout=5.0, process_index=None, index_interval=2.0,
+                 leak_detector=None, journal=None, policy=None, pressure_hold=10.0,
+                 on_event=None):
+        self.engine = engine
+        self.scheduler = scheduler
+        # 采样、历史写入、快照队列与监听器，由 _sample_loop 定时调用
+        self.sampler = MemorySampler(engine, interval=interval, history=history)
+        self.metrics = metrics
+        self.exporter = exporter
+        if metrics is not None:
+            self.sampler.add_listener(metrics.observe_snapshot)
+            engine.clean_listeners.append(metrics.observe_clean)
+            engine.rebound_listeners.append(metrics.observe_rebound)
+        # 采样与清理结果写入磁盘日志，关闭时落盘
+        self.journal = journal
+        if journal is not None:
+            self.sampler.add_listener(journal.append_sample)
+            engine.clean_listeners.append(journal.append_clean)
+        self.pressure_source = pressure_source
+        self.pressure_gap = pressure_gap
+        # 按进程的内存排行，每 index_interval 秒在线程池中增量刷新
+        self.process_index = process_index
+        self.index_interval = index_interval
+        # 每次刷新排行后用全部进程的工作集更新泄漏检测
+        self.leak_detector = leak_detector
+        # 为 False 且压力事件可用时不定时采样，空闲期间事件循环完全阻塞
+        self.always_sample = always_sample
+        # 清理项目 -> 超时秒数；超时的项目在线程中继续运行到返回，但不再等待其结果
+        self.strategy_timeouts = dict(strategy_timeouts or {})
+        self.default_timeout = default_timeout
+        self.max_concurrent_cleans = max_concurrent_cleans
+        self.restart_delay = restart_delay
+        self.shutdown_timeout = shutdown_timeout
+        self.on_event = on_event
+        # 自动清理的项目，None 表示关闭；由界面线程整体替换，不做原地修改
+        self.auto_options = None
+        # 编译后的策略配置，设置后自动清理由规则决定项目与进程挑选，可随时整体替换
+        self.policy = policy
+        # 压力事件触发后的 pressure_hold 秒内，规则中的 pressure 条件视为满足
+        self.pressure_hold = pressure_hold
+        self._last_pressure = None
+        # 未设置 on_event 时事件放入该队列，供界面线程定时取出：(事件名, 数据)
+        self.events = queue.Queue()
+
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="runtime")
+        # 按进程清理共用一个长期存在的线程池
+        self.trim_executor = ThreadPoolExecutor(
+            max_workers=engine.trim_scheduler.max_workers, thread_name_prefix="trim"
+        )
+        engine.trim_scheduler.executor = self.trim_executor
+
+        self._loop = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._stopping = None
+        self._clean_slots = None
+        self._sample_lock = None
+        self._pressure_failed = None
+        self._cleans = set()
+
+    # ---- 供其他线程调用的接口 ----
+
+    def start(self):
+        """在后台线程中运行事件循环，返回时循环已就绪"""
+        self._thread = threading.Thread(target=asyncio.run, args=(self.run(),),
+                                        name="cleaner-runtime", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def stop(self, timeout=None):
+        """请求关闭并等待事件循环退出"""
+        if self._loop is not None and not self._loop.is_closed():
+            try:
+                self._loop.call_soon_threadsafe(self.request_stop)
+            except RuntimeError:
+                pass
+        if self._thread is not None:
+            self._thread.join(timeout if timeout is not None else self.shutdown_timeout + 1)
+
+    def request_clean(self, options, trigger="manual"):
+        """手动清理：已有清理在运行时返回 None，否则返回 concurrent.futures.Future"""
+        if not self.scheduler.try_begin():
+            return None
+        return asyncio.run_coroutine_threadsafe(self._clean(tuple(options), trigger), self._loop)
+
+    # ---- 事件循环内部 ----
+
+    def request_stop(self):
+        if self._stopping is not None:
+            self._stopping.set()
+
+    def _emit(self, event, **data):
+        if self.on_event is not None:
+            self.on_event(event, data)
+        else:
+            self.events.put((event, data))
+
+    async def _blocking(self, func, *args):
+        return await self._loop.run_in_executor(self.executor, func, *args)
+
+    async def _sample(self):
+        # 采样历史与日志只允许一个写入者，定时采样与压力事件的采样依次进行
+        async with self._sample_lock:
+            return await self._blocking(self.sampler.sample)
+
+    async def _in_daemon_thread(self, func):
+        # 可能无限期阻塞的调用放在守护线程中，线程池在解释器退出时会等待其线程结束
+        future = self._loop.create_future()
+
+        def resolve(setter, value):
+            if not future.done():
+                setter(value)
+
+        def target():
+            try:
+                outcome = (future.set_result, func())
+            except Exception as e:
+                outcome = (future.set_exception, e)
+            try:
+                self._loop.call_soon_threadsafe(resolve, *outcome)
+            except RuntimeError:
+                # 事件循环已关闭
+                pass
+
+        threading.Thread(target=target, name="pressure-wait", daemon=True).start()
+        return await future
+
+    async def run(self):
+        """运行全部任务直到 request_stop()"""
+        self._loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+        self._pressure_failed = asyncio.Event()
+        self._clean_slots = asyncio.Semaphore(self.max_concurrent_cleans)
+        self._sample_lock = asyncio.Lock()
+        if self.pressure_source is None:
+            self._pressure_failed.set()
+
+        tasks = [asyncio.create_task(self._supervise("sampler", self._sample_loop))]
+        if self.pressure_source is not None:
+            tasks.append(asyncio.create_task(self._supervise("pressure", self._pressure_loop)))
+        if self.exporter is not None:
+            tasks.append(asyncio.create_task(self._supervise("metrics", self._metrics_task)))
+        if self.process_index is not None:
+            tasks.append(asyncio.create_task(self._supervise("processes", self._index_loop)))
+        self._ready.set()
+
+        try:
+            await self._stopping.wait()
+        finally:
+            await self._shutdown(tasks)
+
+    async def _shutdown(self, tasks):
+        # 先让正在进行的清理在限定时间内结束，超时则取消
+        if self._cleans:
+            done, pending = await asyncio.wait(set(self._cleans), timeout=self.shutdown_timeout)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        if self.pressure_source is not None:
+            self.pressure_source.interrupt()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self.pressure_source is not None:
+            self.pressure_source.close()
+        for executor in (self.executor, self.trim_executor):
+            executor.shutdown(wait=False, cancel_futures=True)
+        self.engine.trim_scheduler.executor = None
+        if self.journal is not None:
+            self.journal.close()
+        self.engine.backend.close()
+        self._emit("stopped")
+
+    async def _supervise(self, name, factory):
+        """任务异常退出时记录并在延迟后重启，正常返回则不再重启"""
+        while not self._stopping.is_set():
+            try:
+                await factory()
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._emit("error", message=f"{name} 任务异常: {str(e)}，{self.restart_delay:.0f}s 后重启")
+                await asyncio.sleep(self.restart_delay)
+
+    async def _sample_loop(self):
+        while not self._stopping.is_set():
+            if not self.always_sample and not self._pressure_failed.is_set():
+                # 只依赖压力事件：等到事件源失效才开始定时采样
+                await self._pressure_failed.wait()
+            started = time.monotonic()
+            snapshot = await self._sample()
+
+            # 压力事件不可用时按使用率检查自动清理
+            options = self.auto_options
+            policy = self.policy
+            if options and policy is not None:
+                self._apply_policy(policy, snapshot, "threshold")
+            elif (options and self._pressure_failed.is_set() and
+                    self.scheduler.should_clean(snapshot.physical.percent)):
+                self._spawn_clean(options, "threshold")
+
+            await asyncio.sleep(max(0.0, self.sampler.interval - (time.monotonic() - started)))
+
+    async def _pressure_loop(self):
+        while not self._stopping.is_set():
+            try:
+                fired = await self._in_daemon_thread(self.pressure_source.wait)
+            except OSError as e:
+                self._emit("error", message=f"内存压力事件失效: {str(e)}，改用定时检查")
+                self._pressure_failed.set()
+                return
+            options = self.auto_options
+            policy = self.policy
+            if fired:
+                self._last_pressure = time.monotonic()
+            if fired and options and policy is not None:
+                snapshot = await self._sample()
+                self._apply_policy(policy, snapshot, "pressure")
+            elif fired and options and self.scheduler.on_pressure():
+                self._spawn_clean(options, "pressure")
+            if fired:
+                await asyncio.sleep(self.pressure_gap)
+
+    async def _index_loop(self):
+        while not self._stopping.is_set():
+            started = time.monotonic()
+            stats, flagged = await self._blocking(self._refresh_processes)
+            self._emit("processes", stats=stats)
+            for suspect in flagged or ():
+                self._emit("leak", suspect=suspect)
+            await asyncio.sleep(max(0.0, self.index_interval - (time.monotonic() - started)))
+
+    def _refresh_processes(self):
+        stats = self.process_index.refresh()
+        if self.leak_detector is None:
+            return stats, None
+        self.leak_detector.forget(self.process_index.last_removed)
+        flagged = self.leak_detector.observe(self.process_index.rows)
+        if flagged is not None and self.metrics is not None:
+            self.metrics.observe_leaks(self.leak_detector.current_suspects())
+        return stats, flagged
+
+    async def _metrics_task(self):
+        try:
+            await self._stopping.wait()
+        finally:
+            await self._blocking(self.exporter.stop)
+
+    def _apply_policy(self, policy, snapshot, trigger):
+        """按规则判断是否清理；没有规则匹配时重新武装调度器"""
+        pressure = (self._last_pressure is not None and
+                    time.monotonic() - self._last_pressure < self.pressure_hold)
+        decision = policy.evaluate(make_context(snapshot, pressure))
+        if decision is None:
+            self.scheduler.rearm()
+            return
+        if self.scheduler.try_auto():
+            policy.fired(decision.rule)
+            self._spawn_clean(decision.strategies, trigger, decision.selector, decision.rule)
+
+    def _spawn_clean(self, options, trigger, selector=None, rule=None):
+        # 调用前必须已通过调度器获得执行权，_clean 结束时调用 finish()
+        task = asyncio.create_task(self._clean(tuple(options), trigger, selector, rule))
+        self._cleans.add(task)
+        task.add_done_callback(self._cleans.discard)
+        return task
+
+    async def _run_strategy(self, name, timeout):
+        """在线程池中执行一个清理项目，超时或被取消时停止剩余进程，并等到调用真正返回"""
+        future = self._loop.run_in_executor(self.executor, self.engine.run_strategy, name)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            self.engine.log(f"✗ {STRATEGY_LABELS[name]}清理超过 {timeout:g}s，停止剩余进程")
+            self.engine.trim_scheduler.stop()
+            if await self._settle(future):
+                raise asyncio.CancelledError
+            return False
+        except asyncio.CancelledError:
+            # 线程无法中断：等当前调用返回后再释放清理槽位，避免下一次清理与它并发
+            self.engine.trim_scheduler.stop()
+            await self._settle(future)
+            raise
+
+    @staticmethod
+    async def _settle(future):
+        """等待线程池中的调用结束，期间收到的取消推迟到之后，返回是否收到过取消"""
+        cancelled = False
+        while not future.done():
+            try:
+                await asyncio.shield(future)
+            except asyncio.CancelledError:
+                cancelled = True
+            except Exception:
+                break
+        return cancelled
+
+    async def _clean(self, options, trigger, selector=None, rule=None):
+        """依次执行清理项目，每个项目单独限时"""
+        task = asyncio.current_task()
+        self._cleans.add(task)
+        freed_bytes = 0
+        try:
+            async with self._clean_slots:
+                latest = self.sampler.latest
+                self._emit("clean_started", trigger=trigger, options=list(options), rule=rule)
+                state = await self._blocking(
+                    self.engine.begin_clean, trigger,
+                    latest.physical.percent if latest is not None else None, selector, rule
+                )
+                strategy_results = {}
+                for name in STRATEGIES:
+                    if name not in options:
+                        continue
+                    timeout = self.strategy_timeouts.get(name, self.default_timeout)
+                    strategy_results[name] = await self._run_strategy(name, timeout)
+                result = await self._blocking(self.engine.finish_clean, state, strategy_results)
+                freed_bytes = result['freed_bytes']
+                self._emit("clean_done", result=result)
+                return result
+        except asyncio.CancelledError:
+            self._emit("clean_cancelled", trigger=trigger)
+            raise
+        except Exception as e:
+            self._emit("clean_error", message=str(e))
+        finally:
+            self._cleans.discard(task)
+            self.scheduler.finish(freed_bytes)
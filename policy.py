@@ -0,0 +1,214 @@
+"""清理策略配置：JSON / TOML 描述的规则在加载时编译为判定函数，每次采样按顺序求值，第一条匹配的规则生效
+
+配置示例（TOML）::
+
+    name = "server"
+
+    [[rules]]
+    name = "night"
+    when = { hours = "01:00-05:00", memory_percent = ">= 70" }
+    strategies = ["working_set", "system_working_set", "standby_list", "virtual_memory"]
+
+    [[rules]]
+    name = "pressure"
+    when = { pressure = true, swap_percent = "< 60" }
+    strategies = ["working_set", "standby_list"]
+    trim = { top_n = 20, deny = ["postgres"] }
+    cooldown = 120
+"""
+import json
+import operator
+import os
+import time
+from collections import namedtuple
+
+from engine import DEFAULT_OPTIONS, STRATEGIES
+from selection import ProcessSelector
+
+PROFILE_SUFFIXES = (".json", ".toml")
+DAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+OPERATORS = {
+    ">=": operator.ge, "<=": operator.le, "==": operator.eq, "!=": operator.ne,
+    ">": operator.gt, "<": operator.lt,
+}
+# 条件名 -> (上下文字段, 配置值换算为字段单位的系数)
+NUMERIC_CONDITIONS = {
+    "memory_percent": ("memory_percent", 1),
+    "swap_percent": ("swap_percent", 1),
+    "available_mb": ("available", 1024 ** 2),
+}
+TRIM_OPTIONS = ("top_n", "target_available_mb", "allow", "deny")
+
+PolicyContext = namedtuple("PolicyContext", [
+    "memory_percent", "available", "swap_percent", "pressure", "minute", "weekday",
+])
+Decision = namedtuple("Decision", ["rule", "strategies", "selector"])
+
+
+def make_context(snapshot, pressure=False, now=None):
+    """由 MemorySnapshot 构造规则求值的上下文"""
+    local = time.localtime(now)
+    physical = snapshot.physical
+    return PolicyContext(physical.percent, physical.total - physical.used, snapshot.virtual.percent,
+                         pressure, local.tm_hour * 60 + local.tm_min, local.tm_wday)
+
+
+def _compare(text):
+    # "> 85"、">=85" 或数字（等同于 >=）
+    if isinstance(text, (int, float)) and not isinstance(text, bool):
+        return operator.ge, float(text)
+    text = str(text).strip()
+    for symbol in sorted(OPERATORS, key=len, reverse=True):
+        if text.startswith(symbol):
+            return OPERATORS[symbol], float(text[len(symbol):])
+    return operator.ge, float(text)
+
+
+def _minutes(text):
+    hours, _, minutes = text.strip().partition(":")
+    return int(hours) * 60 + int(minutes or 0)
+
+
+def _compile_hours(value):
+    windows = []
+    for window in [value] if isinstance(value, str) else value:
+        start, _, end = window.partition("-")
+        windows.append((_minutes(start), _minutes(end)))
+
+    def predicate(context):
+        for start, end in windows:
+            # 结束早于开始的窗口跨越午夜
+            if start <= end:
+                if start <= context.minute < end:
+                    return True
+            elif context.minute >= start or context.minute < end:
+                return True
+        return False
+    return predicate
+
+
+def compile_condition(name, value):
+    """把一个条件编译为 context -> bool 的函数"""
+    if name in NUMERIC_CONDITIONS:
+        field, scale = NUMERIC_CONDITIONS[name]
+        compare, threshold = _compare(value)
+        threshold *= scale
+        index = PolicyContext._fields.index(field)
+        return lambda context: compare(context[index], threshold)
+    if name == "pressure":
+        expected = bool(value)
+        return lambda context: context.pressure == expected
+    if name == "hours":
+        return _compile_hours(value)
+    if name == "days":
+        days = {DAYS.index(day.lower()[:3]) for day in ([value] if isinstance(value, str) else value)}
+        return lambda context: context.weekday in days
+    raise ValueError(f"未知的条件: {name}")
+
+
+class Rule:
+    def __init__(self, data, base_selector=None, index=0):
+        self.name = data.get("name", f"rule-{index + 1}")
+        self.predicates = tuple(compile_condition(name, value)
+                                for name, value in data.get("when", {}).items())
+        self.strategies = tuple(data.get("strategies", DEFAULT_OPTIONS))
+        unknown = set(self.strategies) - set(STRATEGIES)
+        if unknown:
+            raise ValueError(f"规则 {self.name}: 未知的清理项目 {', '.join(sorted(unknown))}")
+        # 同一规则两次触发的最小间隔（秒），在调度器的冷却之外额外生效
+        self.cooldown = float(data.get("cooldown", 0))
+        self.last_fired = None
+        self.selector = self._build_selector(data.get("trim", {}), base_selector)
+
+    def _build_selector(self, trim, base_selector):
+        unknown = set(trim) - set(TRIM_OPTIONS)
+        if unknown:
+            raise ValueError(f"规则 {self.name}: 未知的清理目标 {', '.join(sorted(unknown))}")
+        if not trim:
+            return None
+        target = trim.get("target_available_mb")
+        selector = ProcessSelector(
+            top_n=trim.get("top_n"),
+            target_available=target * 1024 ** 2 if target else None,
+            allow=trim.get("allow", ()), deny=trim.get("deny", ()),
+        )
+        if base_selector is not None:
+            # 沿用回弹跟踪、泄漏检测等排除项
+            selector.exclusions = base_selector.exclusions
+        return selector
+
+    def matches(self, context):
+        for predicate in self.predicates:
+            if not predicate(context):
+                return False
+        return True
+
+
+class Policy:
+    """编译后的配置，evaluate() 在采样线程中调用"""
+
+    def __init__(self, name, rules, source=None, clock=time.monotonic):
+        self.name = name
+        self.rules = rules
+        self.source = source
+        self.clock = clock
+
+    def evaluate(self, context):
+        """返回第一条匹配且不在冷却中的规则对应的 Decision，都不匹配时返回 None"""
+        now = self.clock()
+        for rule in self.rules:
+            if not rule.matches(context):
+                continue
+            if rule.last_fired is not None and now - rule.last_fired < rule.cooldown:
+                continue
+            return Decision(rule.name, rule.strategies, rule.selector)
+        return None
+
+    def fired(self, rule_name):
+        """清理实际开始后记录规则的触发时间"""
+        for rule in self.rules:
+            if rule.name == rule_name:
+                rule.last_fired = self.clock()
+
+
+def compile_profile(data, base_selector=None, source=None):
+    """编译配置字典，格式错误时抛出 ValueError"""
+    rules = data.get("rules")
+    if not rules:
+        raise ValueError("配置中没有规则")
+    name = data.get("name") or (os.path.splitext(os.path.basename(source))[0] if source else "profile")
+    try:
+        compiled = [Rule(rule, base_selector, i) for i, rule in enumerate(rules)]
+    except (TypeError, AttributeError) as e:
+        raise ValueError(f"配置格式错误: {str(e)}")
+    return Policy(name, compiled, source=source)
+
+
+def load_profile(path, base_selector=None):
+    """读取并编译配置文件，格式按扩展名判断；格式错误时抛出 ValueError"""
+    if path.endswith(".toml"):
+        try:
+            import tomllib
+        except ImportError:
+            raise ValueError("读取 TOML 配置需要 Python 3.11 或更高版本")
+        with open(path, "rb") as f:
+            try:
+                data = tomllib.load(f)
+            except tomllib.TOMLDecodeError as e:
+                raise ValueError(f"{path}: {str(e)}")
+    else:
+        with open(path, encoding="utf-8") as f:
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}: {str(e)}")
+    return compile_profile(data, base_selector, source=path)
+
+
+def list_profiles(directory):
+    """目录中的配置文件，按文件名排序"""
+    try:
+        names = sorted(os.listdir(directory))
+    except OSError:
+        return []
+    return [os.path.join(directory, name) for name in names if name.endswith(PROFILE_SUFFIXES)]
@@ -0,0 +1,115 @@
+"""内存压力事件：Linux 使用 PSI 触发器，Windows 使用内存资源通知，空闲时线程完全阻塞"""
+import errno
+import os
+import sys
+import threading
+
+PSI_MEMORY = "/proc/pressure/memory"
+# 默认在 2 秒窗口内累计 200ms 的部分停顿时触发；
+# 没有 CAP_SYS_RESOURCE 的进程只能使用 2 秒整数倍的窗口
+DEFAULT_STALL_MS = 200
+DEFAULT_WINDOW_MS = 2000
+UNPRIVILEGED_WINDOW_MS = 2000
+
+
+class PSITrigger:
+    """/proc/pressure/memory 触发器，停顿超过阈值时 poll() 返回 POLLPRI"""
+
+    name = "psi"
+
+    def __init__(self, path=PSI_MEMORY, kind="some", stall_ms=DEFAULT_STALL_MS,
+                 window_ms=DEFAULT_WINDOW_MS):
+        import select
+        self.select = select
+        self.fd = os.open(path, os.O_RDWR | os.O_NONBLOCK)
+        try:
+            try:
+                self._register(kind, stall_ms, window_ms)
+            except OSError as e:
+                if e.errno != errno.EINVAL or window_ms % UNPRIVILEGED_WINDOW_MS == 0:
+                    raise
+                # 非特权进程：把窗口向上取整到 2 秒的整数倍，停顿阈值按比例放大
+                rounded = -(-window_ms // UNPRIVILEGED_WINDOW_MS) * UNPRIVILEGED_WINDOW_MS
+                self._register(kind, stall_ms * rounded // window_ms, rounded)
+        except OSError:
+            os.close(self.fd)
+            raise
+        # 管道用于在 stop() 时唤醒阻塞中的 poll()
+        self._wake_read, self._wake_write = os.pipe()
+        self.poller = select.poll()
+        self.poller.register(self.fd, select.POLLPRI)
+        self.poller.register(self._wake_read, select.POLLIN)
+
+    def _register(self, kind, stall_ms, window_ms):
+        os.write(self.fd, f"{kind} {stall_ms * 1000} {window_ms * 1000}\0".encode())
+        self.stall_ms = stall_ms
+        self.window_ms = window_ms
+
+    def wait(self, timeout=None):
+        """阻塞到触发器触发（返回 True）、被唤醒或超时（返回 False）"""
+        events = self.poller.poll(None if timeout is None else timeout * 1000)
+        for fd, event in events:
+            if fd == self._wake_read:
+                os.read(self._wake_read, 64)
+                return False
+            if event & self.select.POLLERR:
+                raise OSError("PSI 触发器已失效")
+            if event & self.select.POLLPRI:
+                return True
+        return False
+
+    def interrupt(self):
+        os.write(self._wake_write, b"x")
+
+    def close(self):
+        for fd in (self.fd, self._wake_read, self._wake_write):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+class MemoryResourceNotification:
+    """Windows 低内存通知：系统可用内存不足时事件对象进入触发状态"""
+
+    name = "memory_resource_notification"
+
+    def __init__(self, winapi=None):
+        if winapi is None:
+            import winapi
+        self.winapi = winapi
+        self.handle = winapi.CreateMemoryResourceNotification(winapi.LowMemoryResourceNotification)
+        if not self.handle:
+            raise OSError(f"CreateMemoryResourceNotification 失败，错误代码: {winapi.last_error()}")
+        self._interrupted = threading.Event()
+
+    def wait(self, timeout=None):
+        # 事件对象无法与 stop() 共同等待，按 1 秒分段等待以便及时退出
+        remaining = timeout
+        while not self._interrupted.is_set():
+            step = 1.0 if remaining is None else min(1.0, remaining)
+            if self.winapi.WaitForSingleObject(self.handle, int(step * 1000)) == self.winapi.WAIT_OBJECT_0:
+                return True
+            if remaining is not None:
+                remaining -= step
+                if remaining <= 0:
+                    break
+        return False
+
+    def interrupt(self):
+        self._interrupted.set()
+
+    def close(self):
+        self.winapi.CloseHandle(self.handle)
+
+
+def create_pressure_source(stall_ms=DEFAULT_STALL_MS, window_ms=DEFAULT_WINDOW_MS):
+    """按平台创建压力事件源，不支持或无权限时返回 None，调用方应回退到定时检查"""
+    try:
+        if sys.platform.startswith("linux") and os.path.exists(PSI_MEMORY):
+            return PSITrigger(stall_ms=stall_ms, window_ms=window_ms)
+        if sys.platform == "win32":
+            return MemoryResourceNotification()
+    except OSError:
+        pass
+    return None
@@ -0,0 +1,82 @@
+"""按进程的内存排行：增量维护每个 pid 的工作集、私有内存与交换区，只重新读取有活动的进程"""
+import heapq
+import time
+from collections import namedtuple
+from operator import attrgetter
+
+import psutil
+
+from registry import ProcessRegistry
+
+ProcessStat = namedtuple("ProcessStat", ["pid", "name", "rss", "private", "swap"])
+
+# 可用于排序的指标
+SORT_KEYS = ("rss", "private", "swap")
+
+
+class ProcessIndex:
+    def __init__(self, backend, full_refresh_every=30, clock=time.perf_counter):
+        self.backend = backend
+        # 进程不运行时页面仍可能被内核换出，每隔若干次刷新全部重新读取
+        self.full_refresh_every = full_refresh_every
+        self.clock = clock
+        self._refreshes = 0
+        # 独立的进程表，不与清理引擎共享，两者可能在不同线程中刷新
+        self.registry = ProcessRegistry(backend)
+        # pid -> ProcessStat，条目不可变，更新时整体替换
+        self.entries = {}
+        # pid -> 上一次读取内存时的活动标记
+        self._activity = {}
+        # 最近一次刷新后的全部条目，供其他线程读取
+        self.rows = ()
+        # 最近一次刷新中退出或被复用的 pid
+        self.last_removed = ()
+        self.last_stats = None
+
+    def __len__(self):
+        return len(self.entries)
+
+    def refresh(self):
+        """刷新进程表，只为新进程与有活动的进程读取内存，返回本次的枚举开销"""
+        started = self.clock()
+        changes = self.registry.refresh()
+        for entry in changes["removed"]:
+            self.entries.pop(entry["pid"], None)
+            self._activity.pop(entry["pid"], None)
+        self.last_removed = tuple(entry["pid"] for entry in changes["removed"])
+
+        full = self._refreshes % self.full_refresh_every == 0
+        self._refreshes += 1
+        updated = skipped = 0
+        for pid, name in self.registry.processes():
+            try:
+                activity = self.backend.process_activity(pid)
+                if (not full and activity is not None and pid in self.entries and
+                        self._activity.get(pid) == activity):
+                    skipped += 1
+                    continue
+                memory = self.backend.process_memory(pid)
+            except (psutil.Error, OSError):
+                continue
+            self.entries[pid] = ProcessStat(pid, name, memory['rss'], memory['private'], memory['swap'])
+            self._activity[pid] = activity
+            updated += 1
+
+        self.rows = tuple(self.entries.values())
+        self.last_stats = {
+            'total': len(self.entries),
+            'added': len(changes["added"]),
+            'removed': len(changes["removed"]),
+            'updated': updated,
+            'skipped': skipped,
+            'elapsed': self.clock() - started,
+        }
+        return self.last_stats
+
+    def top(self, k=10, key="rss"):
+        """按指标取前 k 个进程，使用大小为 k 的堆，复杂度 O(n log k)"""
+        return heapq.nlargest(k, self.rows, key=attrgetter(key))
+
+    def sorted_rows(self, key="rss"):
+        """按指标降序排列的全部进程，供列表控件分页显示"""
+        return sorted(self.rows, key=attrgetter(key), reverse=True)
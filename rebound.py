@@ -0,0 +1,163 @@
+"""清理后的缺页回弹跟踪：评估一次清理是否值得，并让立即回弹的进程下次被跳过"""
+import mmap
+import threading
+import time
+
+import psutil
+
+PAGE_SIZE = mmap.PAGESIZE
+# 缺页回弹只能按进程观察，回弹代价计入逐进程清理的项目
+PROCESS_STRATEGIES = ("standby_list",)
+
+
+class ReboundTracker:
+    def __init__(self, backend, window=30.0, interval=1.0, major_fault_cost=8,
+                 skip_threshold=0.2, skip_ttl=600.0, smoothing=0.5,
+                 clock=time.monotonic, sleep=time.sleep, on_complete=None):
+        self.backend = backend
+        # 清理后观察的时长与采样间隔（秒）
+        self.window = window
+        self.interval = interval
+        # 一次硬缺页（需要磁盘 I/O）折算为多少个页面的代价
+        self.major_fault_cost = major_fault_cost
+        # 保留比例低于该值的进程在 skip_ttl 秒内不再清理
+        self.skip_threshold = skip_threshold
+        self.skip_ttl = skip_ttl
+        # 指数平滑系数，越大越看重最近一次的结果
+        self.smoothing = smoothing
+        self.clock = clock
+        self.sleep = sleep
+        self.on_complete = on_complete
+
+        self._lock = threading.Lock()
+        # pid -> {"score": 平滑后的保留比例, "updated": 更新时刻}
+        self.process_scores = {}
+        # 清理项目 -> {"net_bytes": 平滑后的净收益字节数, "runs": 次数}
+        self.strategy_scores = {}
+        self.last_report = None
+
+    def snapshot(self, pids):
+        """采集进程的工作集与累计缺页次数，已退出的进程被忽略"""
+        state = {}
+        for pid in pids:
+            try:
+                faults, major = self.backend.process_faults(pid)
+                info = self.backend.process_info(pid)
+            except (psutil.Error, OSError):
+                continue
+            if info is None:
+                continue
+            state[pid] = {"rss": info["rss"], "faults": faults, "major_faults": major}
+        return state
+
+    def track(self, baseline, strategies, freed_bytes, background=True):
+        """开始观察一次清理的回弹；background 为 False 时同步执行并返回报告
+
+        strategies 为 清理项目 -> 该项目执行前后可用内存的增量（字节）。
+        """
+        if not background:
+            return self.measure(baseline, strategies, freed_bytes)
+        thread = threading.Thread(
+            target=self.measure, args=(baseline, strategies, freed_bytes),
+            name="rebound-tracker", daemon=True
+        )
+        thread.start()
+        return thread
+
+    def measure(self, baseline, strategies, freed_bytes):
+        """在观察窗口内采样，记录每个进程工作集回涨的峰值"""
+        pids = list(baseline)
+        after = self.snapshot(pids)
+        peak = {pid: state["rss"] for pid, state in after.items()}
+
+        deadline = self.clock() + self.window
+        latest = after
+        while self.clock() < deadline:
+            self.sleep(min(self.interval, max(0.0, deadline - self.clock())))
+            latest = self.snapshot(peak)
+            for pid, state in latest.items():
+                if state["rss"] > peak[pid]:
+                    peak[pid] = state["rss"]
+
+        report = self.score(baseline, after, latest, peak, strategies, freed_bytes)
+        if self.on_complete is not None:
+            self.on_complete(report)
+        return report
+
+    def score(self, baseline, after, latest, peak, strategies, freed_bytes):
+        """计算每个进程、每个清理项目的净收益与本次清理的总净收益"""
+        processes = {}
+        total_rebound = 0
+        total_cost = 0
+        for pid, before in baseline.items():
+            if pid not in after or pid not in latest:
+                continue
+            reclaimed = max(0, before["rss"] - after[pid]["rss"])
+            rebound = max(0, peak[pid] - after[pid]["rss"])
+            faults = latest[pid]["faults"] - after[pid]["faults"]
+            major = latest[pid]["major_faults"] - after[pid]["major_faults"]
+            cost = rebound + major * PAGE_SIZE * self.major_fault_cost
+            net = reclaimed - cost
+            processes[pid] = {
+                "reclaimed": reclaimed,
+                "rebound": rebound,
+                "faults": faults,
+                "major_faults": major,
+                "net_bytes": net,
+                # 保留比例：1 表示完全没有回弹，0 及以下表示清理得不偿失
+                "score": net / reclaimed if reclaimed else 0.0,
+            }
+            total_rebound += rebound
+            total_cost += cost
+
+        net_bytes = freed_bytes - total_cost
+        # 项目的净收益 = 该项目释放的内存 - 归因于它的回弹与硬缺页代价
+        strategy_net = {
+            name: freed - (total_cost if name in PROCESS_STRATEGIES else 0)
+            for name, freed in strategies.items()
+        }
+        now = self.clock()
+        with self._lock:
+            for pid, result in processes.items():
+                if result["reclaimed"] == 0:
+                    continue
+                previous = self.process_scores.get(pid)
+                value = result["score"]
+                if previous is not None:
+                    value = self.smoothing * value + (1 - self.smoothing) * previous["score"]
+                self.process_scores[pid] = {"score": value, "updated": now}
+
+            for name, net in strategy_net.items():
+                previous = self.strategy_scores.get(name)
+                if previous is None:
+                    self.strategy_scores[name] = {"net_bytes": net, "runs": 1}
+                else:
+                    previous["net_bytes"] = (self.smoothing * net +
+                                             (1 - self.smoothing) * previous["net_bytes"])
+                    previous["runs"] += 1
+
+            report = {
+                "strategies": list(strategies),
+                "freed_bytes": freed_bytes,
+                "rebound_bytes": total_rebound,
+                "net_bytes": net_bytes,
+                "strategy_net_bytes": strategy_net,
+                "strategy_scores": {name: dict(score) for name, score in self.strategy_scores.items()},
+                "window": self.window,
+                "processes": processes,
+            }
+            self.last_report = report
+        return report
+
+    def skip_pids(self):
+        """回弹严重、近期不应再清理的进程"""
+        now = self.clock()
+        skipped = set()
+        with self._lock:
+            for pid, entry in list(self.process_scores.items()):
+                if now - entry["updated"] > self.skip_ttl:
+                    # 过期后重新给进程一次机会
+                    del self.process_scores[pid]
+                elif entry["score"] < self.skip_threshold:
+                    skipped.add(pid)
+        return skipped
@@ -0,0 +1,75 @@
+"""增量进程表：在多次清理之间缓存进程信息，只处理新增与退出的进程"""
+import psutil
+
+
+class ProcessRegistry:
+    def __init__(self, backend, on_evict=None):
+        self.backend = backend
+        # (pid, create_time) -> {"pid", "name", "create_time"}
+        self.entries = {}
+        # pid -> (pid, create_time)，用于快速判断 pid 是否已登记
+        self._by_pid = {}
+        # pid -> 上一次刷新时 backend.pid_tokens() 给出的标记
+        self._tokens = {}
+        # 进程退出或 pid 被复用时回调，例如关闭缓存的句柄
+        self.on_evict = on_evict
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _evict(self, key):
+        entry = self.entries.pop(key)
+        self._by_pid.pop(key[0], None)
+        self._tokens.pop(key[0], None)
+        if self.on_evict is not None:
+            self.on_evict(entry)
+        return entry
+
+    def refresh(self):
+        """与上一次的进程表比较，返回新增与移除的进程
+
+        只对新出现的 pid 查询名称。已登记的 pid 先比较列表附带的标记，标记未变
+        直接跳过，每次刷新的开销只与进程的变动量有关；标记改变（或后端给不出
+        标记）时才重新读取创建时间，与登记时不同说明 pid 已被新进程复用，
+        旧条目作为移除、新进程作为新增返回。
+        """
+        current = self.backend.pid_tokens()
+        added = []
+        removed = []
+
+        # 移除已退出的进程
+        for pid in list(self._by_pid):
+            if pid not in current:
+                removed.append(self._evict(self._by_pid[pid]))
+
+        for pid, token in current.items():
+            key = self._by_pid.get(pid)
+            if key is not None and token is not None and self._tokens.get(pid) == token:
+                continue
+            try:
+                if key is not None:
+                    if self.backend.process_start_time(pid) == key[1]:
+                        self._tokens[pid] = token
+                        continue
+                    # pid 已被新进程复用
+                    removed.append(self._evict(key))
+                name, create_time = self.backend.process_identity(pid)
+            except (psutil.Error, OSError):
+                continue
+
+            key = (pid, create_time)
+            entry = {"pid": pid, "name": name, "create_time": create_time}
+            self.entries[key] = entry
+            self._by_pid[pid] = key
+            self._tokens[pid] = token
+            added.append(entry)
+
+        return {"added": added, "removed": removed, "total": len(self.entries)}
+
+    def processes(self):
+        """以 (pid, name) 形式返回当前登记的进程"""
+        return [(entry["pid"], entry["name"]) for entry in self.entries.values()]
+
+    def get(self, pid):
+        key = self._by_pid.get(pid)
+        return self.entries.get(key) if key is not None else None
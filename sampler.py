@@ -0,0 +1,73 @@
+"""内存采样：采集内存信息并写入历史，通过队列发布不可变快照，由编排核心定时调用"""
+import queue
+import time
+from collections import namedtuple
+
+CARD_KEYS = ("physical", "virtual", "system", "working_set")
+
+CardStat = namedtuple("CardStat", ["used", "total", "percent"])
+MemorySnapshot = namedtuple(
+    "MemorySnapshot", ["timestamp", "latency"] + list(CARD_KEYS)
+)
+
+
+def make_snapshot(timestamp, latency, memory_info):
+    """把 get_detailed_memory_info 的结果转换为不可变快照"""
+    cards = [
+        CardStat(memory_info[key]['used'], memory_info[key]['total'], memory_info[key]['percent'])
+        for key in CARD_KEYS
+    ]
+    return MemorySnapshot(timestamp, latency, *cards)
+
+
+class MemorySampler:
+    def __init__(self, engine, interval=1.0, history=None, maxsize=8):
+        self.engine = engine
+        # 调用方的采样间隔（秒）
+        self.interval = interval
+        self.history = history
+        # 消费方只关心最新快照，队列满时丢弃最旧的
+        self.snapshots = queue.Queue(maxsize=maxsize)
+        # 每个快照都会在采样线程中回调的监听器
+        self.listeners = []
+        self.latest = None
+
+    def add_listener(self, callback):
+        self.listeners.append(callback)
+
+    def sample(self):
+        """采集一次并发布快照"""
+        started = time.perf_counter()
+        memory_info = self.engine.get_detailed_memory_info()
+        timestamp = time.time()
+        snapshot = make_snapshot(timestamp, time.perf_counter() - started, memory_info)
+
+        # 历史数据只有一个写入方，调用方须保证 sample() 不会并发执行
+        if self.history is not None:
+            self.history.record(timestamp, memory_info)
+
+        self.latest = snapshot
+        self._publish(snapshot)
+        for callback in self.listeners:
+            callback(snapshot)
+        return snapshot
+
+    def _publish(self, snapshot):
+        while True:
+            try:
+                self.snapshots.put_nowait(snapshot)
+                return
+            except queue.Full:
+                try:
+                    self.snapshots.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def drain(self):
+        """取出队列中的全部快照，返回最新的一个（没有则返回 None）"""
+        snapshot = None
+        while True:
+            try:
+                snapshot = self.snapshots.get_nowait()
+            except queue.Empty:
+                return snapshot
@@ -0,0 +1,123 @@
+"""自动清理调度：高/低水位滞回、最小间隔、效果不佳时指数退避，以及同一时刻只运行一次清理"""
+import threading
+import time
+
+# 界面与命令行共用的自动清理默认值：使用率阈值(%)与冷却时间(秒)
+DEFAULT_THRESHOLD = 80
+DEFAULT_INTERVAL = 30
+
+
+class AutoCleanScheduler:
+    def __init__(self, high_watermark=80.0, low_watermark=None, min_interval=30.0,
+                 min_freed=64 * 1024 ** 2, backoff_factor=2.0, max_interval=600.0,
+                 clock=time.monotonic, memory_source=None):
+        self.high_watermark = high_watermark
+        # 默认低水位比高水位低 10 个百分点
+        self.low_watermark = low_watermark if low_watermark is not None else high_watermark - 10
+        self.min_interval = min_interval
+        # 单次释放少于该字节数视为效果不佳，下一次清理的等待时间加倍
+        self.min_freed = min_freed
+        self.backoff_factor = backoff_factor
+        self.max_interval = max_interval
+        self.clock = clock
+        # 返回当前内存使用率的可调用对象，供 tick() 使用
+        self.memory_source = memory_source
+
+        self._lock = threading.Lock()
+        self._running = False
+        # 使用率回落到低水位以下后重新武装，此时只受最小间隔限制
+        self._armed = True
+        self._interval = min_interval
+        self._last_finish = None
+        self.last_freed = None
+
+    def configure(self, high_watermark=None, low_watermark=None, min_interval=None):
+        """运行时更新阈值与间隔"""
+        with self._lock:
+            if high_watermark is not None:
+                self.high_watermark = high_watermark
+                if low_watermark is None:
+                    self.low_watermark = high_watermark - 10
+            if low_watermark is not None:
+                self.low_watermark = low_watermark
+            if min_interval is not None:
+                self.min_interval = min_interval
+                self._interval = max(self._interval, min_interval)
+
+    @property
+    def running(self):
+        return self._running
+
+    @property
+    def current_interval(self):
+        """下一次自动清理前需要等待的秒数"""
+        return self.min_interval if self._armed else self._interval
+
+    def next_allowed(self):
+        """允许下一次自动清理的时刻"""
+        if self._last_finish is None:
+            return None
+        return self._last_finish + self.current_interval
+
+    def should_clean(self, percent):
+        """根据当前使用率判断是否开始自动清理，返回 True 时调用方必须在结束后调用 finish()"""
+        with self._lock:
+            if percent < self.low_watermark:
+                # 压力解除：重新武装并清除退避
+                self._armed = True
+                self._interval = self.min_interval
+                return False
+            if percent < self.high_watermark or self._running:
+                return False
+            allowed = self.next_allowed()
+            if allowed is not None and self.clock() < allowed:
+                return False
+            self._running = True
+            return True
+
+    def on_pressure(self):
+        """内核报告内存压力：不看水位，只受冷却、退避与单次运行限制，返回 True 时必须调用 finish()"""
+        return self.try_auto()
+
+    def try_auto(self):
+        """由外部条件（压力事件、策略规则）决定清理时使用，只受冷却、退避与单次运行限制"""
+        with self._lock:
+            if self._running:
+                return False
+            allowed = self.next_allowed()
+            if allowed is not None and self.clock() < allowed:
+                return False
+            self._running = True
+            return True
+
+    def rearm(self):
+        """外部条件不再满足：重新武装并清除退避，相当于使用率回落到低水位以下"""
+        with self._lock:
+            self._armed = True
+            self._interval = self.min_interval
+
+    def tick(self):
+        """从 memory_source 读取使用率并判断是否清理"""
+        return self.should_clean(self.memory_source())
+
+    def try_begin(self):
+        """手动清理：不受水位与间隔限制，但同一时刻只允许一次清理"""
+        with self._lock:
+            if self._running:
+                return False
+            self._running = True
+            return True
+
+    def finish(self, freed_bytes):
+        """清理结束（失败时传入 0），更新退避状态"""
+        with self._lock:
+            self._running = False
+            self._last_finish = self.clock()
+            self.last_freed = freed_bytes
+            if freed_bytes < self.min_freed:
+                # 效果不佳：在使用率回落前按指数退避
+                if not self._armed:
+                    self._interval = min(self.max_interval, self._interval * self.backoff_factor)
+            else:
+                self._interval = self.min_interval
+            self._armed = False
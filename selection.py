@@ -0,0 +1,114 @@
+"""按可回收内存为进程排序，只清理最值得清理的进程"""
+import time
+
+import psutil
+
+
+class ProcessSelector:
+    def __init__(self, top_n=None, target_available=None, allow=(), deny=(),
+                 idle_horizon=60.0, clock=time.monotonic):
+        # top_n: 最多清理的进程数；target_available: 清理到可用内存达到该字节数为止
+        self.top_n = top_n
+        self.target_available = target_available
+        # 按进程名过滤（不区分大小写）；allow 非空时只清理其中的进程
+        self.allow = {name.lower() for name in allow}
+        self.deny = {name.lower() for name in deny}
+        # 空闲时间达到该秒数的进程获得完整得分，越活跃的进程得分越低
+        self.idle_horizon = idle_horizon
+        self.clock = clock
+        # pid -> (上次 CPU 时间, 上次观察到 CPU 时间变化的时刻)
+        self._activity = {}
+        # 返回应当跳过的 pid 集合的可调用对象，例如回弹跟踪
+        self.exclusions = []
+
+    def add_exclusion(self, provider):
+        self.exclusions.append(provider)
+
+    def is_selective(self):
+        """是否需要按得分挑选进程，否则清理全部候选进程"""
+        return self.top_n is not None or self.target_available is not None
+
+    def filter_names(self, processes):
+        """按允许/拒绝名单及排除集合过滤 (pid, name) 列表"""
+        excluded = set()
+        for provider in self.exclusions:
+            excluded |= provider()
+        selected = []
+        for pid, name in processes:
+            if pid in excluded:
+                continue
+            key = (name or "").lower()
+            if key in self.deny:
+                continue
+            if self.allow and key not in self.allow:
+                continue
+            selected.append((pid, name))
+        return selected
+
+    def idle_time(self, pid, cpu_time, now):
+        """根据两次观察之间 CPU 时间是否增长估算进程空闲时长"""
+        previous = self._activity.get(pid)
+        if previous is None or cpu_time != previous[0]:
+            # 首次见到或刚刚活跃过的进程按活跃处理
+            self._activity[pid] = (cpu_time, now)
+            return 0.0
+        return now - previous[1]
+
+    def score(self, stats, idle):
+        """可回收得分：工作集与私有内存的均值，按空闲程度加权"""
+        idle_factor = min(1.0, 0.25 + 0.75 * idle / self.idle_horizon) if self.idle_horizon else 1.0
+        return (stats['rss'] + stats['private']) / 2 * idle_factor
+
+    def rank(self, backend, processes):
+        """采集进程指标并按得分从高到低排序"""
+        now = self.clock()
+        ranked = []
+        seen = set()
+        for pid, name in processes:
+            try:
+                stats = backend.process_info(pid)
+            except (psutil.Error, OSError):
+                continue
+            if stats is None:
+                continue
+            seen.add(pid)
+            idle = self.idle_time(pid, stats['cpu_time'], now)
+            ranked.append({
+                'pid': pid,
+                'name': name,
+                'rss': stats['rss'],
+                'private': stats['private'],
+                'idle': idle,
+                'score': self.score(stats, idle),
+            })
+
+        # 丢弃已退出进程的活跃记录
+        for pid in list(self._activity):
+            if pid not in seen:
+                del self._activity[pid]
+
+        ranked.sort(key=lambda c: c['score'], reverse=True)
+        return ranked
+
+    def select(self, backend, processes, available):
+        """返回本次需要清理的 pid 列表"""
+        processes = self.filter_names(processes)
+        if not self.is_selective():
+            return [pid for pid, name in processes]
+
+        ranked = self.rank(backend, processes)
+        if self.top_n is not None:
+            ranked = ranked[:self.top_n]
+
+        if self.target_available is None:
+            return [c['pid'] for c in ranked]
+
+        # 只挑选足以达到目标可用内存的进程
+        needed = self.target_available - available
+        selected = []
+        for candidate in ranked:
+            if needed <= 0:
+                break
+            selected.append(candidate['pid'])
+            needed -= candidate['rss']
+        return selected
@@ -0,0 +1,36 @@
+"""自适应稳定检测：高频采样，数值稳定后立即返回，取代固定等待"""
+import time
+
+
+def wait_for_settle(read, key=None, tolerance=8 * 1024 ** 2, interval=0.05,
+                    stable_samples=3, timeout=3.0, clock=time.monotonic, sleep=time.sleep):
+    """反复调用 read() 直到最近 stable_samples 个采样的波动不超过 tolerance
+
+    key 用于从采样中取出比较的数值（默认直接比较 read() 的返回值）。
+    超过 timeout 秒仍未稳定时返回最后的采样，converged 为 False。
+    """
+    if key is None:
+        key = lambda sample: sample
+    started = clock()
+    window = []
+    samples = 0
+
+    while True:
+        sample = read()
+        samples += 1
+        window.append(key(sample))
+        if len(window) > stable_samples:
+            window.pop(0)
+
+        elapsed = clock() - started
+        converged = (len(window) == stable_samples and
+                     max(window) - min(window) <= tolerance)
+        if converged or elapsed >= timeout:
+            return {
+                'sample': sample,
+                'value': sum(window) / len(window),
+                'elapsed': elapsed,
+                'converged': converged,
+                'samples': samples,
+            }
+        sleep(interval)
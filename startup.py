@@ -0,0 +1,43 @@
+"""启动耗时分析：记录各阶段的开始时刻与耗时，供 --profile-startup 输出报告"""
+import importlib
+import time
+from contextlib import contextmanager
+
+
+class StartupProfiler:
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.started = clock()
+        # (名称, 相对启动的开始时刻, 耗时)，耗时为 None 表示里程碑
+        self.records = []
+
+    @contextmanager
+    def phase(self, name):
+        """记录一个阶段的耗时"""
+        begin = self.clock()
+        try:
+            yield
+        finally:
+            self.records.append((name, begin - self.started, self.clock() - begin))
+
+    def import_module(self, name):
+        """导入模块并记录耗时（已导入的模块耗时接近 0）"""
+        with self.phase(f"import {name}"):
+            return importlib.import_module(name)
+
+    def mark(self, name):
+        """记录一个里程碑，例如首帧绘制"""
+        self.records.append((name, self.clock() - self.started, None))
+
+    def elapsed(self):
+        return self.clock() - self.started
+
+    def report(self):
+        """生成文本报告，时间单位为毫秒"""
+        # 名称放在最后一列，避免中文宽字符破坏对齐
+        lines = [f"{'开始(ms)':>10}{'耗时(ms)':>10}  阶段"]
+        for name, offset, duration in self.records:
+            cost = f"{duration * 1000:.1f}" if duration is not None else "-"
+            lines.append(f"{offset * 1000:>12.1f}{cost:>12}  {name}")
+        lines.append(f"{self.elapsed() * 1000:>12.1f}{'':>12}  总计")
+        return "\n".join(lines)
@@ -0,0 +1,92 @@
+"""交换区感知的清理：按交换区 I/O 速率限速或中止按进程清理，避免把热页面推到磁盘引发 I/O 风暴"""
+import threading
+import time
+from collections import deque
+
+MB = 1024 ** 2
+
+
+class SwapGovernor:
+    def __init__(self, backend, budget=64 * MB, abort_factor=4.0, max_swap_percent=90.0,
+                 window=0.5, max_wait=2.0, clock=time.monotonic, sleep=time.sleep):
+        self.backend = backend
+        # 交换区读写合计的预算（字节/秒），超出时暂停后续进程的清理；0 表示不限制
+        self.budget = budget
+        # 速率超过预算的 abort_factor 倍，或暂停 max_wait 秒后仍未回落时中止本次清理
+        self.abort_factor = abort_factor
+        self.max_wait = max_wait
+        # 交换区使用率超过该值时不再换出页面
+        self.max_swap_percent = max_swap_percent
+        # 速率按最近 window 秒内的计数器增量计算，不足 window 秒时按 window 秒折算；
+        # 计数器每 window 秒最多读取一次，其余调用直接返回缓存的速率
+        self.window = window
+        self.clock = clock
+        self.sleep = sleep
+
+        self._lock = threading.Lock()
+        # (时刻, 累计换入, 累计换出)，保留窗口内的读数以及窗口前最近的一个
+        self._readings = deque()
+        # 某个线程正在读取计数器时，其他线程不再重复读取
+        self._reading = False
+        self.rate = (0.0, 0.0)
+        self.aborted = None
+        self.throttled = 0
+
+    def counters(self):
+        """累计换入、换出字节数"""
+        return self.backend.swap_io()
+
+    def measure(self):
+        """返回最近一个窗口内的 (换入, 换出) 速率（字节/秒）"""
+        now = self.clock()
+        with self._lock:
+            readings = self._readings
+            if self._reading or (readings and now - readings[-1][0] < self.window):
+                return self.rate
+            self._reading = True
+        # 在锁外读取计数器，清理线程不会排队等待文件读取
+        try:
+            swap_in, swap_out = self.counters()
+        finally:
+            with self._lock:
+                self._reading = False
+        with self._lock:
+            readings.append((now, swap_in, swap_out))
+            while len(readings) > 2 and now - readings[1][0] >= self.window:
+                readings.popleft()
+            base_time, base_in, base_out = readings[0]
+            elapsed = max(now - base_time, self.window)
+            self.rate = (max(0, swap_in - base_in) / elapsed, max(0, swap_out - base_out) / elapsed)
+            return self.rate
+
+    def begin(self):
+        """清理开始前调用：交换区将满时返回原因，否则返回 None"""
+        self.aborted = None
+        self.throttled = 0
+        with self._lock:
+            self._readings.clear()
+        self.measure()
+        swap = self.backend.swap_memory()
+        if swap.total and swap.percent >= self.max_swap_percent:
+            self.aborted = f"交换区使用率 {swap.percent:.0f}% 超过 {self.max_swap_percent:.0f}%"
+        return self.aborted
+
+    def gate(self, pid):
+        """每个进程清理前调用：超出预算时等待回落，无法回落时返回 False 中止后续清理"""
+        if self.aborted is not None:
+            return False
+        if not self.budget or not self.backend.swap_io_counters:
+            return True
+        waited = 0.0
+        while True:
+            total = sum(self.measure())
+            if total <= self.budget:
+                return True
+            if total > self.budget * self.abort_factor or waited >= self.max_wait:
+                self.aborted = (f"交换区 I/O {total / MB:.1f}MB/s 超过预算 "
+                                f"{self.budget / MB:.0f}MB/s")
+                return False
+            with self._lock:
+                self.throttled += 1
+            self.sleep(self.window)
+            waited += self.window
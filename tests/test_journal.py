@@ -0,0 +1,120 @@
+"""Journal 的写入、按时间范围读取、段轮转与异常退出后的恢复"""
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from journal import HEADER, KIND_CLEAN, KIND_SAMPLE, RECORD, Journal, Segment
+from sampler import make_snapshot
+
+GB = 1024 ** 3
+
+
+def memory_info(percent):
+    card = {'used': int(percent / 100 * 16 * GB), 'total': 16 * GB, 'percent': percent}
+    return {'physical': card, 'virtual': card, 'system': card, 'working_set': card}
+
+
+def clean_result(freed):
+    return {
+        'trigger': "pressure",
+        'strategy_results': {"working_set": True, "standby_list": False},
+        'before_percent': 90.0, 'after_percent': 70.0,
+        'freed_bytes': freed, 'swap_io_bytes': 4096, 'duration': 1.25,
+    }
+
+
+class JournalTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.now = 1000000.0
+        self.journal = self.open()
+
+    def tearDown(self):
+        self.journal.close()
+        shutil.rmtree(self.directory)
+
+    def open(self, **options):
+        return Journal(self.directory, flush_interval=0, clock=lambda: self.now, **options)
+
+    def append_samples(self, count, start=0):
+        for i in range(start, start + count):
+            self.journal.append_sample(make_snapshot(self.now + i, 0.001, memory_info(float(i % 100))))
+
+    def test_round_trip(self):
+        self.append_samples(10)
+        self.now += 5.5
+        self.journal.append_clean(clean_result(512 * 1024 ** 2))
+        samples = list(self.journal.query(kind=KIND_SAMPLE))
+        self.assertEqual([s.physical_percent for s in samples], [float(i) for i in range(10)])
+        self.assertEqual(samples[3].time, 1000003.0)
+        self.assertEqual(samples[3].physical_used, int(3 / 100 * 16 * GB))
+        cleans = list(self.journal.query(kind=KIND_CLEAN))
+        self.assertEqual(len(cleans), 1)
+        clean = cleans[0]
+        self.assertEqual((clean.time, clean.trigger), (1000005.5, "pressure"))
+        self.assertEqual(clean.strategies, ["working_set", "standby_list"])
+        self.assertEqual(clean.succeeded, ["working_set"])
+        self.assertEqual((clean.freed_bytes, clean.swap_io_bytes), (512 * 1024 ** 2, 4096))
+
+    def test_time_range(self):
+        self.append_samples(100)
+        times = [record.time - 1000000 for record in self.journal.query(1000020, 1000030)]
+        self.assertEqual(times, list(range(20, 30)))
+        self.assertEqual(len(list(self.journal.query(1000095.5))), 4)
+
+    def test_segment_bisect(self):
+        self.append_samples(50)
+        self.journal.flush()
+        segment = Segment(self.journal.segments()[0])
+        try:
+            self.assertEqual(segment.count, 50)
+            self.assertEqual(segment.bisect(0), 0)
+            self.assertEqual(segment.bisect(1000010), 10)
+            self.assertEqual(segment.bisect(1000010.5), 11)
+            self.assertEqual(segment.bisect(2000000), 50)
+        finally:
+            segment.close()
+
+    def test_rotation_and_pruning(self):
+        self.journal.close()
+        self.journal = self.open(segment_bytes=HEADER.size + 10 * RECORD.size, max_segments=3)
+        self.append_samples(45)
+        self.assertEqual(len(self.journal.segments()), 3)
+        times = [record.time - 1000000 for record in self.journal.query()]
+        self.assertEqual(times, list(range(20, 45)))
+        # 跨段的时间范围
+        times = [record.time - 1000000 for record in self.journal.query(1000028, 1000032)]
+        self.assertEqual(times, [28, 29, 30, 31])
+
+    def test_truncated_tail_is_ignored_and_repaired(self):
+        self.append_samples(5)
+        self.journal.close()
+        path = self.journal.segments()[-1]
+        with open(path, "ab") as f:
+            f.write(b"\0" * (RECORD.size // 2))
+        self.journal = self.open()
+        self.assertEqual(len(list(self.journal.query())), 5)
+        self.append_samples(1, start=5)
+        self.assertEqual([r.time - 1000000 for r in self.journal.query()], list(range(6)))
+        self.assertEqual(os.path.getsize(path), HEADER.size + 6 * RECORD.size)
+
+    def test_downsample(self):
+        self.append_samples(100)
+        points = self.journal.downsample(1000000, 1000100, points=4)
+        self.assertEqual([start - 1000000 for start, average, peak in points], [0, 25, 50, 75])
+        self.assertEqual(points[0][1:], (12.0, 24.0))
+        self.assertEqual(points[3][1:], (87.0, 99.0))
+
+    def test_export_csv(self):
+        self.append_samples(3)
+        stream = io.StringIO()
+        self.assertEqual(self.journal.export_csv(stream), 3)
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(lines[0].split(",")[:2], ["time", "physical_percent"])
+        self.assertEqual(len(lines), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
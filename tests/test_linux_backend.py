@@ -0,0 +1,134 @@
+"""LinuxBackend 在 dry_run 模式下对模拟的 /proc 目录只记录操作"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+MEMINFO = """MemTotal:       16384000 kB
+MemFree:         2048000 kB
+MemAvailable:    8192000 kB
+Buffers:          102400 kB
+Cached:          4096000 kB
+SwapTotal:       4096000 kB
+SwapFree:        4096000 kB
+"""
+# pid (comm) state ppid ... flags 为第 9 个字段，starttime 为第 22 个字段
+STAT = "{pid} ({name}) S {ppid} 1 1 0 -1 {flags} 100 0 20 0 5 3 0 0 20 0 1 0 {start} 0 0"
+
+
+@unittest.skipUnless(sys.platform.startswith("linux"), "需要 Linux")
+class LinuxBackendDryRunTest(unittest.TestCase):
+    def setUp(self):
+        from backends import LinuxBackend
+
+        self.root = tempfile.mkdtemp()
+        self.write("meminfo", MEMINFO)
+        self.write("vmstat", "pswpin 10\npswpout 20\n")
+        # 存在 /proc/self/reclaim 时按进程清理写入 /proc/[pid]/reclaim
+        self.write("self/reclaim", "")
+        self.write("sys/vm/drop_caches", "")
+        self.write("sys/vm/compact_memory", "")
+        self.add_process(1, "systemd", ppid=0)
+        self.add_process(2, "kthreadd", ppid=0, flags=0x00208040)
+        self.add_process(42, "kworker/0:1", ppid=2, flags=0x04208060)
+        self.add_process(500, "my app", ppid=1, start=12345)
+        self.backend = LinuxBackend(proc_root=self.root, dry_run=True)
+
+    def tearDown(self):
+        self.backend.close()
+        shutil.rmtree(self.root)
+
+    def write(self, name, text):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def add_process(self, pid, name, ppid, flags=0x00400100, start=100):
+        self.write(f"{pid}/stat", STAT.format(pid=pid, name=name, ppid=ppid, flags=flags, start=start))
+        self.write(f"{pid}/comm", name + "\n")
+
+    def test_memory_from_meminfo(self):
+        memory = self.backend.virtual_memory()
+        self.assertEqual(memory.total, 16384000 * 1024)
+        self.assertEqual(memory.available, 8192000 * 1024)
+        page = self.backend.page_size
+        self.assertEqual(self.backend.swap_io(), (10 * page, 20 * page))
+
+    def test_actions_are_recorded_not_written(self):
+        self.backend.trim_system_working_set()
+        self.assertTrue(self.backend.trim_process(500))
+        self.backend.compact_memory()
+        self.assertEqual(self.backend.actions, [
+            ("drop_caches", os.path.join(self.root, "sys/vm/drop_caches"), 1),
+            ("process_reclaim", os.path.join(self.root, "500/reclaim"), "all"),
+            ("compact_memory", os.path.join(self.root, "sys/vm/compact_memory"), 1),
+        ])
+        with open(os.path.join(self.root, "sys/vm/drop_caches")) as f:
+            self.assertEqual(f.read(), "")
+
+    def test_trim_checks_start_time(self):
+        start = self.backend.process_start_time(500)
+        self.assertEqual(start, 12345 / self.backend.clock_ticks)
+        self.assertEqual(self.backend.process_identity(500), ("my app", start))
+        self.assertFalse(self.backend.trim_process(500, start + 1))
+        self.assertTrue(self.backend.trim_process(500, start))
+        self.assertEqual(len(self.backend.actions), 1)
+
+    def test_protected_processes(self):
+        self.assertEqual([pid for pid in (1, 2, 42, 500) if self.backend.is_protected(pid)], [1, 2, 42])
+        # 已退出的进程同样跳过
+        self.assertTrue(self.backend.is_protected(999))
+
+    def test_engine_skips_kernel_threads(self):
+        from engine import MemoryCleanEngine
+
+        engine = MemoryCleanEngine(self.backend, swap_budget=0)
+        engine.settle_timeout = 0.0
+        engine.perform_clean(["standby_list"])
+        trimmed = [target for mechanism, target, value in self.backend.actions
+                   if mechanism == "process_reclaim"]
+        self.assertEqual(trimmed, [os.path.join(self.root, "500/reclaim")])
+
+    def test_drop_caches_requires_capability(self):
+        from backends import LinuxBackend
+
+        os.remove(os.path.join(self.root, "sys/vm/drop_caches"))
+        backend = LinuxBackend(proc_root=self.root)
+        try:
+            with self.assertRaises(OSError):
+                backend.trim_system_working_set()
+        finally:
+            backend.close()
+
+    def test_registry_detects_reused_pid(self):
+        from registry import ProcessRegistry
+
+        registry = ProcessRegistry(self.backend)
+        registry.refresh()
+        reads = []
+        start_time = self.backend.process_start_time
+        self.backend.process_start_time = lambda pid: reads.append(pid) or start_time(pid)
+
+        self.assertEqual(registry.refresh()["added"], [])
+        self.assertEqual(reads, [])
+
+        # 先建新目录再删旧目录，保证新进程的目录是另一个 inode
+        os.rename(os.path.join(self.root, "500"), os.path.join(self.root, "old-500"))
+        self.add_process(500, "postgres", ppid=1, start=67890)
+        shutil.rmtree(os.path.join(self.root, "old-500"))
+        changes = registry.refresh()
+        self.assertEqual(reads, [500])
+        self.assertEqual([(e["pid"], e["name"]) for e in changes["removed"]], [(500, "my app")])
+        self.assertEqual([(e["pid"], e["name"]) for e in changes["added"]], [(500, "postgres")])
+
+    def test_close_releases_meminfo(self):
+        self.backend.close()
+        self.assertIsNone(self.backend.meminfo._fd)
+        # 重复关闭不报错，tearDown 还会再关一次
+        self.backend.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
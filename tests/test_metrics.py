@@ -0,0 +1,45 @@
+"""MetricsExporter 通过 HTTP 提供预先渲染的指标"""
+import unittest
+import urllib.error
+import urllib.request
+
+from metrics import CONTENT_TYPE, CleanerMetrics, MetricsExporter
+
+
+class MetricsExporterTest(unittest.TestCase):
+    def setUp(self):
+        self.metrics = CleanerMetrics()
+        # 端口 0 由系统分配空闲端口
+        self.exporter = MetricsExporter(self.metrics, port=0).start()
+        host, port = self.exporter.address[:2]
+        self.url = f"http://{host}:{port}"
+
+    def tearDown(self):
+        self.exporter.stop()
+
+    def scrape(self, path="/metrics"):
+        with urllib.request.urlopen(self.url + path, timeout=5) as response:
+            return response.headers["Content-Type"], response.read().decode("utf-8")
+
+    def test_scrape(self):
+        self.metrics.observe_clean({
+            'strategy_results': {"working_set": True, "standby_list": False},
+            'freed_bytes': 256 * 1024 ** 2, 'duration': 1.5,
+            'swap_in_bytes': 4096, 'swap_out_bytes': 8192,
+        })
+        content_type, body = self.scrape()
+        self.assertEqual(content_type, CONTENT_TYPE)
+        self.assertIn("# TYPE memoptima_clean_runs_total counter", body)
+        self.assertIn("memoptima_clean_runs_total 1", body)
+        self.assertIn('memoptima_clean_strategy_total{result="failure",strategy="standby_list"} 1', body)
+        self.assertIn('memoptima_clean_swap_io_bytes_total{direction="out"} 8192', body)
+        self.assertIn("memoptima_clean_duration_seconds_count 1", body)
+
+    def test_unknown_path(self):
+        with self.assertRaises(urllib.error.HTTPError) as context:
+            self.scrape("/other")
+        self.assertEqual(context.exception.code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+"""ReboundTracker 按进程与按清理项目的净收益"""
+import unittest
+
+from backends import FakeBackend
+from metrics import CleanerMetrics
+from rebound import PAGE_SIZE, ReboundTracker
+
+MB = 1024 ** 2
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class ReboundTrackerTest(unittest.TestCase):
+    def setUp(self):
+        self.backend = FakeBackend(processes={
+            10: {"name": "quiet", "rss": 100 * MB},
+            20: {"name": "busy", "rss": 100 * MB},
+        })
+        self.clock = FakeClock()
+        self.tracker = ReboundTracker(self.backend, window=3.0, interval=1.0, smoothing=0.5,
+                                      clock=self.clock, sleep=self.clock.sleep)
+
+    def clean(self, freed_by_strategy, rebound):
+        """模拟一次清理：两个进程都被清空，busy 随后回涨 rebound 字节并产生硬缺页"""
+        baseline = self.tracker.snapshot([10, 20])
+        for proc in self.backend.processes.values():
+            proc["rss"] = 0
+        clock = self.clock
+
+        def snapshot(pids, original=self.tracker.snapshot):
+            if clock.now > 0:
+                proc = self.backend.processes[20]
+                proc["rss"] = rebound
+                proc["major_faults"] = 10 if rebound else 0
+            return original(pids)
+
+        self.tracker.snapshot = snapshot
+        try:
+            return self.tracker.track(baseline, freed_by_strategy,
+                                      sum(freed_by_strategy.values()), background=False)
+        finally:
+            del self.tracker.snapshot
+            self.clock.now = 0.0
+            for proc in self.backend.processes.values():
+                proc.update(rss=100 * MB, major_faults=0)
+
+    def test_rebound_is_charged_to_process_trim(self):
+        report = self.clean({"standby_list": 200 * MB, "system_working_set": 50 * MB}, 80 * MB)
+        cost = 80 * MB + 10 * PAGE_SIZE * self.tracker.major_fault_cost
+        self.assertEqual(report["strategy_net_bytes"], {
+            "standby_list": 200 * MB - cost,
+            "system_working_set": 50 * MB,
+        })
+        self.assertEqual(report["net_bytes"], 250 * MB - cost)
+        self.assertEqual(report["processes"][10]["score"], 1.0)
+        self.assertLess(report["processes"][20]["score"], self.tracker.skip_threshold)
+        self.assertEqual(self.tracker.skip_pids(), {20})
+
+    def test_strategy_scores_are_smoothed(self):
+        self.clean({"standby_list": 200 * MB}, 0)
+        report = self.clean({"standby_list": 100 * MB}, 0)
+        self.assertEqual(report["strategy_scores"]["standby_list"],
+                         {"net_bytes": 150 * MB, "runs": 2})
+
+    def test_metrics_export_strategy_net(self):
+        metrics = CleanerMetrics()
+        metrics.observe_rebound(self.clean({"system_working_set": 64 * MB}, 0))
+        self.assertIn(f'memoptima_clean_strategy_net_bytes{{strategy="system_working_set"}} {64 * MB}',
+                      metrics.rendered.decode("utf-8"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+"""ProcessRegistry 的增量刷新与 pid 复用"""
+import unittest
+
+from backends import FakeBackend
+from registry import ProcessRegistry
+
+
+class ProcessRegistryTest(unittest.TestCase):
+    def setUp(self):
+        self.backend = FakeBackend(processes={
+            500: {"name": "bash", "rss": 1, "create_time": 1.0},
+            600: {"name": "sshd", "rss": 1, "create_time": 2.0},
+        })
+        self.evicted = []
+        self.registry = ProcessRegistry(self.backend, on_evict=self.evicted.append)
+
+    def test_added_and_removed(self):
+        changes = self.registry.refresh()
+        self.assertEqual(sorted(e["pid"] for e in changes["added"]), [500, 600])
+        del self.backend.processes[600]
+        changes = self.registry.refresh()
+        self.assertEqual(changes["added"], [])
+        self.assertEqual([e["pid"] for e in changes["removed"]], [600])
+        self.assertEqual(self.registry.processes(), [(500, "bash")])
+
+    def test_reused_pid_is_replaced(self):
+        self.registry.refresh()
+        self.backend.processes[500] = {"name": "postgres", "rss": 1, "create_time": 3.0}
+        changes = self.registry.refresh()
+        self.assertEqual([(e["pid"], e["name"]) for e in changes["removed"]], [(500, "bash")])
+        self.assertEqual([(e["pid"], e["name"]) for e in changes["added"]], [(500, "postgres")])
+        self.assertEqual(self.registry.get(500)["create_time"], 3.0)
+        self.assertEqual([e["name"] for e in self.evicted], ["bash"])
+        self.assertEqual(len(self.registry), 2)
+
+    def test_unchanged_pids_are_not_reread(self):
+        self.registry.refresh()
+        calls = []
+        for method in ("process_identity", "process_start_time"):
+            original = getattr(self.backend, method)
+            setattr(self.backend, method,
+                    lambda pid, original=original, method=method: calls.append((method, pid)) or original(pid))
+        self.backend.processes[700] = {"name": "vim", "rss": 1, "create_time": 4.0}
+        changes = self.registry.refresh()
+        self.assertEqual([e["pid"] for e in changes["added"]], [700])
+        self.assertEqual(changes["removed"], [])
+        self.assertEqual(calls, [("process_identity", 700)])
+
+    def test_reuse_detected_without_tokens(self):
+        # 后端给不出标记时，每个已登记的 pid 都重新读取创建时间
+        self.backend.pid_tokens = lambda: dict.fromkeys(self.backend.list_pids())
+        self.registry.refresh()
+        self.backend.processes[600] = {"name": "nginx", "rss": 1, "create_time": 5.0}
+        changes = self.registry.refresh()
+        self.assertEqual([(e["pid"], e["name"]) for e in changes["removed"]], [(600, "sshd")])
+        self.assertEqual([(e["pid"], e["name"]) for e in changes["added"]], [(600, "nginx")])
+
+    def test_engine_does_not_trim_reused_denied_pid(self):
+        from engine import MemoryCleanEngine
+        from selection import ProcessSelector
+
+        engine = MemoryCleanEngine(self.backend, selector=ProcessSelector(deny=["postgres"]),
+                                   swap_budget=0)
+        engine.settle_timeout = 0.0
+        engine.perform_clean(["standby_list"])
+        self.backend.processes[500] = {"name": "postgres", "rss": 1, "create_time": 3.0}
+        self.backend.calls.clear()
+        engine.perform_clean(["standby_list"])
+        self.assertNotIn(("trim_process", 500), self.backend.calls)
+        self.assertIn(("trim_process", 600), self.backend.calls)
+
+
+if __name__ == "__main__":
+    unittest.main()
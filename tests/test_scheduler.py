@@ -0,0 +1,118 @@
+"""AutoCleanScheduler 的水位、单次运行、退避与重新武装"""
+import unittest
+
+from scheduler import AutoCleanScheduler
+
+MB = 1024 ** 2
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class AutoCleanSchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.scheduler = AutoCleanScheduler(high_watermark=80, min_interval=30, min_freed=64 * MB,
+                                            backoff_factor=2, max_interval=100, clock=self.clock)
+
+    def test_watermarks(self):
+        self.assertFalse(self.scheduler.should_clean(79.9))
+        self.assertTrue(self.scheduler.should_clean(80))
+
+    def test_single_flight(self):
+        self.assertTrue(self.scheduler.should_clean(90))
+        self.assertFalse(self.scheduler.should_clean(90))
+        self.assertFalse(self.scheduler.try_begin())
+        self.assertFalse(self.scheduler.on_pressure())
+        self.scheduler.finish(128 * MB)
+        self.assertTrue(self.scheduler.try_begin())
+
+    def test_min_interval_after_finish(self):
+        self.assertTrue(self.scheduler.should_clean(90))
+        self.scheduler.finish(128 * MB)
+        self.clock.advance(29)
+        self.assertFalse(self.scheduler.should_clean(90))
+        self.clock.advance(1)
+        self.assertTrue(self.scheduler.should_clean(90))
+
+    def test_backoff_until_max_interval(self):
+        intervals = []
+        for _ in range(5):
+            self.clock.advance(1000)
+            self.assertTrue(self.scheduler.should_clean(90))
+            self.scheduler.finish(0)
+            intervals.append(self.scheduler.current_interval)
+        # 第一次清理后只解除武装，之后每次效果不佳都加倍，直到 max_interval
+        self.assertEqual(intervals, [30, 60, 100, 100, 100])
+        self.clock.advance(99)
+        self.assertFalse(self.scheduler.should_clean(90))
+        self.clock.advance(1)
+        self.assertTrue(self.scheduler.should_clean(90))
+
+    def test_effective_clean_resets_backoff(self):
+        for _ in range(3):
+            self.clock.advance(1000)
+            self.scheduler.should_clean(90)
+            self.scheduler.finish(0)
+        self.assertEqual(self.scheduler.current_interval, 100)
+        self.clock.advance(1000)
+        self.scheduler.should_clean(90)
+        self.scheduler.finish(128 * MB)
+        self.assertEqual(self.scheduler.current_interval, 30)
+
+    def test_low_watermark_rearms(self):
+        for _ in range(3):
+            self.clock.advance(1000)
+            self.scheduler.should_clean(90)
+            self.scheduler.finish(0)
+        self.assertEqual(self.scheduler.current_interval, 100)
+        self.assertFalse(self.scheduler.should_clean(69))
+        self.assertEqual(self.scheduler.current_interval, 30)
+        self.clock.advance(30)
+        self.assertTrue(self.scheduler.should_clean(90))
+
+    def test_rearm_clears_backoff(self):
+        for _ in range(3):
+            self.clock.advance(1000)
+            self.scheduler.try_auto()
+            self.scheduler.finish(0)
+        self.scheduler.rearm()
+        self.assertEqual(self.scheduler.current_interval, 30)
+        self.assertEqual(self.scheduler.next_allowed(), self.clock.now + 30)
+
+    def test_tick_reads_memory_source(self):
+        readings = iter([85, 85, 75, 85, 85, 60, 85])
+        scheduler = AutoCleanScheduler(high_watermark=80, min_interval=30, min_freed=64 * MB,
+                                       backoff_factor=2, max_interval=600, clock=self.clock,
+                                       memory_source=lambda: next(readings))
+        # 超过高水位开始清理，效果不佳
+        self.assertTrue(scheduler.tick())
+        scheduler.finish(0)
+        self.clock.advance(30)
+        self.assertTrue(scheduler.tick())
+        scheduler.finish(0)
+        self.assertEqual(scheduler.current_interval, 60)
+        # 回落到高低水位之间不会清理，也不会清除退避
+        self.clock.advance(30)
+        self.assertFalse(scheduler.tick())
+        self.assertFalse(scheduler.tick())
+        self.clock.advance(30)
+        self.assertTrue(scheduler.tick())
+        scheduler.finish(0)
+        self.assertEqual(scheduler.current_interval, 120)
+        # 低于低水位后重新武装，只受最小间隔限制
+        self.assertFalse(scheduler.tick())
+        self.clock.advance(30)
+        self.assertTrue(scheduler.tick())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+"""SwapGovernor 的速率缓存、限速与中止"""
+import unittest
+
+from backends import FakeBackend
+from swap import MB, SwapGovernor
+
+
+class CountingBackend(FakeBackend):
+    def __init__(self, **options):
+        super().__init__(**options)
+        self.reads = 0
+
+    def swap_io(self):
+        self.reads += 1
+        return self.swap_in, self.swap_out
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class SwapGovernorTest(unittest.TestCase):
+    def setUp(self):
+        self.backend = CountingBackend()
+        self.clock = FakeClock()
+        self.governor = SwapGovernor(self.backend, budget=64 * MB, window=0.5, max_wait=2.0,
+                                     clock=self.clock, sleep=self.clock.sleep)
+
+    def test_counters_are_read_once_per_window(self):
+        self.governor.begin()
+        for pid in range(100):
+            self.assertTrue(self.governor.gate(pid))
+        self.assertEqual(self.backend.reads, 1)
+        self.clock.now += 0.5
+        self.governor.gate(100)
+        self.assertEqual(self.backend.reads, 2)
+
+    def test_throttles_until_rate_drops(self):
+        self.governor.begin()
+        self.backend.swap_out += 50 * MB
+        self.clock.now += 0.5
+        # 100MB/s 超出预算但不到 4 倍：暂停一个窗口后速率回落
+        self.assertTrue(self.governor.gate(1))
+        self.assertEqual(self.governor.throttled, 1)
+        self.assertIsNone(self.governor.aborted)
+
+    def test_aborts_on_burst(self):
+        self.governor.begin()
+        self.backend.swap_in += 200 * MB
+        self.clock.now += 0.5
+        self.assertFalse(self.governor.gate(1))
+        self.assertIn("超过预算", self.governor.aborted)
+        self.assertFalse(self.governor.gate(2))
+
+    def test_full_swap_aborts_before_trim(self):
+        self.backend.swap_used = int(self.backend.swap_total * 0.95)
+        self.assertIsNotNone(self.governor.begin())
+        self.assertFalse(self.governor.gate(1))
+
+    def test_backend_without_counters_is_not_gated(self):
+        from engine import MemoryCleanEngine
+
+        self.backend.swap_io_counters = False
+        self.governor.begin()
+        reads = self.backend.reads
+        self.backend.swap_out += 500 * MB
+        self.clock.now += 0.5
+        self.assertTrue(self.governor.gate(1))
+        self.assertEqual(self.backend.reads, reads)
+        self.assertIsNone(MemoryCleanEngine(self.backend).trim_scheduler.gate)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+"""TrimScheduler 分批调用后端的批量清理"""
+import threading
+import unittest
+
+from backends import FakeBackend
+from trim import TrimScheduler
+
+
+class RecordingBackend(FakeBackend):
+    def __init__(self, **options):
+        super().__init__(**options)
+        self.batches = []
+        self._batch_lock = threading.Lock()
+
+    def trim(self, pids, create_times=None):
+        with self._batch_lock:
+            self.batches.append((list(pids), dict(create_times or {})))
+        return super().trim(pids, create_times)
+
+
+class TrimSchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.backend = RecordingBackend(processes={
+            pid: {"name": f"p{pid}", "rss": 1024, "create_time": float(pid)} for pid in range(1, 41)
+        })
+
+    def test_batches_cover_every_pid_in_order(self):
+        report = TrimScheduler(self.backend.trim, max_workers=4, batch_size=8).run(range(1, 41))
+        self.assertEqual([r['pid'] for r in report['results']], list(range(1, 41)))
+        self.assertEqual(report['cleaned'], 40)
+        self.assertEqual(sorted(len(pids) for pids, _ in self.backend.batches), [8] * 5)
+
+    def test_small_runs_use_smaller_batches(self):
+        TrimScheduler(self.backend.trim, max_workers=4, batch_size=8).run(range(1, 9))
+        self.assertEqual(sorted(len(pids) for pids, _ in self.backend.batches), [2, 2, 2, 2])
+
+    def test_create_times_reject_reused_pids(self):
+        results = self.backend.trim([1, 2], {1: 1.0, 2: 99.0})
+        self.assertEqual([(r['pid'], r['ok']) for r in results], [(1, True), (2, False)])
+
+    def test_gate_skips_rest_of_batch(self):
+        scheduler = TrimScheduler(self.backend.trim, max_workers=1, batch_size=4,
+                                  gate=lambda pid: pid != 3)
+        report = scheduler.run([1, 2, 3, 4, 5, 6])
+        self.assertEqual([r['pid'] for r in report['results'] if r['ok']], [1, 2, 5, 6])
+        self.assertEqual(report['skipped'], 2)
+
+    def test_stop_skips_pending_batches(self):
+        scheduler = TrimScheduler(self.backend.trim, max_workers=1, batch_size=2)
+        scheduler.stop()
+        self.assertEqual(scheduler.run([1, 2, 3])['skipped'], 3)
+        scheduler.reset()
+        self.assertEqual(scheduler.run([1, 2, 3])['cleaned'], 3)
+
+    def test_engine_passes_registered_create_times(self):
+        from engine import MemoryCleanEngine
+
+        engine = MemoryCleanEngine(self.backend, trim_workers=2, swap_budget=0)
+        engine.settle_timeout = 0.0
+        engine.perform_clean(["standby_list"])
+        create_times = {}
+        for pids, times in self.backend.batches:
+            create_times.update(times)
+        # pid 4 是受保护的 System 进程
+        self.assertEqual(create_times, {pid: float(pid) for pid in range(1, 41) if pid != 4})
+
+
+if __name__ == "__main__":
+    unittest.main()
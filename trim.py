@@ -0,0 +1,103 @@
+"""按进程清理工作集的调度器，把进程分批交给后端的批量清理，批次分发到有界线程池"""
+import os
+import threading
+import time
+
+# 默认工作线程数：清理调用大部分时间阻塞在内核换页上，线程数可以略多于 CPU 数
+DEFAULT_TRIM_WORKERS = min(16, (os.cpu_count() or 1) * 2)
+# 每批进程数：批次越大句柄复用越充分，越小则各线程负载越均衡
+DEFAULT_BATCH_SIZE = 8
+
+
+class TrimScheduler:
+    def __init__(self, trim_batch, max_workers=DEFAULT_TRIM_WORKERS, executor=None, gate=None,
+                 batch_size=DEFAULT_BATCH_SIZE):
+        if max_workers < 1:
+            raise ValueError("max_workers 必须大于 0")
+        if batch_size < 1:
+            raise ValueError("batch_size 必须大于 0")
+        # trim_batch(pids) 清理一批进程，按顺序返回每个进程的 {pid, ok, latency, error}
+        self.trim_batch = trim_batch
+        self.max_workers = max_workers
+        # 每个线程一次提交的进程数，后端可以在一批之内复用句柄等资源
+        self.batch_size = batch_size
+        # 长期运行的进程可以传入共享的线程池，避免每次清理都创建线程
+        self.executor = executor
+        # 每个进程清理前调用 gate(pid)，返回 False 时跳过该进程及同批中剩余的进程（例如交换区 I/O 超出预算）
+        self.gate = gate
+        # 设置后尚未开始的批次全部跳过，用于清理超时或被取消时尽快结束
+        self._stopped = threading.Event()
+
+    def stop(self):
+        """跳过本次清理中尚未开始的批次，已在进行的调用不受影响"""
+        self._stopped.set()
+
+    def reset(self):
+        """清理开始前清除 stop() 的标记"""
+        self._stopped.clear()
+
+    def _run_batch(self, pids):
+        """清理一批进程，被 gate 或 stop() 拦下的进程记为跳过"""
+        allowed = []
+        for pid in pids:
+            if self._stopped.is_set() or (self.gate is not None and not self.gate(pid)):
+                break
+            allowed.append(pid)
+        results = []
+        if allowed:
+            started = time.perf_counter()
+            try:
+                results = list(self.trim_batch(allowed))
+            except Exception as e:
+                latency = (time.perf_counter() - started) / len(allowed)
+                results = [{'pid': pid, 'ok': False, 'latency': latency, 'error': str(e)}
+                           for pid in allowed]
+        results.extend({'pid': pid, 'ok': False, 'latency': 0.0, 'error': None, 'skipped': True}
+                       for pid in pids[len(allowed):])
+        return results
+
+    def run(self, pids):
+        """清理给定的进程列表，返回每个进程的耗时与总耗时"""
+        pids = list(pids)
+        started = time.perf_counter()
+        # 进程较少时缩小批次，保证每个线程都有活干
+        size = max(1, min(self.batch_size, -(-len(pids) // self.max_workers)))
+        batches = [pids[i:i + size] for i in range(0, len(pids), size)]
+
+        if self.max_workers == 1 or len(batches) <= 1:
+            chunks = [self._run_batch(batch) for batch in batches]
+        elif self.executor is not None:
+            chunks = list(self.executor.map(self._run_batch, batches))
+        else:
+            # 延迟导入线程池，命令行只查询状态时不必加载
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(max_workers=self.max_workers,
+                                    thread_name_prefix="trim") as executor:
+                chunks = list(executor.map(self._run_batch, batches))
+
+        results = [result for chunk in chunks for result in chunk]
+        return summarize(results, time.perf_counter() - started, self.max_workers)
+
+
+def summarize(results, wall_time, workers):
+    """汇总一次清理的结果"""
+    latencies = sorted(r['latency'] for r in results)
+    cleaned = sum(1 for r in results if r['ok'])
+    skipped = sum(1 for r in results if r.get('skipped'))
+    report = {
+        'results': results,
+        'cleaned': cleaned,
+        'failed': len(results) - cleaned - skipped,
+        'skipped': skipped,
+        'workers': workers,
+        'wall_time': wall_time,
+        'latency_total': sum(latencies),
+        'latency_avg': 0.0,
+        'latency_p95': 0.0,
+        'latency_max': 0.0,
+    }
+    if latencies:
+        report['latency_avg'] = report['latency_total'] / len(latencies)
+        report['latency_p95'] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        report['latency_max'] = latencies[-1]
+    return report
@@ -0,0 +1,201 @@
+"""Windows 原生 API 层：导入时一次性绑定全部函数原型，并缓存进程句柄
+
+在非 Windows 平台上导入本模块不会加载任何 DLL，AVAILABLE 为 False。
+"""
+import ctypes
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+
+AVAILABLE = sys.platform == "win32"
+
+PROCESS_QUERY_INFORMATION = 0x0400
+PROCESS_SET_QUOTA = 0x0100
+SYNCHRONIZE = 0x00100000
+# 清理进程所需的访问权限，SYNCHRONIZE 用于零等待地判断进程是否已退出
+TRIM_ACCESS = PROCESS_SET_QUOTA | PROCESS_QUERY_INFORMATION | SYNCHRONIZE
+
+WAIT_OBJECT_0 = 0x00000000
+WAIT_TIMEOUT = 0x00000102
+
+# MEMORY_RESOURCE_NOTIFICATION_TYPE
+LowMemoryResourceNotification = 0
+
+# FILETIME（1601 年起的 100 纳秒数）与 Unix 时间戳之间的偏移
+EPOCH_AS_FILETIME = 116444736000000000
+
+
+def _bind(dll, name, argtypes, restype):
+    func = getattr(dll, name)
+    func.argtypes = argtypes
+    func.restype = restype
+    return func
+
+
+if AVAILABLE:
+    from ctypes import wintypes
+
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    psapi = ctypes.WinDLL("psapi", use_last_error=True)
+    shell32 = ctypes.WinDLL("shell32", use_last_error=True)
+
+    OpenProcess = _bind(kernel32, "OpenProcess",
+                        [wintypes.DWORD, wintypes.BOOL, wintypes.DWORD], wintypes.HANDLE)
+    CloseHandle = _bind(kernel32, "CloseHandle", [wintypes.HANDLE], wintypes.BOOL)
+    GetCurrentProcess = _bind(kernel32, "GetCurrentProcess", [], wintypes.HANDLE)
+    WaitForSingleObject = _bind(kernel32, "WaitForSingleObject",
+                                [wintypes.HANDLE, wintypes.DWORD], wintypes.DWORD)
+    GetProcessTimes = _bind(kernel32, "GetProcessTimes",
+                            [wintypes.HANDLE] + [ctypes.POINTER(wintypes.FILETIME)] * 4,
+                            wintypes.BOOL)
+    SetProcessWorkingSetSize = _bind(kernel32, "SetProcessWorkingSetSize",
+                                     [wintypes.HANDLE, ctypes.c_size_t, ctypes.c_size_t],
+                                     wintypes.BOOL)
+    EmptyWorkingSet = _bind(psapi, "EmptyWorkingSet", [wintypes.HANDLE], wintypes.BOOL)
+    GetPerformanceInfo = _bind(psapi, "GetPerformanceInfo",
+                               [ctypes.c_void_p, wintypes.DWORD], wintypes.BOOL)
+    CreateMemoryResourceNotification = _bind(kernel32, "CreateMemoryResourceNotification",
+                                             [ctypes.c_int], wintypes.HANDLE)
+    IsUserAnAdmin = _bind(shell32, "IsUserAnAdmin", [], wintypes.BOOL)
+    ShellExecuteW = _bind(shell32, "ShellExecuteW",
+                          [wintypes.HWND, wintypes.LPCWSTR, wintypes.LPCWSTR,
+                           wintypes.LPCWSTR, wintypes.LPCWSTR, ctypes.c_int],
+                          wintypes.HINSTANCE)
+
+
+def last_error():
+    return ctypes.get_last_error()
+
+
+def process_creation_time(handle):
+    """进程创建时间（Unix 时间戳），失败时返回 None"""
+    creation, exit_time, kernel, user = (wintypes.FILETIME() for i in range(4))
+    if not GetProcessTimes(handle, ctypes.byref(creation), ctypes.byref(exit_time),
+                           ctypes.byref(kernel), ctypes.byref(user)):
+        return None
+    value = (creation.dwHighDateTime << 32) | creation.dwLowDateTime
+    return (value - EPOCH_AS_FILETIME) / 10 ** 7
+
+
+def is_running(handle):
+    """进程对象未处于已触发状态即仍在运行"""
+    return WaitForSingleObject(handle, 0) == WAIT_TIMEOUT
+
+
+class HandleCache:
+    """按 pid 缓存进程句柄的 LRU，打开时记录创建时间以防 pid 被复用"""
+
+    def __init__(self, capacity=1024, access=TRIM_ACCESS):
+        self.capacity = capacity
+        self.access = access
+        # pid -> (句柄, 创建时间)
+        self._handles = OrderedDict()
+        self._lock = threading.Lock()
+        # 正在被某个线程使用的 pid，淘汰时跳过，避免关闭仍在使用的句柄
+        self._in_use = Counter()
+        self.opened = 0
+        self.hits = 0
+
+    def __len__(self):
+        return len(self._handles)
+
+    @contextmanager
+    def use(self, pid, expected_create_time=None):
+        """在 with 块内使用句柄，期间句柄不会被淘汰关闭"""
+        handle = self.acquire(pid, expected_create_time)
+        try:
+            yield handle
+        finally:
+            if handle is not None:
+                with self._lock:
+                    self._in_use[pid] -= 1
+                    if self._in_use[pid] <= 0:
+                        del self._in_use[pid]
+
+    def acquire(self, pid, expected_create_time=None):
+        """返回可用的句柄并标记为使用中，无法打开时返回 None"""
+        with self._lock:
+            cached = self._handles.get(pid)
+            if cached is not None:
+                handle, create_time = cached
+                if is_running(handle) and _same_process(create_time, expected_create_time):
+                    self._handles.move_to_end(pid)
+                    self._in_use[pid] += 1
+                    self.hits += 1
+                    return handle
+                # 进程已退出或 pid 已被复用
+                if pid in self._in_use:
+                    return None
+                del self._handles[pid]
+                CloseHandle(handle)
+
+            handle = OpenProcess(self.access, False, pid)
+            if not handle:
+                return None
+            create_time = process_creation_time(handle)
+            if not _same_process(create_time, expected_create_time):
+                CloseHandle(handle)
+                return None
+            self.opened += 1
+            self._handles[pid] = (handle, create_time)
+            self._in_use[pid] += 1
+            self._evict()
+            return handle
+
+    def _evict(self):
+        # 从最久未使用的句柄开始关闭，跳过正在使用的
+        excess = len(self._handles) - self.capacity
+        for old_pid in list(self._handles):
+            if excess <= 0:
+                break
+            if old_pid in self._in_use:
+                continue
+            old_handle, old_time = self._handles.pop(old_pid)
+            CloseHandle(old_handle)
+            excess -= 1
+
+    def release(self, pid):
+        """进程退出时关闭其句柄"""
+        with self._lock:
+            if pid in self._in_use:
+                return
+            cached = self._handles.pop(pid, None)
+            if cached is not None:
+                CloseHandle(cached[0])
+
+    def clear(self):
+        with self._lock:
+            for handle, create_time in self._handles.values():
+                CloseHandle(handle)
+            self._handles.clear()
+
+
+def _same_process(create_time, expected):
+    # psutil 与 GetProcessTimes 的精度不同，允许少量误差
+    if expected is None or create_time is None:
+        return True
+    return abs(create_time - expected) < 0.01
+
+
+def trim_one(cache, pid, expected_create_time=None):
+    """清空单个进程的工作集，返回 (是否成功, 错误代码)"""
+    with cache.use(pid, expected_create_time) as handle:
+        if handle is None:
+            return False, last_error()
+        if EmptyWorkingSet(handle):
+            return True, 0
+        return False, last_error()
+
+
+def trim(pids, cache, create_times=None):
+    """批量清理，同一批共用句柄缓存，返回每个进程的 {pid, ok, latency, error}"""
+    create_times = create_times or {}
+    results = []
+    for pid in pids:
+        started = time.perf_counter()
+        ok, error = trim_one(cache, pid, create_times.get(pid))
+        results.append({'pid': pid, 'ok': ok, 'latency': time.perf_counter() - started,
+                        'error': None if ok else f"错误代码: {error}"})
+    return results